@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+ASGI serving mode for the backend server.
+
+Serves the same routes as backend_server.py, but COT jobs run as coroutines on
+one asyncio event loop with an httpx FinChat client instead of each occupying a
+worker thread that sleeps between polls. Long-poll status and SSE stream
+requests wait on the loop as well. The remaining (short) routes are served by
+the Flask app through a WSGI adapter, so both modes share one implementation
+of job submission, caching, coalescing and batches.
+
+Run with:
+    python3 asgi_server.py
+or:
+    uvicorn asgi_server:app --host 0.0.0.0 --port 5001
+"""
+
+import asyncio
+import os
+import time
+import traceback
+from contextlib import asynccontextmanager
+from datetime import datetime
+from functools import partial
+from typing import Optional
+
+import httpx
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+
+import backend_server as backend
+from async_cot_client import AsyncFinChatCOTClient
+from document_upload import UploadedDocument
+from job_queue import AsyncJobQueue
+
+
+ASYNC_MAX_JOBS = int(os.getenv('ASYNC_MAX_JOBS', '2000'))  # COT jobs in flight at once (coroutines, not threads)
+ASYNC_WSGI_THREADS = int(os.getenv('ASYNC_WSGI_THREADS', '16'))  # Threads serving the Flask routes
+FINCHAT_MAX_CONNECTIONS = int(os.getenv('FINCHAT_MAX_CONNECTIONS', '100'))  # Open connections to FinChat
+FINCHAT_MAX_KEEPALIVE = int(os.getenv('FINCHAT_MAX_KEEPALIVE', '20'))  # Idle connections kept for reuse
+
+# Same scheduling as the threaded queue, with many more jobs in flight
+job_queue = AsyncJobQueue(
+    max_workers=ASYNC_MAX_JOBS,
+    max_queue_depth=backend.JOB_QUEUE_DEPTH,
+    kind_limits=backend.job_queue.kind_limits,
+    name='cot-async',
+    class_limits=backend.job_queue.class_limits,
+    client_weights=backend.job_queue.client_weights,
+    bulk_aging_seconds=backend.job_queue.bulk_aging_seconds
+)
+
+_cot_client: Optional[AsyncFinChatCOTClient] = None
+
+
+def get_async_cot_client() -> Optional[AsyncFinChatCOTClient]:
+    """Get the shared async COT client (created on first use, on the event loop)."""
+    global _cot_client
+    if not backend.FINCHAT_BASE_URL:
+        return None
+    if _cot_client is None:
+        _cot_client = AsyncFinChatCOTClient(
+            base_url=backend.FINCHAT_BASE_URL,
+            api_token=backend.FINCHAT_API_TOKEN or None,
+            max_connections=FINCHAT_MAX_CONNECTIONS,
+            max_keepalive_connections=FINCHAT_MAX_KEEPALIVE
+        )
+    return _cot_client
+
+
+async def attach_document(client: AsyncFinChatCOTClient, session_id: str, document: UploadedDocument):
+    """Async counterpart of backend.attach_document (by consomme_id if Consomme already has the content)."""
+    consomme_id = backend.document_registry.lookup(document.sha256, document.size)
+    if consomme_id:
+        try:
+            await client.upload_document(session_id, consomme_id=consomme_id)
+            return
+        except httpx.HTTPStatusError as e:
+            # Consomme no longer has it (or rejects the ID): upload the content again
+            print(f"Attaching document {document.name} by ID {consomme_id} failed ({e}); uploading it")
+            backend.document_registry.invalidate(document.sha256)
+    uploaded = await client.upload_document(session_id, document.open(), document.name)
+    backend.document_registry.remember(document.sha256, document.size, uploaded.get('consomme_id'), document.name)
+
+
+async def run_cot_job(kind: str, job_id: str, text: str, purpose: str, *_unused,
+                      document: Optional[UploadedDocument] = None,
+                      session_id: Optional[str] = None, cot_chat_id: Optional[str] = None,
+                      cot_started_at: Optional[float] = None):
+    """
+    Async counterpart of process_cot_analysis / process_cot_v2_analysis.
+    An uploaded document is streamed to the session before the COT runs.
+    If session_id and cot_chat_id are given (job recovered after a restart), polling resumes
+    for the already-submitted COT instead of starting a new one.
+    """
+    # Results are cached (and identical runs coalesced) under the text as submitted,
+    # which the route has already sanitized (the only sanitization the text gets)
+    cache_key = backend.result_cache_key(kind, text, document)
+
+    try:
+        backend.update_flight(cache_key, job_id, status='processing', progress=5,
+                              status_message='Initializing v2...' if kind == 'go2' else 'Initializing...')
+
+        client = get_async_cot_client()
+        if not client:
+            backend.finish_flight(cache_key, job_id, status='failed',
+                                  error='COT API not configured. Set FINCHAT_BASE_URL environment variable.')
+            return
+
+        if not (session_id and cot_chat_id):
+            backend.update_flight(cache_key, job_id, progress=10, status_message='Creating session...')
+
+            # Take a pre-created session; create one here only if the pool is empty
+            session_id = backend.session_pool.try_acquire()
+            if not session_id:
+                session_response = await client.create_session()
+                session_id = session_response.get('id')
+                if not session_id:
+                    raise RuntimeError(f"No session ID returned. Response: {session_response}")
+
+            if document is not None:
+                backend.update_flight(cache_key, job_id, progress=15, status_message='Uploading document...')
+                await attach_document(client, session_id, document)
+                document.close()
+
+            backend.update_flight(cache_key, job_id, progress=20, status_message='Starting COT analysis...')
+
+            cot_chat = await client.run_cot(session_id=session_id, cot_slug=backend.COT_SPECS[kind]['slug'],
+                                            parameters=backend.cot_parameters(kind, text))
+            cot_chat_id = cot_chat.get('id')
+            if not cot_chat_id:
+                raise RuntimeError(f"No chat ID returned from COT execution. Response: {cot_chat}")
+            cot_started_at = time.time()
+
+        # Remember the upstream chat so the job can resume polling after a restart
+        backend.update_flight(cache_key, job_id, session_id=session_id, cot_chat_id=cot_chat_id,
+                              cot_started_at=cot_started_at, text_length=len(text),
+                              progress=40, status_message='Waiting for analysis to complete...')
+
+        def mapped_callback(poll_progress: int, status: str):
+            # Map polling progress (0-100) to overall progress (40-90)
+            backend.update_flight(cache_key, job_id, progress=40 + int(poll_progress * 0.5), status_message=status)
+
+        # The shared poller tracks every in-flight chat; this coroutine only awaits its outcome
+        result_data = await asyncio.wrap_future(backend.chat_poller.watch(
+            session_id=session_id,
+            cot_chat_id=cot_chat_id,
+            progress_callback=mapped_callback,
+            timeout_seconds=backend.COT_POLL_TIMEOUT,
+            next_delay=backend.cot_poll_schedule(kind, len(text), cot_started_at)
+        ))
+        backend.record_cot_duration(kind, len(text), cot_started_at)
+
+        result_id = result_data.get('result_id')
+        if not result_id:
+            raise RuntimeError(f"No result_id returned from polling. Response: {result_data}")
+
+        backend.update_flight(cache_key, job_id, progress=90, status_message='Retrieving results...')
+
+        result = await client.get_result(result_id)
+        content = result.get('content', '')
+
+        if not content:
+            # Try to get content from metadata if available
+            metadata = result_data.get('metadata', {})
+            content = metadata.get('content', '') or str(result)
+        elif backend.RESULT_CACHE_ENABLED:
+            backend.result_cache.put(cache_key, content)
+
+        backend.finish_flight(cache_key, job_id, status='completed', progress=100, status_message='Completed',
+                              result=content, completed_at=datetime.utcnow().isoformat())
+
+    except Exception as e:
+        error_msg = str(e)
+        print(f"Error processing job {job_id}: {error_msg}")
+        traceback.print_exc()
+        backend.finish_flight(cache_key, job_id, status='failed', error=error_msg,
+                              completed_at=datetime.utcnow().isoformat())
+    finally:
+        if document is not None:
+            document.close()
+
+
+ASYNC_JOB_PROCESSORS = {kind: partial(run_cot_job, kind) for kind in backend.COT_SPECS}
+
+
+async def wait_for_change(job_id: str, version: int, timeout: float) -> bool:
+    """
+    Wait on the event loop until a job's version differs from version, or the timeout expires.
+
+    Returns:
+        False if the timeout expired without a change, True otherwise
+    """
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+    # Job updates may come from Flask request threads as well as the loop
+    callback = lambda _record: loop.call_soon_threadsafe(changed.set)
+    backend.jobs.subscribe(job_id, callback)
+    try:
+        record = backend.jobs.get(job_id)
+        if record is None or record.version != version:
+            return True
+        try:
+            await asyncio.wait_for(changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    finally:
+        backend.jobs.unsubscribe(job_id, callback)
+
+
+def _query_number(request: Request, name: str, cast, default=None):
+    try:
+        return cast(request.query_params[name])
+    except (KeyError, ValueError):
+        return default
+
+
+async def mcp_status(request: Request):
+    """Get job status; ?since=<version>&wait=<seconds> long-polls (see backend_server.mcp_status)."""
+    job_id = request.path_params['job_id']
+    record = backend.get_job(job_id)
+    if record is None:
+        return JSONResponse({'error': 'Job not found'}, status_code=404)
+
+    since = _query_number(request, 'since', int)
+    wait = min(_query_number(request, 'wait', float, 0.0), backend.LONGPOLL_MAX_WAIT)
+    if since is not None and wait > 0 and record.version == since and not record.is_finished:
+        await wait_for_change(job_id, since, wait)
+        record = backend.get_job(job_id) or record
+
+    return JSONResponse(backend.build_status_response(record))
+
+
+async def mcp_stream(request: Request):
+    """Stream job progress as Server-Sent Events (see backend_server.mcp_stream)."""
+    job_id = request.path_params['job_id']
+    if backend.get_job(job_id) is None:
+        return JSONResponse({'error': 'Job not found'}, status_code=404)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id')
+    try:
+        last_version = int(last_event_id) if last_event_id is not None else None
+    except ValueError:
+        last_version = None
+
+    async def generate():
+        yield f"retry: {backend.SSE_RETRY_MS}\n\n"
+        sent_version = last_version
+        deadline = time.monotonic() + backend.SSE_MAX_SECONDS
+        while True:
+            current = backend.get_job(job_id)
+            if current is None:
+                yield backend.format_sse({'job_id': job_id, 'error': 'Job not found'}, event='error')
+                return
+
+            payload = backend.build_status_response(current)
+            if payload['status'] in ('completed', 'failed'):
+                event = 'result' if payload['status'] == 'completed' else 'error'
+                yield backend.format_sse(payload, event=event, event_id=payload['version'])
+                return
+            if payload['version'] != sent_version:
+                yield backend.format_sse(payload, event='progress', event_id=payload['version'])
+                sent_version = payload['version']
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # Client reconnects with Last-Event-ID and resumes from here
+                return
+            if not await wait_for_change(job_id, payload['version'], min(backend.SSE_HEARTBEAT_SECONDS, remaining)):
+                yield ": heartbeat\n\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Disable proxy buffering so events arrive immediately
+        }
+    )
+
+
+@asynccontextmanager
+async def lifespan(_app):
+    # Route job submission (analyze, batches, recovery) in the shared Flask code to the event loop
+    backend.configure(job_queue, ASYNC_JOB_PROCESSORS)
+    job_queue.bind(asyncio.get_running_loop())
+    recovered = backend.recover_jobs()
+    if recovered:
+        print(f"Recovered {recovered} unfinished job(s) from the job store")
+    backend.session_pool.start()
+    backend.warm_pattern_index()
+    yield
+    job_queue.shutdown()
+    backend.chat_poller.shutdown()
+    backend.session_pool.shutdown()
+    if _cot_client is not None:
+        await _cot_client.aclose()
+    backend.job_store.flush()
+
+
+# CORS for the async routes; the Flask routes keep their flask_cors configuration
+cors = [Middleware(
+    CORSMiddleware,
+    allow_origins=['*'] if backend.cors_origins == '*' else backend.cors_origins,
+    allow_credentials=True,
+    allow_headers=['Content-Type', 'Authorization', 'Last-Event-ID', 'X-Client-Id'],
+    allow_methods=['GET', 'POST', 'OPTIONS']
+)]
+
+app = Starlette(
+    routes=[
+        Route('/api/mcp/status/{job_id}', mcp_status, methods=['GET', 'OPTIONS'], middleware=cors),
+        Route('/api/mcp/stream/{job_id}', mcp_stream, methods=['GET', 'OPTIONS'], middleware=cors),
+        Mount('/', app=WSGIMiddleware(backend.app, workers=ASYNC_WSGI_THREADS)),
+    ],
+    lifespan=lifespan
+)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    port = int(os.getenv('PORT', 5001))
+
+    print("="*60)
+    print("AI Checker Backend Server (ASGI)")
+    print("="*60)
+    print(f"Port: {port}")
+    print(f"COT Configured: {bool(backend.FINCHAT_BASE_URL)}")
+    if backend.FINCHAT_BASE_URL:
+        print(f"Base URL: {backend.FINCHAT_BASE_URL}")
+    print(f"Async Jobs In Flight: {ASYNC_MAX_JOBS} (queue depth {backend.JOB_QUEUE_DEPTH})")
+    print(f"Job Store: {backend.JOB_STORE_BACKEND}")
+    print("="*60)
+    print()
+
+    uvicorn.run(app, host='0.0.0.0', port=port)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Asyncio FinChat COT API client (httpx).
+Mirrors the FinChatCOTClient calls used by the backend job path so that many
+COT jobs can run as coroutines instead of threads. Waiting for a COT to finish
+is left to the shared ChatPoller (cot_poller.py).
+"""
+
+import mimetypes
+import os
+import uuid
+from typing import Any, BinaryIO, Dict, Optional
+
+import httpx
+
+
+class AsyncFinChatCOTClient:
+    """Async client for calling FinChat COT prompts via REST API. Share one instance per event loop."""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_token: Optional[str] = None,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            base_url: FinChat API base URL (defaults to FINCHAT_BASE_URL env var)
+            api_token: API bearer token (optional, defaults to FINCHAT_API_TOKEN env var if set)
+            max_connections: Maximum open connections to FinChat
+            max_keepalive_connections: Idle connections kept open for reuse
+            transport: Optional httpx transport (used by tests and benchmarks)
+        """
+        self.base_url = (base_url or os.getenv('FINCHAT_BASE_URL', '')).rstrip('/')
+        self.api_token = api_token or os.getenv('FINCHAT_API_TOKEN', '')
+
+        if not self.base_url:
+            raise ValueError("FINCHAT_BASE_URL must be set")
+
+        headers = {'Content-Type': 'application/json'}
+        if self.api_token:
+            headers['Authorization'] = f'Bearer {self.api_token}'
+
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=30,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections
+            ),
+            transport=transport
+        )
+
+    async def aclose(self):
+        """Close pooled connections."""
+        await self._client.aclose()
+
+    async def create_session(self, client_id: Optional[str] = None) -> Dict[str, Any]:
+        """Create a new session for COT execution. Returns the session object with 'id'."""
+        if not client_id:
+            client_id = f"client-{uuid.uuid4().hex[:12]}"
+        response = await self._client.post('/api/v1/sessions/', json={'client_id': client_id})
+        response.raise_for_status()
+        return response.json()
+
+    async def upload_document(self, session_id: str, file_obj: Optional[BinaryIO] = None,
+                              file_name: Optional[str] = None, consomme_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Attach a document to a session: upload file_obj (streamed in blocks from its current
+        position), or attach an existing Consomme document by consomme_id.
+        Returns the document object with 'id' (and 'consomme_id').
+        """
+        if file_obj is not None and file_name:
+            content_type = mimetypes.guess_type(file_name)[0] or 'application/pdf'
+            # The client's JSON Content-Type would win over httpx's multipart one, so set it with a boundary
+            headers = {'Content-Type': f'multipart/form-data; boundary={uuid.uuid4().hex}'}
+            response = await self._client.post('/api/v1/documents/', data={'session': session_id},
+                                               files={'files': (file_name, file_obj, content_type)},
+                                               headers=headers, timeout=60)
+        elif consomme_id:
+            response = await self._client.post('/api/v1/documents/',
+                                               json={'session': session_id, 'consomme_ids': [consomme_id]},
+                                               timeout=60)
+        else:
+            raise ValueError("Either (file_obj and file_name) or consomme_id must be provided")
+        response.raise_for_status()
+        result = response.json()
+        # API returns a list, return first document
+        if isinstance(result, list) and result:
+            return result[0]
+        return result
+
+    async def run_cot(self, session_id: str, cot_slug: str, parameters: Dict[str, str]) -> Dict[str, Any]:
+        """Run a COT prompt. Returns the chat object with 'id' (the COT chat ID)."""
+        cot_message = f"cot {cot_slug}"
+        if parameters:
+            param_string = ' '.join([f"${key}:{value}" for key, value in parameters.items()])
+            cot_message += f" {param_string}"
+        response = await self._client.post('/api/v1/chats/', json={'session': session_id, 'message': cot_message})
+        response.raise_for_status()
+        return response.json()
+
+    async def get_chats(self, session_id: str, page_size: int = 500) -> Dict[str, Any]:
+        """Get all chats for a session. Returns a dictionary with a 'results' list."""
+        response = await self._client.get('/api/v1/chats/', params={'session_id': session_id, 'page_size': page_size})
+        response.raise_for_status()
+        return response.json()
+
+    async def get_result(self, result_id: str) -> Dict[str, Any]:
+        """Get result content by result ID. Returns the result object with 'content'."""
+        response = await self._client.get(f'/api/v1/results/{result_id}/')
+        response.raise_for_status()
+        return response.json()
@@ -5,13 +5,17 @@ Handles COT analysis requests with job-based async processing.
 """
 
 import os
+import codecs
+import json
 import uuid
-import re
+import hmac
 import threading
+import time
+import requests
 from datetime import datetime
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS, cross_origin
-from typing import Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 import traceback
 from dotenv import load_dotenv
 
@@ -20,6 +24,23 @@ load_dotenv()
 
 # Import COT client
 from cot_client import FinChatCOTClient
+from cot_poller import ChatPoller
+from completion_model import CompletionModel
+from document_registry import DocumentRegistry
+from document_upload import UploadedDocument, spool_upload
+from heuristic_detector import evaluate_text, evaluate_texts
+from batch import Batch, BatchItem, BatchManager, STARTED, FINISHED, RETRY
+from chunking import (CHUNK_MODES, CONTENT_DEFINED, Chunk, chunk_hash, merge_verdicts, split_content_defined,
+                      split_text, stitch_chunks)
+from job_queue import BULK, INTERACTIVE, JobQueue, QueueFullError
+from job_store import JobStore, InMemoryJobStore, SQLiteJobStore
+from job_table import JobRecord, JobTable
+from pattern_index import PatternIndex, load_or_build
+from result_cache import ResultCache, make_cache_key
+from sanitizer import sanitize_file, sanitize_text
+from session_pool import SessionPool
+from single_flight import SingleFlight
+from triage import ESCALATED, SETTLED, TriageBand, decide, parse_band, settled_report, triage_counts
 
 app = Flask(__name__)
 
@@ -37,214 +58,480 @@ else:
 CORS(app, 
      origins=cors_origins,
      supports_credentials=True,
-     allow_headers=['Content-Type', 'Authorization'],
+     allow_headers=['Content-Type', 'Authorization', 'Last-Event-ID', 'X-Client-Id'],
      methods=['GET', 'POST', 'OPTIONS'])
 
-# Job storage (in production, use Redis or a database)
-jobs: Dict[str, Dict] = {}
-
 # COT configuration
 COT_SESSION_ID = os.getenv('COT_SESSION_ID', '68e8b27f658abfa9795c85da')  # GO button session ID (v2 API)
 COT_V2_SESSION_ID = os.getenv('COT_V2_SESSION_ID', '6923bb68658abf729a7b8994')  # GO2 session ID (v2 API)
 FINCHAT_BASE_URL = os.getenv('FINCHAT_BASE_URL', '')
 FINCHAT_API_TOKEN = os.getenv('FINCHAT_API_TOKEN', '')  # Optional
+FINCHAT_POOL_CONNECTIONS = int(os.getenv('FINCHAT_POOL_CONNECTIONS', '4'))  # Hosts to keep connection pools for
+FINCHAT_POOL_MAXSIZE = int(os.getenv('FINCHAT_POOL_MAXSIZE', '32'))  # Keep-alive connections per host
 
 # PDF files for GO button patterns
 PATTERNS_PDF_PATH = os.getenv('PATTERNS_PDF_PATH', 'COMPREHENSIVE LIST OF SIGNS OF AI WRITING.pdf')
 PATTERNS_PDF_PATH_2 = os.getenv('PATTERNS_PDF_PATH_2', 'Human_vs_AI_Writing_Analysis_Report (rag) (1).pdf')
+PATTERNS_CACHE_PATH = os.getenv('PATTERNS_CACHE_PATH', '')  # Parsed-pattern artifact (default: patterns-cache.json next to the PDFs)
+PATTERNS_SCAN_MAX_CHARS = int(os.getenv('PATTERNS_SCAN_MAX_CHARS', '500000'))  # Longest text /api/patterns/scan accepts
 
+# COT run for each job kind: slug, fixed parameters, and the parameter that carries the text
+# GO: ai-detector-e1 takes $purpose (first), $text (second)
+# GO2: copy-of-humanize-text-1 takes $paragraph
+COT_SPECS = {
+    'go': {'slug': 'ai-detector-e1', 'parameters': {'purpose': 'general'}, 'text_parameter': 'text'},
+    'go2': {'slug': 'copy-of-humanize-text-1', 'parameters': {}, 'text_parameter': 'paragraph'},
+}
 
-def sanitize_text(text: str) -> str:
-    """
-    Sanitize text by removing or replacing special tokens that cause issues with tiktoken encoding.
-    FinChat's tiktoken encoder throws errors when encountering certain special tokens like <|endoftext|>.
-    Also replaces '$' signs with 'USD' to avoid conflicts with COT parameter syntax.
-    
-    Args:
-        text: Input text that may contain problematic special tokens
-        
-    Returns:
-        Sanitized text with special tokens removed or replaced
-    """
-    if not text:
-        return text
-    
-    sanitized = str(text)  # Ensure it's a string
-    
-    # Replace '$' signs with 'USD' to avoid conflicts with COT parameter syntax ($param:value)
-    sanitized = sanitized.replace('$', 'USD')
-    
-    # List of special tokens that cause issues with tiktoken
-    # These are common GPT/LLM special tokens that should be removed or replaced
-    problematic_tokens = [
-        '<|endoftext|>',
-        '<|end_of_text|>',
-        '<|fim_prefix|>',
-        '<|fim_middle|>',
-        '<|fim_suffix|>',
-        '<|fim_pad|>',
-        '<|startoftext|>',
-        '<|start_of_text|>',
-    ]
-    
-    # First, do exact replacements (case-sensitive) - multiple passes to catch nested cases
-    for _ in range(3):  # Multiple passes to catch overlapping patterns
-        for token in problematic_tokens:
-            sanitized = sanitized.replace(token, ' ')
-            # Also try with different bracket styles
-            sanitized = sanitized.replace(token.replace('<', '&lt;').replace('>', '&gt;'), ' ')
-            sanitized = sanitized.replace(token.replace('<', '[').replace('>', ']'), ' ')
-    
-    # Use comprehensive regex patterns to catch ALL variations
-    # Pattern: <|...|> or [|...|] or &lt;|...|&gt; where ... contains endoftext, etc.
-    token_patterns = [
-        # Standard format with pipes
-        r'<\|endoftext\|>',
-        r'<\|end_of_text\|>',
-        r'<\|end\s*of\s*text\|>',  # Handle spaces: <|end of text|>
-        r'<\|fim_prefix\|>',
-        r'<\|fim_middle\|>',
-        r'<\|fim_suffix\|>',
-        r'<\|fim_pad\|>',
-        r'<\|startoftext\|>',
-        r'<\|start_of_text\|>',
-        r'<\|start\s*of\s*text\|>',  # Handle spaces: <|start of text|>
-        # Square brackets
-        r'\[\|endoftext\|\]',
-        r'\[\|end_of_text\|\]',
-        r'\[\|end\s*of\s*text\|\]',
-        # HTML entities
-        r'&lt;\|endoftext\|&gt;',
-        r'&lt;\|end_of_text\|&gt;',
-        # Without pipes (just brackets)
-        r'<endoftext>',
-        r'<end_of_text>',
-        r'\[endoftext\]',
-        # Case variations (comprehensive)
-        r'<\|[Ee][Nn][Dd][Oo][Ff][Tt][Ee][Xx][Tt]\|>',
-        r'<\|[Ss][Tt][Aa][Rr][Tt][Oo][Ff][Tt][Ee][Xx][Tt]\|>',
-    ]
-    
-    for pattern in token_patterns:
-        sanitized = re.sub(pattern, ' ', sanitized, flags=re.IGNORECASE)
-    
-    # Also catch any pattern that looks like <|...|> with common token names inside
-    # This is a catch-all for any variations we might have missed
-    catch_all_patterns = [
-        r'<\|[^|]*end[^|]*text[^|]*\|>',  # <|anything with "end" and "text"|>
-        r'<\|[^|]*start[^|]*text[^|]*\|>',  # <|anything with "start" and "text"|>
-        r'<\|[^|]*fim[^|]*\|>',  # <|anything with "fim"|>
-    ]
-    
-    for pattern in catch_all_patterns:
-        sanitized = re.sub(pattern, ' ', sanitized, flags=re.IGNORECASE)
-    
-    # Clean up multiple spaces that might result from replacements
-    sanitized = re.sub(r'\s+', ' ', sanitized)
-    
-    # Final check: if text still contains suspicious patterns, log a warning
-    if '<|' in sanitized or '|>' in sanitized:
-        # Check if it's a legitimate pattern (like <|user|> or <|assistant|>) or suspicious
-        suspicious_pattern = re.search(r'<\|[^|]*(?:end|start|fim)[^|]*\|>', sanitized, re.IGNORECASE)
-        if suspicious_pattern:
-            print(f"WARNING: Suspicious token pattern found after sanitization: {suspicious_pattern.group()}")
-            # Remove it aggressively
-            sanitized = re.sub(r'<\|[^|]*(?:end|start|fim)[^|]*\|>', ' ', sanitized, flags=re.IGNORECASE)
-            sanitized = re.sub(r'\s+', ' ', sanitized)
-    
-    return sanitized.strip()
+# Result cache (keyed on sanitized text + COT slug + parameters)
+RESULT_CACHE_ENABLED = os.getenv('RESULT_CACHE_ENABLED', 'True').lower() == 'true'
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '1000'))
+RESULT_CACHE_MAX_BYTES = int(os.getenv('RESULT_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', '86400'))  # 24 hours
+RESULT_CACHE_DIR = os.getenv('RESULT_CACHE_DIR', '')  # Empty = memory only
+
+# Server-Sent Events progress stream (/api/mcp/stream/<job_id>)
+SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))  # Comment line sent when nothing changed
+SSE_MAX_SECONDS = float(os.getenv('SSE_MAX_SECONDS', '1800'))  # Close the stream after this long; clients reconnect
+SSE_RETRY_MS = int(os.getenv('SSE_RETRY_MS', '3000'))  # Reconnect delay suggested to EventSource clients
+SSE_MAX_STREAMS = int(os.getenv('SSE_MAX_STREAMS', '64'))  # Beyond this, new streams get 503 (clients poll instead)
+
+# Long-poll mode for /api/mcp/status/<job_id>?wait=<seconds>&since=<version>
+LONGPOLL_MAX_WAIT = float(os.getenv('LONGPOLL_MAX_WAIT', '30'))  # Upper bound on ?wait=
+# Each Flask long-poll holds a request thread; asgi_server.py waits on its event loop and is not capped
+LONGPOLL_MAX_WAITERS = int(os.getenv('LONGPOLL_MAX_WAITERS', '16'))  # Beyond this, requests answer immediately
+
+# Batch analysis (/api/mcp/analyze-batch)
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '100'))  # Texts per batch
+BATCH_DEFAULT_CONCURRENCY = int(os.getenv('BATCH_DEFAULT_CONCURRENCY', '4'))  # Jobs of one batch in flight at once
+BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', '16'))  # Upper bound on a batch's "concurrency"
+BATCH_RETRY_SECONDS = float(os.getenv('BATCH_RETRY_SECONDS', '5'))  # Delay before retrying items when the queue is full
+
+# Chunked analysis ("chunk_by" on /api/mcp/analyze*): each chunk runs as its own COT and the results are merged
+CHUNK_MAX_TOKENS = int(os.getenv('CHUNK_MAX_TOKENS', '1000'))  # Token budget per chunk (about 4 characters per token)
+CHUNK_CONCURRENCY = int(os.getenv('CHUNK_CONCURRENCY', '4'))  # Chunks of one document in flight at once
+CHUNK_MAX_ATTEMPTS = int(os.getenv('CHUNK_MAX_ATTEMPTS', '2'))  # Runs per chunk before it counts as failed
+CHUNK_AUTO_CHARS = int(os.getenv('CHUNK_AUTO_CHARS', '0'))  # Chunk longer texts by paragraph unasked (0 = off)
+
+# Documents sent as the 'file' part of /api/mcp/analyze, held until the job attaches them to its session
+UPLOAD_SPOOL_BYTES = int(os.getenv('UPLOAD_SPOOL_BYTES', str(1024 * 1024)))  # Bytes per upload kept in memory before spooling to disk
+# Documents already in Consomme (by content hash) are attached by consomme_id instead of uploaded again
+DOCUMENT_REGISTRY_PATH = os.getenv('DOCUMENT_REGISTRY_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'documents.json'))  # Empty = memory only
+DOCUMENT_REGISTRY_TTL = float(os.getenv('DOCUMENT_REGISTRY_TTL', str(7 * 86400)))  # Seconds an uploaded document's ID is reused
+DOCUMENT_REGISTRY_MAX_ENTRIES = int(os.getenv('DOCUMENT_REGISTRY_MAX_ENTRIES', '10000'))  # Documents remembered at most
+
+# Heuristic detector without FinChat (/api/local/analyze)
+LOCAL_ANALYZE_MAX_TEXTS = int(os.getenv('LOCAL_ANALYZE_MAX_TEXTS', '1000'))  # Texts per request
+PROVISIONAL_MAX_CHARS = int(os.getenv('PROVISIONAL_MAX_CHARS', '200000'))  # Text scored for a GO job's provisional verdict (0 = off)
+
+# Triage ("triage": true on GO analyses): heuristic aiProbability outside this band settles a text without a COT
+TRIAGE_HUMAN_BELOW = float(os.getenv('TRIAGE_HUMAN_BELOW', '20'))  # At or below: settled as human-written
+TRIAGE_AI_ABOVE = float(os.getenv('TRIAGE_AI_ABOVE', '80'))  # At or above: settled as AI-generated
+
+# Shared poller for in-flight COT chats (one poll loop for all jobs instead of one per job).
+# Each job has its own session (pooled sessions are single-use), so a chat listing serves one job;
+# upstream requests are bounded by the rate cap and the backoff, not by grouping jobs per session.
+COT_POLL_INTERVAL = float(os.getenv('COT_POLL_INTERVAL', '5'))  # Seconds between polls of a changing session
+COT_POLL_MAX_INTERVAL = float(os.getenv('COT_POLL_MAX_INTERVAL', '30'))  # Backoff cap while nothing changes
+COT_POLL_RATE = float(os.getenv('COT_POLL_RATE', '10'))  # Upstream chat listings per second, across all jobs
+COT_POLL_CONCURRENCY = int(os.getenv('COT_POLL_CONCURRENCY', '4'))  # Chat listings in flight at once
+COT_POLL_TIMEOUT = float(os.getenv('COT_POLL_TIMEOUT', '1000'))  # Seconds before a COT is given up on
+
+# Pool of pre-created FinChat sessions so jobs skip the create_session round-trip
+SESSION_POOL_MIN = int(os.getenv('SESSION_POOL_MIN', '2'))  # Sessions kept ready when idle (0 = create on demand)
+SESSION_POOL_MAX = int(os.getenv('SESSION_POOL_MAX', '10'))  # Upper bound on ready sessions under load
+SESSION_POOL_MAX_AGE = float(os.getenv('SESSION_POOL_MAX_AGE', '900'))  # Discard ready sessions older than this
+
+# Learned COT completion times (per slug and text length) that drive the poll schedule and job ETAs
+COT_EXPECTED_SECONDS = float(os.getenv('COT_EXPECTED_SECONDS', '600'))  # Assumed duration until history exists
+COT_TIMING_WINDOW = int(os.getenv('COT_TIMING_WINDOW', '200'))  # Recent runs kept per slug and length bucket
+COT_TIMING_MIN_SAMPLES = int(os.getenv('COT_TIMING_MIN_SAMPLES', '5'))  # Runs needed before a bucket is trusted
+COT_TIMING_PATH = os.getenv('COT_TIMING_PATH', '')  # JSON file to keep the history across restarts (empty = memory)
+
+# Token required by /api/admin/* endpoints (Authorization: Bearer <token>); admin endpoints are disabled if unset
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+
+# Job queue configuration (bounded worker pool shared by GO and GO2 jobs)
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '8'))
+JOB_QUEUE_DEPTH = int(os.getenv('JOB_QUEUE_DEPTH', '200'))
+JOB_GO_MAX_CONCURRENT = int(os.getenv('JOB_GO_MAX_CONCURRENT', '0'))  # 0 = limited only by JOB_WORKERS
+JOB_GO2_MAX_CONCURRENT = int(os.getenv('JOB_GO2_MAX_CONCURRENT', '0'))  # 0 = limited only by JOB_WORKERS
+JOB_QUEUE_RETRY_AFTER = int(os.getenv('JOB_QUEUE_RETRY_AFTER', '30'))  # Retry-After seconds when queue is full
+
+# Scheduling between interactive jobs (GO/GO2 buttons) and bulk jobs (batches), and between clients.
+# Clients are identified by the X-Client-Id header, falling back to the remote address.
+JOB_BULK_MAX_CONCURRENT = int(os.getenv('JOB_BULK_MAX_CONCURRENT', '0'))  # 0 = limited only by JOB_WORKERS
+JOB_BULK_AGING_SECONDS = float(os.getenv('JOB_BULK_AGING_SECONDS', '120'))  # Bulk jobs waiting longer run first
+JOB_CLIENT_WEIGHTS = os.getenv('JOB_CLIENT_WEIGHTS', '')  # e.g. "reports=2,crawler=0.5" (default weight 1)
+
+# Persistent job store ('sqlite' survives restarts, 'memory' does not)
+JOB_STORE_BACKEND = os.getenv('JOB_STORE', 'sqlite').lower()
+JOB_STORE_PATH = os.getenv('JOB_STORE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jobs.db'))
+JOB_STORE_FLUSH_INTERVAL = float(os.getenv('JOB_STORE_FLUSH_INTERVAL', '2.0'))  # Seconds between batched progress writes
+JOB_STORE_RETENTION_SECONDS = float(os.getenv('JOB_STORE_RETENTION_SECONDS', str(7 * 86400)))  # 0 = keep finished jobs forever
+
+if JOB_STORE_BACKEND == 'memory':
+    job_store: JobStore = InMemoryJobStore()
+else:
+    job_store = SQLiteJobStore(JOB_STORE_PATH, flush_interval=JOB_STORE_FLUSH_INTERVAL,
+                               retention_seconds=JOB_STORE_RETENTION_SECONDS)
+
+# In-process job table: finished jobs are evicted by TTL and by a total-bytes budget (LRU).
+# Evicted jobs are still served from job_store when it is persistent (until JOB_STORE_RETENTION_SECONDS);
+# the memory store drops them with the table.
+JOB_TTL_SECONDS = float(os.getenv('JOB_TTL_SECONDS', '3600'))  # Keep finished jobs in memory for 1 hour
+JOB_TABLE_MAX_BYTES = int(os.getenv('JOB_TABLE_MAX_BYTES', str(64 * 1024 * 1024)))  # Budget for finished jobs
+JOB_SWEEP_INTERVAL = float(os.getenv('JOB_SWEEP_INTERVAL', '60'))  # Seconds between eviction sweeps
+
+jobs = JobTable(ttl_seconds=JOB_TTL_SECONDS, max_bytes=JOB_TABLE_MAX_BYTES, sweep_interval=JOB_SWEEP_INTERVAL,
+                on_evict=lambda record: job_store.evicted(record.job_id))
+jobs.start_sweeper()
+
+result_cache = ResultCache(
+    max_entries=RESULT_CACHE_MAX_ENTRIES,
+    max_bytes=RESULT_CACHE_MAX_BYTES,
+    ttl_seconds=RESULT_CACHE_TTL,
+    disk_dir=RESULT_CACHE_DIR or None
+)
+
+# Identical submissions while a run is in flight attach to it instead of starting another COT
+coalescer = SingleFlight()
+
+# Caps concurrent long-poll waits so they cannot exhaust the server's request threads
+longpoll_slots = threading.BoundedSemaphore(LONGPOLL_MAX_WAITERS)
+
+# Caps concurrent SSE streams, each of which holds a request thread for up to SSE_MAX_SECONDS
+sse_slots = threading.BoundedSemaphore(SSE_MAX_STREAMS)
+
+job_queue = JobQueue(
+    max_workers=JOB_WORKERS,
+    max_queue_depth=JOB_QUEUE_DEPTH,
+    kind_limits={
+        kind: limit
+        for kind, limit in (('go', JOB_GO_MAX_CONCURRENT), ('go2', JOB_GO2_MAX_CONCURRENT))
+        if limit > 0
+    },
+    name='cot',
+    class_limits={BULK: JOB_BULK_MAX_CONCURRENT} if JOB_BULK_MAX_CONCURRENT > 0 else None,
+    client_weights={
+        client.strip(): float(weight)
+        for client, _, weight in (entry.partition('=') for entry in JOB_CLIENT_WEIGHTS.split(','))
+        if client.strip() and weight.strip()
+    },
+    bulk_aging_seconds=JOB_BULK_AGING_SECONDS
+)
+
+
+_cot_client: Optional[FinChatCOTClient] = None
+_cot_client_lock = threading.Lock()
 
 
 def get_cot_client() -> Optional[FinChatCOTClient]:
-    """Get COT client instance."""
+    """Get the process-wide COT client (created on first use; thread-safe, connections are pooled)."""
+    global _cot_client
     if not FINCHAT_BASE_URL:
         return None
-    try:
-        # Pass token only if provided (it's optional)
-        return FinChatCOTClient(
-            base_url=FINCHAT_BASE_URL,
-            api_token=FINCHAT_API_TOKEN if FINCHAT_API_TOKEN else None
-        )
-    except Exception as e:
-        print(f"Error creating COT client: {e}")
-        return None
+    with _cot_client_lock:
+        if _cot_client is None:
+            try:
+                # Pass token only if provided (it's optional)
+                _cot_client = FinChatCOTClient(
+                    base_url=FINCHAT_BASE_URL,
+                    api_token=FINCHAT_API_TOKEN if FINCHAT_API_TOKEN else None,
+                    pool_connections=FINCHAT_POOL_CONNECTIONS,
+                    pool_maxsize=FINCHAT_POOL_MAXSIZE
+                )
+            except Exception as e:
+                print(f"Error creating COT client: {e}")
+                return None
+        return _cot_client
+
+
+_pattern_index: Optional[PatternIndex] = None
+_pattern_index_info: Optional[Dict[str, Any]] = None  # Load / build report for /health
+_pattern_index_lock = threading.Lock()
+
+
+def pattern_pdf_paths() -> List[str]:
+    """Absolute paths of the pattern PDFs (relative settings are relative to this file)."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return [os.path.join(script_dir, path) for path in (PATTERNS_PDF_PATH, PATTERNS_PDF_PATH_2)]
+
+
+def get_pattern_index() -> PatternIndex:
+    """
+    Get the process-wide pattern index (loaded from the parsed-pattern artifact, or built
+    from the pattern PDFs if they changed, on first use; thread-safe).
+
+    Raises:
+        RuntimeError: If no pattern PDF exists or the index cannot be loaded (the failure is
+            kept, with state 'error', in the /health report; the next call tries again)
+    """
+    global _pattern_index, _pattern_index_info
+    with _pattern_index_lock:
+        if _pattern_index is None:
+            paths = [path for path in pattern_pdf_paths() if os.path.exists(path)]
+            if not paths:
+                _pattern_index_info = {'state': 'unavailable', 'pdfs': []}
+                raise RuntimeError('Pattern PDFs not found. Set PATTERNS_PDF_PATH / PATTERNS_PDF_PATH_2.')
+            cache_path = PATTERNS_CACHE_PATH or os.path.join(os.path.dirname(paths[0]), 'patterns-cache.json')
+            try:
+                _pattern_index, _pattern_index_info = load_or_build(paths, cache_path)
+            except Exception as e:
+                # e.g. pypdf missing or an unreadable PDF
+                _pattern_index_info = {
+                    'state': 'error',
+                    'error': str(e),
+                    'pdfs': [{'name': os.path.basename(path)} for path in paths]
+                }
+                raise RuntimeError(f'Pattern index could not be loaded: {e}') from e
+            print(f"Pattern index {_pattern_index_info['state']} in {_pattern_index_info['seconds']}s "
+                  f"({_pattern_index_info['patterns']} patterns)")
+        return _pattern_index
+
+
+def warm_pattern_index():
+    """Load the pattern index in the background at startup, so neither requests nor /health parse PDFs."""
+    def warm():
+        try:
+            get_pattern_index()
+        except Exception as e:
+            print(f"Pattern index unavailable: {e}")
+    threading.Thread(target=warm, name='pattern-index', daemon=True).start()
+
 
+def create_cot_session() -> str:
+    """Create a FinChat session and return its ID (SessionPool create_session callback)."""
+    client = get_cot_client()
+    if not client:
+        raise RuntimeError('COT API not configured. Set FINCHAT_BASE_URL environment variable.')
+    session_response = client.create_session()
+    session_id = session_response.get('id')
+    if not session_id:
+        raise RuntimeError(f"No session ID returned. Response: {session_response}")
+    return session_id
 
-def progress_callback(job_id: str):
-    """Create a progress callback function for a specific job."""
+
+# FinChat's API has no endpoint to delete a session, so no release_session is passed: a pre-created
+# session that expires unused stays on FinChat, empty. The pool then replaces expired sessions only
+# after the next checkout, so an idle server leaves at most one pool's worth behind.
+session_pool = SessionPool(
+    create_cot_session,
+    min_size=SESSION_POOL_MIN if FINCHAT_BASE_URL else 0,
+    max_size=SESSION_POOL_MAX if FINCHAT_BASE_URL else 0,
+    max_age_seconds=SESSION_POOL_MAX_AGE
+)
+
+
+def fetch_session_chats(session_id: str) -> Dict:
+    """List a session's chats (ChatPoller fetch_chats callback)."""
+    client = get_cot_client()
+    if not client:
+        raise RuntimeError('COT API not configured. Set FINCHAT_BASE_URL environment variable.')
+    return client.get_chats(session_id)
+
+
+chat_poller = ChatPoller(
+    fetch_session_chats,
+    interval_seconds=COT_POLL_INTERVAL,
+    max_interval_seconds=COT_POLL_MAX_INTERVAL,
+    max_requests_per_second=COT_POLL_RATE,
+    max_concurrent_requests=COT_POLL_CONCURRENCY
+)
+
+document_registry = DocumentRegistry(
+    ttl_seconds=DOCUMENT_REGISTRY_TTL,
+    max_entries=DOCUMENT_REGISTRY_MAX_ENTRIES,
+    path=DOCUMENT_REGISTRY_PATH or None
+)
+
+completion_model = CompletionModel(
+    window=COT_TIMING_WINDOW,
+    min_samples=COT_TIMING_MIN_SAMPLES,
+    default_seconds=COT_EXPECTED_SECONDS,
+    path=COT_TIMING_PATH or None
+)
+
+
+def cot_poll_schedule(kind: str, text_length: int, started_at: Optional[float]):
+    """Poll schedule for a job's COT chat (ChatPoller next_delay), driven by learned completion times."""
+    slug = COT_SPECS[kind]['slug']
+    started_at = started_at or time.time()
+    return lambda: completion_model.next_poll_delay(slug, text_length, time.time() - started_at,
+                                                    COT_POLL_INTERVAL, COT_POLL_MAX_INTERVAL)
+
+
+def record_cot_duration(kind: str, text_length: int, started_at: Optional[float]):
+    """Record how long a completed COT run took (skipped if its start time is unknown)."""
+    if started_at:
+        completion_model.record(COT_SPECS[kind]['slug'], text_length, time.time() - started_at)
+
+
+def cot_parameters(kind: str, text: str) -> Dict[str, str]:
+    """Build the COT parameters for a job kind, in the order the COT expects them."""
+    spec = COT_SPECS[kind]
+    parameters = dict(spec['parameters'])
+    parameters[spec['text_parameter']] = text
+    return parameters
+
+
+def result_cache_key(kind: str, text: str, document: Optional[UploadedDocument] = None) -> str:
+    """Cache key for running a job kind's COT on (sanitized) text, with the attached document's content hash."""
+    parameters = cot_parameters(kind, text)
+    if document is not None:
+        parameters['document'] = document.sha256
+    return make_cache_key(COT_SPECS[kind]['slug'], parameters)
+
+
+def update_job(job_id: str, **fields):
+    """
+    Update fields of a job and persist them to the job store.
+    Progress-only updates are handed to the store's batched progress path.
+    """
+    record = jobs.update(job_id, **fields)
+    if record is None:
+        return
+    if set(fields) <= {'progress', 'status_message'}:
+        job_store.update_progress(job_id, fields.get('progress', record.progress),
+                                  fields.get('status_message', record.status_message))
+    else:
+        job_store.save(job_id, record.to_dict())
+    if record.batch_id and record.is_finished and 'status' in fields:
+        # Frees the job's slot in its batch so the next waiting item starts (or retries a failed chunk)
+        batches.job_finished(record.batch_id, job_id, failed=record.status == 'failed')
+
+
+def get_job(job_id: str) -> Optional[JobRecord]:
+    """
+    Get a job from the in-process table, falling back to the persistent job store.
+    A finished job read back from the store is not re-added to the table, so polling
+    an evicted job does not undo its eviction.
+    """
+    record = jobs.get(job_id)
+    if record is None:
+        data = job_store.get(job_id)
+        if data is not None:
+            record = JobRecord.from_dict(job_id, data)
+            if not record.is_finished:
+                jobs.add(record)
+    return record
+
+
+def update_flight(cache_key: str, job_id: str, **fields):
+    """Update a job and every job attached to the same in-flight COT run."""
+    for attached_id in coalescer.attached(cache_key, job_id):
+        update_job(attached_id, **fields)
+
+
+def finish_flight(cache_key: str, job_id: str, **fields):
+    """End the in-flight run for cache_key and apply the final fields to every attached job."""
+    for attached_id in coalescer.finish(cache_key, job_id):
+        update_job(attached_id, **fields)
+
+
+def progress_callback(job_id: str, cache_key: Optional[str] = None):
+    """Create a progress callback function for a specific job (and the jobs attached to its run)."""
     def callback(progress: int, status: str):
-        if job_id in jobs:
-            jobs[job_id]['progress'] = progress
-            jobs[job_id]['status_message'] = status
+        if cache_key:
+            update_flight(cache_key, job_id, progress=progress, status_message=status)
+        else:
+            update_job(job_id, progress=progress, status_message=status)
     return callback
 
 
-def process_cot_analysis(job_id: str, text: str, purpose: str, file_content: Optional[bytes] = None, file_name: Optional[str] = None):
-    """Process COT analysis in background thread (GO button - using ai-detector-e1 COT directly)."""
+def attach_document(client: FinChatCOTClient, session_id: str, document: UploadedDocument):
+    """
+    Attach an uploaded document to a session: by consomme_id if the same content was uploaded
+    before, otherwise by streaming it (and remembering the consomme_id FinChat assigns).
+    """
+    consomme_id = document_registry.lookup(document.sha256, document.size)
+    if consomme_id:
+        try:
+            client.upload_document(session_id, consomme_id=consomme_id)
+            return
+        except requests.HTTPError as e:
+            # Consomme no longer has it (or rejects the ID): upload the content again
+            print(f"Attaching document {document.name} by ID {consomme_id} failed ({e}); uploading it")
+            document_registry.invalidate(document.sha256)
+    uploaded = client.upload_document(session_id, file_obj=document.open(), file_name=document.name)
+    document_registry.remember(document.sha256, document.size, uploaded.get('consomme_id'), document.name)
+
+
+def process_cot_analysis(job_id: str, text: str, purpose: str, document: Optional[UploadedDocument] = None,
+                         session_id: Optional[str] = None, cot_chat_id: Optional[str] = None,
+                         cot_started_at: Optional[float] = None):
+    """
+    Process COT analysis in background thread (GO button - using ai-detector-e1 COT directly).
+    An uploaded document is streamed to the session before the COT runs.
+    If session_id and cot_chat_id are given (job recovered after a restart), polling resumes
+    for the already-submitted COT instead of starting a new one.
+    """
+    # Results are cached (and identical runs coalesced) under the text as submitted,
+    # which the route has already sanitized (the only sanitization the text gets)
+    cache_key = result_cache_key('go', text, document)
+    
     try:
-        # Sanitize text to remove problematic special tokens (safety measure)
-        text = sanitize_text(text)
-        
-        jobs[job_id]['status'] = 'processing'
-        jobs[job_id]['progress'] = 5
-        jobs[job_id]['status_message'] = 'Initializing...'
+        update_flight(cache_key, job_id, status='processing', progress=5, status_message='Initializing...')
         
         client = get_cot_client()
         if not client:
-            jobs[job_id]['status'] = 'failed'
-            jobs[job_id]['error'] = 'COT API not configured. Set FINCHAT_BASE_URL environment variable.'
+            finish_flight(cache_key, job_id, status='failed',
+                          error='COT API not configured. Set FINCHAT_BASE_URL environment variable.')
             return
         
-        jobs[job_id]['progress'] = 10
-        jobs[job_id]['status_message'] = 'Creating session...'
+        callback = progress_callback(job_id, cache_key)
         
-        # Step 1: Create a new session
-        session_response = client.create_session()
-        session_id = session_response.get('id')
-        if not session_id:
-            raise RuntimeError(f"No session ID returned. Response: {session_response}")
+        if not (session_id and cot_chat_id):
+            update_flight(cache_key, job_id, progress=10, status_message='Creating session...')
+            
+            # Step 1: Take a pre-created session (or create one if the pool is empty)
+            session_id = session_pool.acquire()
+            
+            # Step 2: Attach the uploaded document (by ID if Consomme already has it)
+            if document is not None:
+                update_flight(cache_key, job_id, progress=15, status_message='Uploading document...')
+                attach_document(client, session_id, document)
+                document.close()
+            
+            update_flight(cache_key, job_id, progress=20, status_message='Starting COT analysis...')
+            
+            # Step 3: Call COT with ai-detector-e1 slug
+            # Parameters: $purpose (first), $text (second)
+            cot_slug = COT_SPECS['go']['slug']
+            parameters = cot_parameters('go', text)
+            
+            cot_chat = client.run_cot(session_id=session_id, cot_slug=cot_slug, parameters=parameters)
+            cot_chat_id = cot_chat.get('id')
+            
+            if not cot_chat_id:
+                raise RuntimeError(f"No chat ID returned from COT execution. Response: {cot_chat}")
+            cot_started_at = time.time()
         
-        jobs[job_id]['progress'] = 20
-        jobs[job_id]['status_message'] = 'Starting COT analysis...'
+        # Remember the upstream chat so the job can resume polling after a restart
+        update_flight(cache_key, job_id, session_id=session_id, cot_chat_id=cot_chat_id,
+                      cot_started_at=cot_started_at, text_length=len(text),
+                      progress=40, status_message='Waiting for analysis to complete...')
         
-        # Step 2: Call COT with ai-detector-e1 slug
-        # Parameters: $purpose (first), $text (second)
-        cot_slug = 'ai-detector-e1'
-        parameters = {
-            'purpose': 'general',
-            'text': text
-        }
-        
-        callback = progress_callback(job_id)
-        cot_chat = client.run_cot(session_id=session_id, cot_slug=cot_slug, parameters=parameters)
-        cot_chat_id = cot_chat.get('id')
-        
-        if not cot_chat_id:
-            raise RuntimeError(f"No chat ID returned from COT execution. Response: {cot_chat}")
-        
-        jobs[job_id]['progress'] = 40
-        jobs[job_id]['status_message'] = 'Waiting for analysis to complete...'
-        
-        # Step 4: Poll for completion with progress mapping (40% to 90%)
+        # Step 4: Wait on the shared poller with progress mapping (40% to 90%)
         def mapped_callback(poll_progress: int, status: str):
             # Map polling progress (0-100) to overall progress (40-90)
             mapped_progress = 40 + int(poll_progress * 0.5)
             callback(mapped_progress, status)
         
-        result_data = client.poll_for_completion(
+        result_data = chat_poller.wait(
             session_id=session_id,
             cot_chat_id=cot_chat_id,
-            max_attempts=200,
-            interval_seconds=5,
-            progress_callback=mapped_callback
+            progress_callback=mapped_callback,
+            timeout_seconds=COT_POLL_TIMEOUT,
+            next_delay=cot_poll_schedule('go', len(text), cot_started_at)
         )
+        record_cot_duration('go', len(text), cot_started_at)
         
         result_id = result_data.get('result_id')
         if not result_id:
             raise RuntimeError(f"No result_id returned from polling. Response: {result_data}")
         
-        jobs[job_id]['progress'] = 90
-        jobs[job_id]['status_message'] = 'Retrieving results...'
+        update_flight(cache_key, job_id, progress=90, status_message='Retrieving results...')
         
         # Step 5: Get result content
         result = client.get_result(result_id)
@@ -254,104 +541,91 @@ def process_cot_analysis(job_id: str, text: str, purpose: str, file_content: Opt
             # Try to get content from metadata if available
             metadata = result_data.get('metadata', {})
             content = metadata.get('content', '') or str(result)
+        elif RESULT_CACHE_ENABLED:
+            result_cache.put(cache_key, content)
         
-        jobs[job_id]['status'] = 'completed'
-        jobs[job_id]['progress'] = 100
-        jobs[job_id]['status_message'] = 'Completed'
-        jobs[job_id]['result'] = content
-        jobs[job_id]['completed_at'] = datetime.utcnow().isoformat()
+        finish_flight(cache_key, job_id, status='completed', progress=100, status_message='Completed',
+                      result=content, completed_at=datetime.utcnow().isoformat())
         
     except Exception as e:
         error_msg = str(e)
         print(f"Error processing job {job_id}: {error_msg}")
         traceback.print_exc()
-        jobs[job_id]['status'] = 'failed'
-        jobs[job_id]['error'] = error_msg
-        jobs[job_id]['completed_at'] = datetime.utcnow().isoformat()
+        finish_flight(cache_key, job_id, status='failed', error=error_msg,
+                      completed_at=datetime.utcnow().isoformat())
+    finally:
+        if document is not None:
+            document.close()
 
 
-def process_cot_v2_analysis(job_id: str, text: str, purpose: str):
-    """Process COT v2 analysis in background thread (for GO2 button)."""
+def process_cot_v2_analysis(job_id: str, text: str, purpose: str,
+                            session_id: Optional[str] = None, cot_chat_id: Optional[str] = None,
+                            cot_started_at: Optional[float] = None):
+    """
+    Process COT v2 analysis in background thread (for GO2 button).
+    If session_id and cot_chat_id are given (job recovered after a restart), polling resumes
+    for the already-submitted COT instead of starting a new one.
+    """
+    # Results are cached (and identical runs coalesced) under the text as submitted,
+    # which the route has already sanitized (the only sanitization the text gets)
+    cache_key = result_cache_key('go2', text)
+    
     try:
-        # Log original text length for debugging
-        original_length = len(text) if text else 0
-        
-        # Sanitize text to remove problematic special tokens (safety measure)
-        text_before = text
-        text = sanitize_text(text)
-        text_after = text
-        
-        # Check if sanitization changed anything suspicious
-        if '<|endoftext|>' in text_before.lower() or '<|endoftext|>' in text_after.lower():
-            print(f"WARNING [GO2 Job {job_id}]: endoftext token detected!")
-            print(f"  Before sanitization length: {len(text_before)}")
-            print(f"  After sanitization length: {len(text_after)}")
-            print(f"  Contains '<|endoftext|>': {('<|endoftext|>' in text_after)}")
-            # Force remove any remaining instances
-            text = text.replace('<|endoftext|>', ' ').replace('<|ENDOFTEXT|>', ' ')
-            text = re.sub(r'<\|[^|]*end[^|]*text[^|]*\|>', ' ', text, flags=re.IGNORECASE)
-            text = re.sub(r'\s+', ' ', text).strip()
-            print(f"  Final check - Contains '<|endoftext|>': {('<|endoftext|>' in text)}")
-        
-        jobs[job_id]['status'] = 'processing'
-        jobs[job_id]['progress'] = 5
-        jobs[job_id]['status_message'] = 'Initializing v2...'
+        update_flight(cache_key, job_id, status='processing', progress=5, status_message='Initializing v2...')
         
         client = get_cot_client()
         if not client:
-            jobs[job_id]['status'] = 'failed'
-            jobs[job_id]['error'] = 'COT API not configured. Set FINCHAT_BASE_URL environment variable.'
+            finish_flight(cache_key, job_id, status='failed',
+                          error='COT API not configured. Set FINCHAT_BASE_URL environment variable.')
             return
         
-        jobs[job_id]['progress'] = 10
-        jobs[job_id]['status_message'] = 'Creating session...'
-        
-        # Step 1: Create a new session (same as GO button)
-        session_response = client.create_session()
-        session_id = session_response.get('id')
-        if not session_id:
-            raise RuntimeError(f"No session ID returned. Response: {session_response}")
-        
-        jobs[job_id]['progress'] = 20
-        jobs[job_id]['status_message'] = 'Starting COT analysis...'
-        
-        # Step 2: Call COT with copy-of-humanize-text-1 slug using v1 API
-        # Use v1 API to ensure fresh session each time
-        cot_slug = 'copy-of-humanize-text-1'
-        parameters = {
-            'paragraph': text
-        }
-        
-        callback = progress_callback(job_id)
-        cot_chat = client.run_cot(session_id=session_id, cot_slug=cot_slug, parameters=parameters)
-        cot_chat_id = cot_chat.get('id')
+        callback = progress_callback(job_id, cache_key)
         
-        if not cot_chat_id:
-            raise RuntimeError(f"No chat ID returned from COT execution. Response: {cot_chat}")
+        if not (session_id and cot_chat_id):
+            update_flight(cache_key, job_id, progress=10, status_message='Creating session...')
+            
+            # Step 1: Take a pre-created session (same as GO button)
+            session_id = session_pool.acquire()
+            
+            update_flight(cache_key, job_id, progress=20, status_message='Starting COT analysis...')
+            
+            # Step 2: Call COT with copy-of-humanize-text-1 slug using v1 API
+            # Use v1 API to ensure fresh session each time
+            cot_slug = COT_SPECS['go2']['slug']
+            parameters = cot_parameters('go2', text)
+            
+            cot_chat = client.run_cot(session_id=session_id, cot_slug=cot_slug, parameters=parameters)
+            cot_chat_id = cot_chat.get('id')
+            
+            if not cot_chat_id:
+                raise RuntimeError(f"No chat ID returned from COT execution. Response: {cot_chat}")
+            cot_started_at = time.time()
         
-        jobs[job_id]['progress'] = 40
-        jobs[job_id]['status_message'] = 'Waiting for analysis to complete...'
+        # Remember the upstream chat so the job can resume polling after a restart
+        update_flight(cache_key, job_id, session_id=session_id, cot_chat_id=cot_chat_id,
+                      cot_started_at=cot_started_at, text_length=len(text),
+                      progress=40, status_message='Waiting for analysis to complete...')
         
-        # Step 3: Poll for completion with progress mapping (40% to 90%)
+        # Step 3: Wait on the shared poller with progress mapping (40% to 90%)
         def mapped_callback(poll_progress: int, status: str):
             # Map polling progress (0-100) to overall progress (40-90)
             mapped_progress = 40 + int(poll_progress * 0.5)
             callback(mapped_progress, status)
         
-        result_data = client.poll_for_completion(
+        result_data = chat_poller.wait(
             session_id=session_id,
             cot_chat_id=cot_chat_id,
-            max_attempts=200,
-            interval_seconds=5,
-            progress_callback=mapped_callback
+            progress_callback=mapped_callback,
+            timeout_seconds=COT_POLL_TIMEOUT,
+            next_delay=cot_poll_schedule('go2', len(text), cot_started_at)
         )
+        record_cot_duration('go2', len(text), cot_started_at)
         
         result_id = result_data.get('result_id')
         if not result_id:
             raise RuntimeError(f"No result_id returned from polling. Response: {result_data}")
         
-        jobs[job_id]['progress'] = 90
-        jobs[job_id]['status_message'] = 'Retrieving results...'
+        update_flight(cache_key, job_id, progress=90, status_message='Retrieving results...')
         
         # Step 4: Get result content
         result = client.get_result(result_id)
@@ -361,20 +635,484 @@ def process_cot_v2_analysis(job_id: str, text: str, purpose: str):
             # Try to get content from metadata if available
             metadata = result_data.get('metadata', {})
             content = metadata.get('content', '') or str(result)
+        elif RESULT_CACHE_ENABLED:
+            result_cache.put(cache_key, content)
         
-        jobs[job_id]['status'] = 'completed'
-        jobs[job_id]['progress'] = 100
-        jobs[job_id]['status_message'] = 'Completed'
-        jobs[job_id]['result'] = content
-        jobs[job_id]['completed_at'] = datetime.utcnow().isoformat()
+        finish_flight(cache_key, job_id, status='completed', progress=100, status_message='Completed',
+                      result=content, completed_at=datetime.utcnow().isoformat())
         
     except Exception as e:
         error_msg = str(e)
         print(f"Error processing v2 job {job_id}: {error_msg}")
         traceback.print_exc()
-        jobs[job_id]['status'] = 'failed'
-        jobs[job_id]['error'] = error_msg
-        jobs[job_id]['completed_at'] = datetime.utcnow().isoformat()
+        finish_flight(cache_key, job_id, status='failed', error=error_msg,
+                      completed_at=datetime.utcnow().isoformat())
+
+
+# Job kind -> worker function, used when submitting and when recovering jobs after a restart
+JOB_PROCESSORS = {
+    'go': process_cot_analysis,
+    'go2': process_cot_v2_analysis,
+}
+
+
+def configure(queue: JobQueue, processors: Dict[str, Any]):
+    """
+    Run jobs on another queue with other worker functions (the ASGI mode passes its
+    AsyncJobQueue and coroutines). Call before recovering jobs or serving requests.
+    
+    Args:
+        queue: Queue that job submission, batches and recovery submit to
+        processors: Job kind -> worker function, with the signature of process_cot_analysis
+    """
+    global job_queue, JOB_PROCESSORS
+    job_queue = queue
+    JOB_PROCESSORS = processors
+
+
+def recover_jobs() -> int:
+    """
+    Re-queue jobs that were pending or processing when the server last stopped.
+    Jobs that had already submitted their COT resume polling the same upstream chat.
+    
+    Returns:
+        Number of jobs re-queued
+    """
+    recovered = 0
+    # Jobs that already submitted their COT go first so they lead any coalesced run
+    unfinished = sorted(job_store.list_unfinished(), key=lambda item: not item[1].get('cot_chat_id'))
+    for job_id, job, payload in unfinished:
+        jobs.add(JobRecord.from_dict(job_id, job))
+        if not payload or payload.get('kind') not in JOB_PROCESSORS:
+            update_job(job_id, status='failed', error='Job was interrupted by a server restart',
+                       completed_at=datetime.utcnow().isoformat())
+            continue
+        
+        update_job(job_id, status='pending', status_message='Recovered after restart')
+        # Only the description of an uploaded document is stored: a job that had not attached
+        # it yet fails when it tries to, one that had resumes polling as usual
+        document = UploadedDocument.from_dict(payload['document']) if payload.get('document') else None
+        cache_key = result_cache_key(payload['kind'], payload.get('text', ''), document)
+        if not coalescer.join(cache_key, job_id):
+            update_job(job_id, coalesced=True)
+            recovered += 1
+            continue
+        kwargs = {
+            'session_id': job.get('session_id'),
+            'cot_chat_id': job.get('cot_chat_id'),
+            'cot_started_at': job.get('cot_started_at'),
+        }
+        if document is not None:
+            kwargs['document'] = document
+        try:
+            job_queue.submit(job_id, payload['kind'], JOB_PROCESSORS[payload['kind']],
+                             job_id, payload.get('text', ''), payload.get('purpose', ''),
+                             job_class=payload.get('job_class', INTERACTIVE), client=payload.get('client', ''),
+                             **kwargs)
+            recovered += 1
+        except QueueFullError:
+            finish_flight(cache_key, job_id, status='failed',
+                          error='Job queue was full while recovering after a restart',
+                          completed_at=datetime.utcnow().isoformat())
+    return recovered
+
+
+def start_job(record: JobRecord, kind: str, text: str, purpose: str, document: Optional[UploadedDocument] = None,
+              job_class: str = INTERACTIVE, client: str = '') -> Optional[int]:
+    """
+    Start a new job: finish it from the result cache, attach it to an identical run
+    already in flight, or queue it. The record is added to the job table.
+    job_class and client decide the job's priority and fair share in the queue.
+    A queued job takes over the uploaded document; otherwise it is released here.
+    
+    Returns:
+        Queue position if the job was queued, None if it was served from cache or attached
+    
+    Raises:
+        QueueFullError: If the job could not be queued (jobs that attached to it meanwhile are failed)
+    """
+    job_id = record.job_id
+    jobs.add(record)
+    
+    # Identical text (and document) already analyzed: complete the job from the result cache
+    cache_key = result_cache_key(kind, text, document)
+    cached = result_cache.get(cache_key) if RESULT_CACHE_ENABLED else None
+    if cached is not None:
+        if document is not None:
+            document.close()
+        update_job(job_id, status='completed', progress=100, status_message='Completed (cached)',
+                   result=cached, cached=True, completed_at=datetime.utcnow().isoformat())
+        return None
+    
+    # Persist the job with its input so it can be re-queued after a restart
+    payload = {'kind': kind, 'text': text, 'purpose': purpose, 'job_class': job_class, 'client': client}
+    if document is not None:
+        payload['document'] = document.to_dict()
+    job_store.save(job_id, record.to_dict(), payload=payload)
+    
+    # Identical text already running: attach to that run instead of starting another COT
+    if not coalescer.join(cache_key, job_id):
+        fields = {'coalesced': True}
+        leader = get_job(coalescer.leader(cache_key))
+        if leader is not None:
+            snapshot = leader.to_dict()
+            if snapshot.get('status') in ('pending', 'processing'):
+                fields.update(status=snapshot['status'], progress=snapshot.get('progress', 0),
+                              status_message=snapshot.get('status_message', 'Queued'))
+        update_job(job_id, **fields)
+        if document is not None:
+            document.close()
+        return None
+    
+    try:
+        return job_queue.submit(job_id, kind, JOB_PROCESSORS[kind], job_id, text, purpose,
+                                job_class=job_class, client=client,
+                                **({'document': document} if document is not None else {}))
+    except QueueFullError:
+        if document is not None:
+            document.close()
+        for attached_id in coalescer.finish(cache_key, job_id):
+            if attached_id != job_id:
+                update_job(attached_id, status='failed', error='Job queue is full, please retry later',
+                           completed_at=datetime.utcnow().isoformat())
+        raise
+
+
+def provisional_verdict(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Heuristic verdict for a GO job, available at once while the COT runs (None if the text
+    is too short to score or PROVISIONAL_MAX_CHARS is 0). Longer texts are scored on their
+    first PROVISIONAL_MAX_CHARS characters.
+    """
+    if PROVISIONAL_MAX_CHARS <= 0:
+        return None
+    result = evaluate_text(text[:PROVISIONAL_MAX_CHARS])
+    if 'error' in result:
+        return None
+    return dict(result, source='local-heuristic',
+                verdict='LIKELY AI-GENERATED' if result['isAI'] else 'LIKELY HUMAN-WRITTEN')
+
+
+def upload_head(stream, max_chars: int) -> str:
+    """
+    First max_chars characters of an uploaded text file as sent, before sanitizing
+    collapses its paragraph breaks. The stream is rewound for the full read.
+    """
+    # UTF-8 takes at most 4 bytes per character; a character cut at the end is held back, not replaced
+    head = codecs.getincrementaldecoder('utf-8')(errors='replace').decode(stream.read(max_chars * 4))
+    stream.seek(0)
+    return head[:max_chars]
+
+
+def requested_triage(options) -> Optional[TriageBand]:
+    """
+    Triage requested for a GO analysis: "triage": true, with an optional "triage_band"
+    ([human_below, ai_above]; default TRIAGE_HUMAN_BELOW / TRIAGE_AI_ABOVE).
+    
+    Returns:
+        The ambiguity band, or None if triage is off
+    
+    Raises:
+        ValueError: If the band is invalid
+    """
+    if str(options.get('triage', '')).lower() not in ('1', 'true', 'yes'):
+        return None
+    return parse_band(options.get('triage_band'), TriageBand(TRIAGE_HUMAN_BELOW, TRIAGE_AI_ABOVE))
+
+
+def settle_by_triage(record: JobRecord, result: Dict, band: TriageBand) -> bool:
+    """
+    Complete a GO job from the heuristic result if it is outside the ambiguity band.
+    
+    Returns:
+        True if the job was settled (no COT needed); otherwise the job is marked escalated
+    """
+    if decide(result, band) is None:
+        record.update(triage=ESCALATED)
+        return False
+    record.update(status='completed', progress=100, status_message='Completed (settled by triage)',
+                  result=settled_report(result, band), triage=SETTLED, completed_at=datetime.utcnow().isoformat())
+    return True
+
+
+def job_started_response(record: JobRecord, position: Optional[int], message: str):
+    """Build the response for a job started with start_job()."""
+    if record.cached:
+        return jsonify({
+            'job_id': record.job_id,
+            'status': 'completed',
+            'result': record.result,
+            'cached': True,
+            'message': 'Analysis result served from cache'
+        }), 200
+    if record.coalesced:
+        body = {
+            'job_id': record.job_id,
+            'status': record.status,
+            'coalesced': True,
+            'message': 'Attached to an in-progress analysis of the same text'
+        }
+    else:
+        body = {
+            'job_id': record.job_id,
+            'status': 'pending',
+            'queue_position': position,
+            'message': message
+        }
+    if record.provisional:
+        body['provisional'] = record.provisional
+    if record.triage:
+        body['triage'] = record.triage
+    return jsonify(body), 202
+
+
+def client_identity() -> str:
+    """Identify the client of the current request for fair sharing of the job queue."""
+    return (request.headers.get('X-Client-Id') or '').strip()[:128] or request.remote_addr or ''
+
+
+def discard_job(job_id: str):
+    """Forget a job that was never started (e.g. rejected because the queue is full)."""
+    jobs.remove(job_id)
+    job_store.delete(job_id)
+
+
+def start_batch_item(batch: Batch, item: BatchItem) -> str:
+    """Start the job behind a batch item (BatchManager start_item callback)."""
+    record = jobs.get(item.job_id)
+    if record is None:
+        return FINISHED
+    if record.is_finished and not item.attempts:
+        # Settled up front (chunk reused from an earlier analysis, or text settled by triage): nothing to run
+        return FINISHED
+    if item.attempts:
+        # A failed chunk runs again on the same job
+        update_job(item.job_id, status='pending', progress=0, status_message=f'Retrying (attempt {item.attempts + 1})',
+                   error=None, completed_at=None)
+    # Chunks of a chunked analysis are part of an interactive request; batch items are bulk work
+    job_class = INTERACTIVE if batch.parent_job_id else BULK
+    try:
+        start_job(record, item.kind, item.text, batch.purpose, job_class=job_class, client=batch.client)
+    except QueueFullError:
+        update_job(item.job_id, status_message='Waiting in batch (job queue full)')
+        return RETRY
+    return FINISHED if record.is_finished else STARTED
+
+
+# Separators between the chunks of running chunked analyses (parent job_id -> list), for stitching GO2 results
+chunk_separators: Dict[str, List[str]] = {}
+
+
+def chunk_text(text: str, by: str, max_tokens: int, sanitized: bool = False) -> List[Chunk]:
+    """
+    Split text for a chunked analysis and sanitize each chunk (chunks left empty are dropped).
+    Pass sanitized=True for text that already was (a streamed 'text' upload) to skip the second pass.
+    """
+    pieces = split_content_defined(text, max_tokens) if by == CONTENT_DEFINED else split_text(text, by, max_tokens)
+    chunks = pieces if sanitized else [Chunk(sanitize_text(chunk.text), chunk.separator) for chunk in pieces]
+    return [chunk for chunk in chunks if chunk.text]
+
+
+def requested_chunking(options, text_length: int) -> Optional[Tuple[str, int]]:
+    """
+    Chunking requested for an analysis: "chunk_by" ('paragraph', 'sentence', 'tokens', or
+    'content' for incremental re-analysis) and optional "chunk_tokens" (token budget per chunk).
+    A "previous_job_id" implies 'content'. Texts longer than CHUNK_AUTO_CHARS are chunked by
+    paragraph when CHUNK_AUTO_CHARS is set.
+    
+    Returns:
+        (chunk_by, max_tokens), or None to analyze the text in one run
+    
+    Raises:
+        ValueError: If the options are invalid
+    """
+    by = options.get('chunk_by') or (CONTENT_DEFINED if options.get('previous_job_id') else None)
+    if not by:
+        if not (CHUNK_AUTO_CHARS and text_length > CHUNK_AUTO_CHARS):
+            return None
+        by = 'paragraph'
+    if by not in CHUNK_MODES + (CONTENT_DEFINED,):
+        raise ValueError(f"Unknown chunk_by. Expected one of: {', '.join(CHUNK_MODES + (CONTENT_DEFINED,))}")
+    try:
+        max_tokens = int(options.get('chunk_tokens') or CHUNK_MAX_TOKENS)
+    except (TypeError, ValueError):
+        raise ValueError('"chunk_tokens" must be an integer')
+    return by, max(1, max_tokens)
+
+
+def diff_chunks(previous_job_id: Optional[str], record: JobRecord,
+                chunks: List[Chunk]) -> Tuple[Dict[int, str], Optional[Dict[str, Any]]]:
+    """
+    Diff the chunks of a resubmission against a previous chunked analysis of the same kind.
+    
+    Returns:
+        (reusable results by chunk index, diff summary), or ({}, None) if there is no such
+        previous job. Unchanged chunks whose previous job is gone are not reusable here but
+        still hit the result cache, which is keyed by chunk text.
+    """
+    previous = get_job(previous_job_id) if previous_job_id else None
+    if previous is None or not previous.chunk_jobs or previous.type != record.type:
+        return {}, None
+    hashes = [chunk_hash(chunk.text) for chunk in chunks]
+    reuse = {}
+    for index, digest in enumerate(hashes):
+        chunk_record = get_job(previous.chunk_jobs[digest]) if digest in previous.chunk_jobs else None
+        if chunk_record is not None and chunk_record.status == 'completed' and chunk_record.result:
+            reuse[index] = chunk_record.result
+    unchanged = sum(1 for digest in hashes if digest in previous.chunk_jobs)
+    return reuse, {
+        'previous_job_id': previous_job_id,
+        'unchanged': unchanged,
+        'changed': len(hashes) - unchanged,
+        'removed': len(set(previous.chunk_jobs) - set(hashes)),
+    }
+
+
+def start_chunked_job(record: JobRecord, kind: str, chunks: List[Chunk], purpose: str, client: str = '',
+                      reuse: Optional[Dict[int, str]] = None) -> Batch:
+    """
+    Start a chunked analysis. Every chunk runs as its own job (result cache, coalescing and
+    queue as usual), at most CHUNK_CONCURRENCY at once, and a failed chunk is retried on its own
+    up to CHUNK_MAX_ATTEMPTS runs. Chunks in reuse (index -> result, from diff_chunks()) complete
+    at once without a COT. The parent job (record) is updated as chunks finish and gets the
+    merged result once the last one has.
+    """
+    reuse = reuse or {}
+    batch = batches.create([{'id': index, 'text': chunk.text} for index, chunk in enumerate(chunks)], [kind],
+                           CHUNK_CONCURRENCY, purpose=purpose, mode=kind, client=client,
+                           max_attempts=CHUNK_MAX_ATTEMPTS, parent_job_id=record.job_id)
+    chunk_separators[record.job_id] = [chunk.separator for chunk in chunks]
+    record.update(chunk_batch_id=batch.batch_id, text_length=sum(len(chunk.text) for chunk in chunks),
+                  chunk_jobs={chunk_hash(chunk.text): item.job_id for item, chunk in zip(batch.items, chunks)},
+                  text=chunks[0].text[:100] + '...',  # Preview of the sanitized text
+                  status_message=f'Analyzing {len(chunks)} chunks')
+    jobs.add(record)
+    job_store.save(record.job_id, record.to_dict())
+    
+    # Every chunk gets its job up front so it can be polled while it waits for a slot
+    created_at = datetime.utcnow().isoformat()
+    for index, (item, chunk) in enumerate(zip(batch.items, chunks)):
+        chunk_record = JobRecord(
+            item.job_id,
+            status='pending',
+            progress=0,
+            status_message='Waiting for a chunk slot',
+            created_at=created_at,
+            text=chunk.text[:100] + '...' if len(chunk.text) > 100 else chunk.text,  # Store preview
+            purpose=purpose,
+            type=record.type,
+            batch_id=batch.batch_id
+        )
+        if index in reuse:
+            chunk_record.update(status='completed', progress=100, status_message='Unchanged (result reused)',
+                                result=reuse[index], cached=True, completed_at=created_at)
+            if RESULT_CACHE_ENABLED:
+                result_cache.put(result_cache_key(kind, chunk.text), reuse[index])
+            job_store.save(item.job_id, chunk_record.to_dict())
+        jobs.add(chunk_record)
+    batches.dispatch(batch)
+    return batch
+
+
+def chunk_finished(batch: Batch, item: BatchItem):
+    """
+    Update the parent job of a chunked analysis when one of its chunks is done for good
+    (BatchManager item_finished callback). The last chunk produces the merged result.
+    """
+    parent_id = batch.parent_job_id
+    if not parent_id:
+        return
+    total = len(batch.items)
+    if not batch.is_finished:
+        update_job(parent_id, status='processing', progress=min(99, int(batch.finished * 100 / total)),
+                   status_message=f'Analyzed {batch.finished}/{total} chunks')
+        return
+    
+    records = [get_job(chunk_item.job_id) for chunk_item in batch.items]
+    failed = [index + 1 for index, chunk_record in enumerate(records)
+              if chunk_record is None or chunk_record.status != 'completed']
+    separators = chunk_separators.pop(parent_id, [])
+    completed_at = datetime.utcnow().isoformat()
+    reused = sum(1 for chunk_record in records if chunk_record is not None and chunk_record.cached)
+    if item.kind == 'go' and len(failed) < total:
+        # GO: one aggregated report; failed chunks are listed in it
+        entries = []
+        for chunk_record in records:
+            if chunk_record is not None and chunk_record.status == 'completed':
+                entries.append({'preview': chunk_record.text, 'result': chunk_record.result or '',
+                                'cached': chunk_record.cached})
+            else:
+                entries.append({'preview': chunk_record.text if chunk_record else '',
+                                'error': (chunk_record.error if chunk_record else None) or 'Result unavailable'})
+        message = f'Completed ({len(failed)} of {total} chunks failed)' if failed else 'Completed'
+        update_job(parent_id, status='completed', progress=100, status_message=message,
+                   result=merge_verdicts(entries), completed_at=completed_at)
+    elif failed:
+        # GO2 text with a chunk missing is unusable; resubmitting reruns only these chunks (the rest are cached)
+        update_job(parent_id, status='failed', error=f"Chunk(s) {', '.join(map(str, failed))} of {total} failed",
+                   completed_at=completed_at)
+    else:
+        # GO2: humanized chunks stitched back together in document order
+        message = f'Completed ({total - reused} fresh, {reused} from cache)' if reused else 'Completed'
+        update_job(parent_id, status='completed', progress=100, status_message=message,
+                   result=stitch_chunks([chunk_record.result or '' for chunk_record in records], separators),
+                   completed_at=completed_at)
+
+
+def chunked_job_response(record: JobRecord, batch: Batch, message: str, diff: Optional[Dict[str, Any]] = None):
+    """Build the response for a job started with start_chunked_job() (diff from diff_chunks())."""
+    body = {
+        'job_id': record.job_id,
+        'status': record.status,
+        'chunks': len(batch.items),
+        'chunk_job_ids': [item.job_id for item in batch.items],
+        'message': message
+    }
+    if diff is not None:
+        body['diff'] = diff
+    if record.triage:
+        body['triage'] = record.triage
+    if record.provisional and record.status != 'completed':
+        body['provisional'] = record.provisional
+    if record.status == 'completed':
+        # Every chunk was served from the cache
+        body['result'] = record.result
+        return jsonify(body), 200
+    return jsonify(body), 202
+
+
+# Batches keep their jobs pending in the job table and feed them to the queue
+# BATCH "concurrency" at a time (chunked analyses run their chunks the same way).
+# Batches live in process memory only.
+batches = BatchManager(start_batch_item, retry_seconds=BATCH_RETRY_SECONDS, ttl_seconds=JOB_TTL_SECONDS,
+                       item_finished=chunk_finished)
+
+
+def require_admin():
+    """
+    Check the admin token on the current request.
+    
+    Returns:
+        An error response tuple if the request is not authorized, None if it is
+    """
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'Admin endpoints are disabled. Set ADMIN_TOKEN to enable them.'}), 403
+    auth_header = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(auth_header.encode('utf-8'), f'Bearer {ADMIN_TOKEN}'.encode('utf-8')):
+        return jsonify({'error': 'Unauthorized'}), 401
+    return None
+
+
+def queue_full_response(error: QueueFullError):
+    """Build the 503 response returned when the job queue is at capacity."""
+    response = jsonify({
+        'error': 'Server is busy. Too many analysis jobs are waiting, please retry later.',
+        'queue_depth': error.depth,
+        'max_queue_depth': error.max_depth,
+        'retry_after': JOB_QUEUE_RETRY_AFTER
+    })
+    response.headers['Retry-After'] = str(JOB_QUEUE_RETRY_AFTER)
+    return response, 503
 
 
 @app.route('/health', methods=['GET', 'OPTIONS'])
@@ -383,19 +1121,12 @@ def health():
     """Health check endpoint."""
     cot_configured = bool(FINCHAT_BASE_URL)
     
-    # Check if PDF files exist (for version verification)
-    pdf_exists = False
-    pdf_exists_2 = False
-    pdf_path = None
-    pdf_path_2 = None
-    try:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        pdf_path = os.path.join(script_dir, PATTERNS_PDF_PATH)
-        pdf_path_2 = os.path.join(script_dir, PATTERNS_PDF_PATH_2)
-        pdf_exists = os.path.exists(pdf_path)
-        pdf_exists_2 = os.path.exists(pdf_path_2)
-    except Exception:
-        pass
+    # Pattern PDFs as found when the pattern index was loaded (no filesystem checks per call)
+    pdf_path, pdf_path_2 = pattern_pdf_paths()
+    info = _pattern_index_info
+    found = {pdf['name'] for pdf in info['pdfs']} if info else set()
+    pdf_exists = os.path.basename(pdf_path) in found
+    pdf_exists_2 = os.path.basename(pdf_path_2) in found
     
     return jsonify({
         'status': 'ok',
@@ -405,6 +1136,7 @@ def health():
         'pdf_file_2_exists': pdf_exists_2,
         'pdf_path': pdf_path if pdf_exists else None,
         'pdf_path_2': pdf_path_2 if pdf_exists_2 else None,
+        'pattern_index': info or {'state': 'loading'},
         'timestamp': datetime.utcnow().isoformat()
     })
 
@@ -423,18 +1155,51 @@ def config():
     })
 
 
+@app.route('/api/metrics', methods=['GET', 'OPTIONS'])
+@cross_origin()
+def metrics():
+    """Get runtime metrics for the job queue."""
+    return jsonify({
+        'queue': job_queue.stats(),
+        'jobs': jobs.stats(),
+        'result_cache': result_cache.stats(),
+        'coalescing': coalescer.stats(),
+        'batches': batches.stats(),
+        'poller': chat_poller.stats(),
+        'session_pool': session_pool.stats(),
+        'document_uploads': document_registry.stats(),
+        'finchat_connections': _cot_client.stats() if _cot_client is not None else None,
+        'completion_times': completion_model.snapshot(),
+        'timestamp': datetime.utcnow().isoformat()
+    })
+
+
 @app.route('/api/mcp/analyze', methods=['POST', 'OPTIONS'])
 @cross_origin()
 def mcp_analyze():
     """Start COT analysis job using ai-detector-e1 COT with file upload support."""
     try:
         # Handle both JSON and multipart/form-data
+        text_file = None
+        provisional = None
         if request.content_type and 'multipart/form-data' in request.content_type:
-            text = request.form.get('text') or request.form.get('paragraph') or request.form.get('sentence', '')
+            options = request.form
+            # Large documents can be sent as a file part named 'text'; it is sanitized
+            # while it is read off the (disk-spooled) upload, so it is never held whole
+            text_file = request.files.get('text')
+            if text_file:
+                # The provisional verdict scores the text as sent, like a form field's
+                provisional = provisional_verdict(upload_head(text_file.stream, PROVISIONAL_MAX_CHARS))
+                text = sanitize_file(text_file.stream)
+            else:
+                text = request.form.get('text') or request.form.get('paragraph') or request.form.get('sentence', '')
             purpose = request.form.get('purpose', 'AI detection for content analysis')
             file = request.files.get('file')  # Single file upload
         else:
-            data = request.get_json() or {}
+            data = request.get_json()
+            if not isinstance(data, dict):
+                data = {}
+            options = data
             text = data.get('text') or data.get('paragraph') or data.get('sentence', '')
             purpose = data.get('purpose', 'AI detection for content analysis')
             file = None
@@ -442,47 +1207,86 @@ def mcp_analyze():
         if not text:
             return jsonify({'error': 'No text provided'}), 400
         
-        # Sanitize text to remove problematic special tokens (e.g., <|endoftext|>)
-        text = sanitize_text(text)
+        try:
+            chunking = requested_chunking(options, len(text))
+            band = requested_triage(options)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if file:
+            # The COT reads the attached document too, so neither chunks of the text nor the heuristic stand in for it
+            chunking = band = None
+        if text_file:
+            # A 'text' upload is only held sanitized, without its paragraph breaks: triage (which
+            # scores the whole text) is skipped, paragraph chunking packs sentences, and
+            # content-defined chunking (built on paragraphs) is refused
+            band = None
+            if chunking and chunking[0] == CONTENT_DEFINED:
+                return jsonify({'error': 'Incremental re-analysis needs the paragraph breaks: '
+                                         'send the text as a form field or JSON, not a "text" file part'}), 400
         
-        # Check if COT API is configured
+        # Scored before sanitizing, which collapses the paragraph breaks the heuristic looks at
+        if not text_file:
+            provisional = provisional_verdict(text)
+        local_result = evaluate_text(text) if band else None
+        
+        # Sanitize text to remove problematic special tokens (e.g., <|endoftext|>) exactly once: chunks
+        # are sanitized one by one, and uploads streamed as a 'text' file part already are
+        chunks = chunk_text(text, *chunking, sanitized=bool(text_file)) if chunking else []
+        if len(chunks) == 1:
+            text = chunks[0].text
+        elif not chunks and not text_file:
+            text = sanitize_text(text)
+        
+        # Create job
+        job_id = str(uuid.uuid4())
+        record = JobRecord(
+            job_id,
+            status='pending',
+            progress=0,
+            status_message='Queued',
+            created_at=datetime.utcnow().isoformat(),
+            text=text[:100] + '...' if len(text) > 100 else text,  # Store preview
+            purpose=purpose,
+            has_file=file is not None,
+            provisional=provisional
+        )
+        
+        if band and settle_by_triage(record, local_result, band):
+            # Decisive heuristic score: no COT run
+            jobs.add(record)
+            job_store.save(job_id, record.to_dict())
+            return jsonify({
+                'job_id': job_id,
+                'status': 'completed',
+                'result': record.result,
+                'triage': SETTLED,
+                'message': 'Settled by triage (no COT run)'
+            }), 200
+        
+        # Check if COT API is configured (a text settled by triage above does not need it)
         if not FINCHAT_BASE_URL:
             return jsonify({
                 'error': 'COT API not configured. Set FINCHAT_BASE_URL environment variable.'
             }), 500
         
-        # Store file content if provided
-        file_content = None
-        file_name = None
-        if file:
-            file_content = file.read()
-            file_name = file.filename
+        # Copy the uploaded document off the request (to disk above UPLOAD_SPOOL_BYTES);
+        # the job streams it to its session before running the COT
+        document = spool_upload(file.stream, file.filename, UPLOAD_SPOOL_BYTES) if file else None
         
-        # Create job
-        job_id = str(uuid.uuid4())
-        jobs[job_id] = {
-            'status': 'pending',
-            'progress': 0,
-            'status_message': 'Queued',
-            'created_at': datetime.utcnow().isoformat(),
-            'text': text[:100] + '...' if len(text) > 100 else text,  # Store preview
-            'purpose': purpose,
-            'has_file': file is not None
-        }
+        if len(chunks) > 1:
+            # Each chunk runs as its own COT (unless unchanged since previous_job_id); the job gets the merged report
+            reuse, diff = diff_chunks(options.get('previous_job_id'), record, chunks)
+            batch = start_chunked_job(record, 'go', chunks, purpose, client=client_identity(), reuse=reuse)
+            return chunked_job_response(record, batch, f'Chunked analysis started ({len(chunks)} chunks)', diff)
         
-        # Start background processing
-        thread = threading.Thread(
-            target=process_cot_analysis,
-            args=(job_id, text, purpose, file_content, file_name),
-            daemon=True
-        )
-        thread.start()
+        # Serve from cache, attach to an identical run, or queue for background processing
+        try:
+            position = start_job(record, 'go', text, purpose, document, client=client_identity())
+        except QueueFullError as e:
+            discard_job(job_id)
+            return queue_full_response(e)
         
-        return jsonify({
-            'job_id': job_id,
-            'status': 'pending',
-            'message': 'Analysis job started'
-        }), 202
+        return job_started_response(record, position, 'Analysis job started')
         
     except Exception as e:
         error_msg = str(e)
@@ -491,30 +1295,166 @@ def mcp_analyze():
         return jsonify({'error': error_msg}), 500
 
 
-@app.route('/api/mcp/status/<job_id>', methods=['GET', 'OPTIONS'])
-@cross_origin()
-def mcp_status(job_id: str):
-    """Get COT analysis job status (kept endpoint name for backward compatibility)."""
-    if job_id not in jobs:
-        return jsonify({'error': 'Job not found'}), 404
-    
-    job = jobs[job_id]
+def build_status_response(record: JobRecord) -> Dict:
+    """Build the status payload for a job (shared by the status and stream endpoints)."""
+    job = record.to_dict()
+    job_id = record.job_id
     
     response = {
         'job_id': job_id,
         'status': job['status'],
         'progress': job.get('progress', 0),
-        'status_message': job.get('status_message', '')
+        'status_message': job.get('status_message', ''),
+        'version': job.get('version', 0)
     }
     
-    if job['status'] == 'completed':
+    if job['status'] == 'pending':
+        position = job_queue.position(job_id)
+        if position is not None:
+            response['queue_position'] = position
+            response['status_message'] = f'Queued (position {position})'
+    elif job['status'] == 'processing' and job.get('cot_started_at'):
+        # Remaining time from the learned completion times of this COT and text length
+        kind = 'go2' if job.get('type') == 'v2' else 'go'
+        response['eta'] = completion_model.eta(COT_SPECS[kind]['slug'], job.get('text_length', 0),
+                                               time.time() - job['cot_started_at'])
+    elif job['status'] == 'completed':
         response['result'] = job.get('result', '')
         response['completed_at'] = job.get('completed_at')
+        if job.get('cached'):
+            response['cached'] = True
     elif job['status'] == 'failed':
         response['error'] = job.get('error', 'Unknown error')
         response['completed_at'] = job.get('completed_at')
     
-    return jsonify(response)
+    if job.get('provisional') and job['status'] != 'completed':
+        # Heuristic verdict from submission time; the COT result replaces it
+        response['provisional'] = job['provisional']
+    
+    if job.get('coalesced'):
+        response['coalesced'] = True
+    if job.get('triage'):
+        response['triage'] = job['triage']
+    if job.get('batch_id'):
+        response['batch_id'] = job['batch_id']
+    if job.get('chunk_batch_id'):
+        # Chunked analysis: each chunk's status, with its result as soon as it is done
+        batch = batches.get(job['chunk_batch_id'])
+        if batch is not None:
+            response['chunks'] = [batch_item_status(item) for item in batch.items]
+    
+    return response
+
+
+@app.route('/api/mcp/status/<job_id>', methods=['GET', 'OPTIONS'])
+@cross_origin()
+def mcp_status(job_id: str):
+    """
+    Get COT analysis job status (kept endpoint name for backward compatibility).
+    
+    Long-poll mode: with ?since=<version>&wait=<seconds>, the request blocks until the job's
+    version differs from since (progress/status changed) or the wait expires. Waits happen on
+    the request thread, never on a job worker, and are capped by LONGPOLL_MAX_WAITERS; serve with
+    asgi_server.py to hold many waits without a thread each.
+    """
+    record = get_job(job_id)
+    if record is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    since = request.args.get('since', type=int)
+    wait = min(request.args.get('wait', default=0.0, type=float), LONGPOLL_MAX_WAIT)
+    if since is not None and wait > 0 and record.version == since and not record.is_finished:
+        if longpoll_slots.acquire(blocking=False):
+            try:
+                record = jobs.wait_for_change(job_id, since, wait) or get_job(job_id) or record
+            finally:
+                longpoll_slots.release()
+    
+    return jsonify(build_status_response(record))
+
+
+def format_sse(data: Dict, event: Optional[str] = None, event_id: Optional[int] = None) -> str:
+    """Format one Server-Sent Events message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+@app.route('/api/mcp/stream/<job_id>', methods=['GET', 'OPTIONS'])
+@cross_origin()
+def mcp_stream(job_id: str):
+    """
+    Stream job progress as Server-Sent Events.
+    Sends a 'progress' event on every change, then a final 'result' or 'error' event and closes.
+    Event IDs are job versions; reconnecting with Last-Event-ID skips an unchanged snapshot.
+    Beyond SSE_MAX_STREAMS open streams, answers 503 with Retry-After (clients fall back to polling).
+    """
+    record = get_job(job_id)
+    if record is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    if not sse_slots.acquire(blocking=False):
+        retry_after = max(1, round(SSE_RETRY_MS / 1000))
+        response = jsonify({
+            'error': 'Too many open progress streams, poll /api/mcp/status instead.',
+            'retry_after': retry_after
+        })
+        response.headers['Retry-After'] = str(retry_after)
+        return response, 503
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_version = int(last_event_id) if last_event_id is not None else None
+    except ValueError:
+        last_version = None
+    
+    def generate():
+        changed = threading.Event()
+        callback = lambda _record: changed.set()
+        jobs.subscribe(job_id, callback)
+        try:
+            # Tell EventSource how long to wait before reconnecting
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            sent_version = last_version
+            deadline = time.monotonic() + SSE_MAX_SECONDS
+            while True:
+                changed.clear()
+                current = get_job(job_id)
+                if current is None:
+                    yield format_sse({'job_id': job_id, 'error': 'Job not found'}, event='error')
+                    return
+                
+                payload = build_status_response(current)
+                if payload['status'] in ('completed', 'failed'):
+                    event = 'result' if payload['status'] == 'completed' else 'error'
+                    yield format_sse(payload, event=event, event_id=payload['version'])
+                    return
+                if payload['version'] != sent_version:
+                    yield format_sse(payload, event='progress', event_id=payload['version'])
+                    sent_version = payload['version']
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # Client reconnects with Last-Event-ID and resumes from here
+                    return
+                if not changed.wait(min(SSE_HEARTBEAT_SECONDS, remaining)):
+                    yield ": heartbeat\n\n"
+        finally:
+            jobs.unsubscribe(job_id, callback)
+            sse_slots.release()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Disable proxy buffering so events arrive immediately
+        }
+    )
 
 
 @app.route('/api/mcp/analyze-v2', methods=['POST', 'OPTIONS'])
@@ -523,7 +1463,7 @@ def mcp_analyze_v2():
     """Start COT v2 analysis job (for GO2 button)."""
     try:
         data = request.get_json()
-        if not data:
+        if not data or not isinstance(data, dict):
             return jsonify({'error': 'No JSON data provided'}), 400
         
         text = data.get('text') or data.get('paragraph') or data.get('sentence', '')
@@ -532,8 +1472,18 @@ def mcp_analyze_v2():
         if not text:
             return jsonify({'error': 'No text provided'}), 400
         
-        # Sanitize text to remove problematic special tokens (e.g., <|endoftext|>)
-        text = sanitize_text(text)
+        try:
+            chunking = requested_chunking(data, len(text))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Sanitize text to remove problematic special tokens (e.g., <|endoftext|>) exactly once; chunks are
+        # sanitized one by one
+        chunks = chunk_text(text, *chunking) if chunking else []
+        if len(chunks) == 1:
+            text = chunks[0].text
+        elif not chunks:
+            text = sanitize_text(text)
         
         # Check if COT API is configured
         if not FINCHAT_BASE_URL:
@@ -543,29 +1493,32 @@ def mcp_analyze_v2():
         
         # Create job
         job_id = str(uuid.uuid4())
-        jobs[job_id] = {
-            'status': 'pending',
-            'progress': 0,
-            'status_message': 'Queued',
-            'created_at': datetime.utcnow().isoformat(),
-            'text': text[:100] + '...' if len(text) > 100 else text,  # Store preview
-            'purpose': purpose,
-            'type': 'v2'  # Mark as v2 job
-        }
-        
-        # Start background processing
-        thread = threading.Thread(
-            target=process_cot_v2_analysis,
-            args=(job_id, text, purpose),
-            daemon=True
+        record = JobRecord(
+            job_id,
+            status='pending',
+            progress=0,
+            status_message='Queued',
+            created_at=datetime.utcnow().isoformat(),
+            text=text[:100] + '...' if len(text) > 100 else text,  # Store preview
+            purpose=purpose,
+            type='v2'  # Mark as v2 job
         )
-        thread.start()
         
-        return jsonify({
-            'job_id': job_id,
-            'status': 'pending',
-            'message': 'Analysis v2 job started'
-        }), 202
+        if len(chunks) > 1:
+            # Each chunk is humanized by its own COT (unless unchanged since previous_job_id); the job gets
+            # the chunks stitched back in order
+            reuse, diff = diff_chunks(data.get('previous_job_id'), record, chunks)
+            batch = start_chunked_job(record, 'go2', chunks, purpose, client=client_identity(), reuse=reuse)
+            return chunked_job_response(record, batch, f'Chunked analysis v2 started ({len(chunks)} chunks)', diff)
+        
+        # Serve from cache, attach to an identical run, or queue for background processing
+        try:
+            position = start_job(record, 'go2', text, purpose, client=client_identity())
+        except QueueFullError as e:
+            discard_job(job_id)
+            return queue_full_response(e)
+        
+        return job_started_response(record, position, 'Analysis v2 job started')
         
     except Exception as e:
         error_msg = str(e)
@@ -574,6 +1527,309 @@ def mcp_analyze_v2():
         return jsonify({'error': error_msg}), 500
 
 
+@app.route('/api/local/analyze', methods=['POST', 'OPTIONS'])
+@cross_origin()
+def local_analyze():
+    """
+    Score texts with the heuristic detector (port of the browser's evaluateText), without FinChat.
+    Body: {"text": "..."} for one result, or {"texts": ["...", ...]} for {"results": [...]}.
+    Texts are scored as sent (not sanitized), like in the browser.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data, dict):
+            return jsonify({'error': 'No JSON data provided'}), 400
+        
+        if 'texts' in data:
+            texts = data['texts']
+            if not isinstance(texts, list) or not texts:
+                return jsonify({'error': 'Provide "texts" as a non-empty list of texts'}), 400
+            if len(texts) > LOCAL_ANALYZE_MAX_TEXTS:
+                return jsonify({'error': f'Too many texts (maximum {LOCAL_ANALYZE_MAX_TEXTS} per request)'}), 400
+            # Texts that cannot be scored get {"error": ...} in their place
+            return jsonify({'results': evaluate_texts(texts)})
+        
+        result = evaluate_text(data.get('text') or data.get('paragraph') or '')
+        if 'error' in result:
+            return jsonify(result), 400
+        return jsonify(result)
+    
+    except Exception as e:
+        error_msg = str(e)
+        print(f"Error in local analysis: {error_msg}")
+        traceback.print_exc()
+        return jsonify({'error': error_msg}), 500
+
+
+@app.route('/api/patterns/scan', methods=['POST', 'OPTIONS'])
+@cross_origin()
+def patterns_scan():
+    """
+    Find the AI-writing phrases listed in the pattern PDFs in a text, in one pass over it.
+    Body: {"text": "..."}. Returns {"matches": [{"start", "end", "text", "phrase", "category", "source"}],
+    "count", "categories": {category: n}}, with start / end as character offsets into the text as sent
+    (it is not sanitized, so offsets can be used to highlight it).
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data, dict):
+            return jsonify({'error': 'No JSON data provided'}), 400
+        
+        text = data.get('text') or data.get('paragraph') or ''
+        if not isinstance(text, str) or not text.strip():
+            return jsonify({'error': 'No text provided'}), 400
+        if len(text) > PATTERNS_SCAN_MAX_CHARS:
+            return jsonify({'error': f'Text too long (maximum {PATTERNS_SCAN_MAX_CHARS} characters)'}), 400
+        
+        try:
+            index = get_pattern_index()
+        except RuntimeError as e:
+            return jsonify({'error': str(e)}), 503
+        
+        matches = index.scan(text)
+        categories: Dict[str, int] = {}
+        for match in matches:
+            categories[match['category']] = categories.get(match['category'], 0) + 1
+        return jsonify({'matches': matches, 'count': len(matches), 'categories': categories})
+    
+    except Exception as e:
+        error_msg = str(e)
+        print(f"Error in pattern scan: {error_msg}")
+        traceback.print_exc()
+        return jsonify({'error': error_msg}), 500
+
+
+# Job kinds run for each batch mode
+BATCH_MODES = {
+    'go': ['go'],
+    'go2': ['go2'],
+    'both': ['go', 'go2'],
+}
+
+
+@app.route('/api/mcp/analyze-batch', methods=['POST', 'OPTIONS'])
+@cross_origin()
+def mcp_analyze_batch():
+    """
+    Start a batch of analysis jobs.
+    Body: {"items": ["text", {"id": "...", "text": "..."}, ...], "mode": "go"|"go2"|"both",
+           "concurrency": 4, "purpose": "...", "triage": false, "triage_band": [20, 80]}
+    Each text becomes one job per kind; at most "concurrency" of them are in flight at once.
+    With "triage", GO jobs whose heuristic score is outside the band are settled without a COT.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data, dict):
+            return jsonify({'error': 'No JSON data provided'}), 400
+        
+        items = data.get('items')
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'Provide "items" as a non-empty list of texts'}), 400
+        if len(items) > BATCH_MAX_ITEMS:
+            return jsonify({'error': f'Too many items (maximum {BATCH_MAX_ITEMS} per batch)'}), 400
+        
+        mode = data.get('mode', 'go')
+        if mode not in BATCH_MODES:
+            return jsonify({'error': f"Unknown mode. Expected one of: {', '.join(BATCH_MODES)}"}), 400
+        
+        try:
+            concurrency = int(data.get('concurrency', BATCH_DEFAULT_CONCURRENCY))
+        except (TypeError, ValueError):
+            return jsonify({'error': '"concurrency" must be an integer'}), 400
+        concurrency = max(1, min(concurrency, BATCH_MAX_CONCURRENCY))
+        purpose = data.get('purpose', 'AI detection for content analysis')
+        try:
+            band = requested_triage(data) if 'go' in BATCH_MODES[mode] else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        texts = []
+        raw_texts = []
+        for index, item in enumerate(items):
+            if isinstance(item, dict):
+                item_id = item.get('id', index)
+                text = item.get('text') or item.get('paragraph') or ''
+            else:
+                item_id, text = index, item
+            raw_texts.append(text if isinstance(text, str) else '')
+            # Sanitize text to remove problematic special tokens (e.g., <|endoftext|>)
+            text = sanitize_text(text) if isinstance(text, str) else ''
+            if not text:
+                return jsonify({'error': f'No text provided for item {index}'}), 400
+            texts.append({'id': item_id, 'text': text})
+        
+        # Triage: every text scored by the heuristic at once; decisive GO jobs are settled before dispatch
+        local_results = evaluate_texts(raw_texts) if band else None
+        
+        # Check if COT API is configured, unless triage settles every item without a COT
+        needs_cot = (not band or 'go2' in BATCH_MODES[mode]
+                     or any(decide(result, band) is None for result in local_results))
+        if needs_cot and not FINCHAT_BASE_URL:
+            return jsonify({
+                'error': 'COT API not configured. Set FINCHAT_BASE_URL environment variable.'
+            }), 500
+        
+        # Every item gets its job up front so it can be polled while it waits for a batch slot
+        batch = batches.create(texts, BATCH_MODES[mode], concurrency, purpose=purpose, mode=mode,
+                               client=client_identity())
+        created_at = datetime.utcnow().isoformat()
+        for item in batch.items:
+            record = JobRecord(
+                item.job_id,
+                status='pending',
+                progress=0,
+                status_message='Waiting in batch',
+                created_at=created_at,
+                text=item.text[:100] + '...' if len(item.text) > 100 else item.text,  # Store preview
+                purpose=purpose,
+                type='v2' if item.kind == 'go2' else None,
+                batch_id=batch.batch_id
+            )
+            text_index = item.index // len(BATCH_MODES[mode])  # Items are one per kind per text, in text order
+            if band and item.kind == 'go' and settle_by_triage(record, local_results[text_index], band):
+                job_store.save(item.job_id, record.to_dict())
+            jobs.add(record)
+        batches.dispatch(batch)
+        
+        body = {
+            'batch_id': batch.batch_id,
+            'status': 'completed' if batch.is_finished else 'processing',
+            'mode': mode,
+            'concurrency': batch.concurrency,
+            'total': len(batch.items),
+            'jobs': [
+                {'index': item.index, 'id': item.item_id, 'kind': item.kind, 'job_id': item.job_id}
+                for item in batch.items
+            ],
+            'message': 'Batch analysis started'
+        }
+        if band:
+            body['triage'] = batch_triage_counts(batch)
+        return jsonify(body), 202
+    
+    except Exception as e:
+        error_msg = str(e)
+        print(f"Error starting batch analysis: {error_msg}")
+        traceback.print_exc()
+        return jsonify({'error': error_msg}), 500
+
+
+def batch_triage_counts(batch: Batch) -> Dict[str, int]:
+    """Texts of a triaged batch settled locally ('skipped') and sent to the COT ('escalated')."""
+    records = [get_job(item.job_id) for item in batch.items]
+    return triage_counts([record.triage if record is not None else None for record in records])
+
+
+def batch_item_status(item: BatchItem) -> Dict:
+    """Build the status entry of one batch item from its job."""
+    entry = {'index': item.index, 'id': item.item_id, 'kind': item.kind, 'job_id': item.job_id}
+    record = get_job(item.job_id)
+    if record is None:
+        entry.update(status='unknown', progress=0)
+        return entry
+    status = build_status_response(record)
+    status.pop('job_id', None)
+    status.pop('batch_id', None)
+    entry.update(status)
+    return entry
+
+
+@app.route('/api/mcp/batch/<batch_id>', methods=['GET', 'OPTIONS'])
+@cross_origin()
+def mcp_batch_status(batch_id: str):
+    """Get aggregate status and progress of a batch (per-item results: /api/mcp/batch/<batch_id>/items)."""
+    batch = batches.get(batch_id)
+    if batch is None:
+        return jsonify({'error': 'Batch not found'}), 404
+    
+    counts = {'pending': 0, 'processing': 0, 'completed': 0, 'failed': 0}
+    triage = batch_triage_counts(batch)
+    total_progress = 0
+    for item in batch.items:
+        record = get_job(item.job_id)
+        job = record.to_dict() if record is not None else {'status': 'unknown'}
+        counts[job['status']] = counts.get(job['status'], 0) + 1
+        total_progress += 100 if job['status'] in ('completed', 'failed') else job.get('progress', 0)
+    
+    response = {
+        'batch_id': batch.batch_id,
+        'status': 'completed' if batch.is_finished else 'processing',
+        'mode': batch.mode,
+        'concurrency': batch.concurrency,
+        'total': len(batch.items),
+        'counts': counts,
+        'in_flight': len(batch.in_flight),
+        'progress': int(total_progress / len(batch.items)),
+        'created_at': batch.created_at,
+        'completed_at': batch.completed_at
+    }
+    if any(triage.values()):
+        response['triage'] = triage
+    return jsonify(response)
+
+
+@app.route('/api/mcp/batch/<batch_id>/items', methods=['GET', 'OPTIONS'])
+@cross_origin()
+def mcp_batch_items(batch_id: str):
+    """
+    List batch items with their status and results, paged.
+    Query: ?offset=0&limit=20&status=completed (status optional)
+    """
+    batch = batches.get(batch_id)
+    if batch is None:
+        return jsonify({'error': 'Batch not found'}), 404
+    
+    offset = max(0, request.args.get('offset', default=0, type=int))
+    limit = max(1, min(request.args.get('limit', default=20, type=int), 100))
+    status_filter = request.args.get('status')
+    
+    if status_filter:
+        entries = [entry for entry in map(batch_item_status, batch.items) if entry['status'] == status_filter]
+        total = len(entries)
+        entries = entries[offset:offset + limit]
+    else:
+        total = len(batch.items)
+        entries = [batch_item_status(item) for item in batch.items[offset:offset + limit]]
+    
+    return jsonify({
+        'batch_id': batch.batch_id,
+        'offset': offset,
+        'limit': limit,
+        'total': total,
+        'items': entries
+    })
+
+
+@app.route('/api/admin/cache/invalidate', methods=['POST', 'OPTIONS'])
+@cross_origin()
+def admin_cache_invalidate():
+    """
+    Invalidate result cache entries.
+    Body: {"key": "<cache key>"}, {"text": "...", "kind": "go"|"go2"} (kind optional = both), or {"all": true}.
+    """
+    denied = require_admin()
+    if denied:
+        return denied
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {}
+    if data.get('all'):
+        removed = result_cache.invalidate()
+    elif data.get('key'):
+        removed = result_cache.invalidate(data['key'])
+    elif data.get('text'):
+        kinds = [data['kind']] if data.get('kind') else list(COT_SPECS)
+        if any(kind not in COT_SPECS for kind in kinds):
+            return jsonify({'error': f"Unknown kind. Expected one of: {', '.join(COT_SPECS)}"}), 400
+        text = sanitize_text(data['text'])
+        removed = sum(result_cache.invalidate(result_cache_key(kind, text)) for kind in kinds)
+    else:
+        return jsonify({'error': 'Provide "key", "text" (with optional "kind") or "all": true'}), 400
+    
+    return jsonify({'removed': removed, 'result_cache': result_cache.stats()})
+
+
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5001))
     debug = os.getenv('DEBUG', 'False').lower() == 'true'
@@ -588,6 +1844,8 @@ if __name__ == '__main__':
         print(f"Base URL: {FINCHAT_BASE_URL}")
     print(f"GO Session ID: {COT_SESSION_ID}")
     print(f"GO2 Session ID: {COT_V2_SESSION_ID}")
+    print(f"Job Workers: {JOB_WORKERS} (queue depth {JOB_QUEUE_DEPTH})")
+    print(f"Job Store: {JOB_STORE_BACKEND}" + (f" ({JOB_STORE_PATH})" if JOB_STORE_BACKEND != 'memory' else ''))
     if FINCHAT_API_TOKEN:
         print(f"API Token: {'*' * min(len(FINCHAT_API_TOKEN), 20)}... (configured)")
     else:
@@ -595,5 +1853,11 @@ if __name__ == '__main__':
     print("="*60)
     print()
     
+    recovered = recover_jobs()
+    if recovered:
+        print(f"Recovered {recovered} unfinished job(s) from the job store")
+    session_pool.start()
+    warm_pattern_index()
+    
     app.run(host='0.0.0.0', port=port, debug=debug)
 
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Batch analysis: fan a list of texts out as individual jobs with a
+per-batch concurrency cap, and aggregate their status.
+Also runs the chunks of a chunked analysis (the batch then belongs to a parent job).
+"""
+
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+# Outcomes returned by the start_item callback
+STARTED = 'started'    # job is queued/running; the batch waits for job_finished()
+FINISHED = 'finished'  # job completed immediately (e.g. result cache hit)
+RETRY = 'retry'        # job could not be queued yet (queue full); try again later
+
+
+class BatchItem:
+    """One (text, kind) unit of a batch, backed by one job."""
+
+    __slots__ = ('index', 'item_id', 'kind', 'text', 'job_id', 'started', 'attempts')
+
+    def __init__(self, index: int, item_id: Any, kind: str, text: str, job_id: str):
+        self.index = index
+        self.item_id = item_id
+        self.kind = kind
+        self.text: Optional[str] = text  # Released once the job has started for the last time
+        self.job_id = job_id
+        self.started = False
+        self.attempts = 0
+
+
+class Batch:
+    """A submitted batch and its dispatch state."""
+
+    def __init__(self, batch_id: str, mode: str, purpose: str, concurrency: int, items: List[BatchItem],
+                 client: str = '', max_attempts: int = 1, parent_job_id: Optional[str] = None):
+        self.batch_id = batch_id
+        self.mode = mode
+        self.purpose = purpose
+        self.client = client
+        self.concurrency = concurrency
+        self.items = items
+        self.items_by_job = {item.job_id: item for item in items}
+        self.max_attempts = max(1, max_attempts)  # Runs per item when its job fails
+        self.parent_job_id = parent_job_id  # Job whose chunks this batch runs (chunked analysis)
+        self.created_at = datetime.utcnow().isoformat()
+        self.completed_at: Optional[str] = None
+        self.finished_at_monotonic: Optional[float] = None
+        self.next_index = 0
+        self.retry_items: deque = deque()  # Failed items waiting to run again (before new items)
+        self.in_flight: set = set()
+        self.finished = 0
+        # Guards against re-entrant dispatch when start_item finishes a job on the dispatching thread
+        self.dispatching = False
+        self.retry_scheduled = False
+        self.lock = threading.RLock()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.finished >= len(self.items)
+
+
+class BatchManager:
+    """
+    Creates batches and keeps at most `concurrency` jobs of each batch in flight.
+
+    The manager does not run jobs itself: start_item(batch, item) hands an item
+    to the job system, and the owner calls job_finished() when a batch job ends.
+    Items whose job failed run again (on the same job) until max_attempts is reached.
+    """
+
+    def __init__(
+        self,
+        start_item: Callable[[Batch, BatchItem], str],
+        retry_seconds: float = 5.0,
+        ttl_seconds: float = 3600,
+        item_finished: Optional[Callable[[Batch, BatchItem], None]] = None
+    ):
+        """
+        Initialize the manager.
+
+        Args:
+            start_item: Callback that starts the job for an item; returns STARTED, FINISHED or RETRY.
+                item.attempts is the number of earlier runs (non-zero when a failed job is retried).
+            retry_seconds: Delay before retrying items that could not be queued
+            ttl_seconds: Seconds a finished batch is kept before it is forgotten
+            item_finished: Optional callback invoked (under the batch lock) when an item is done for good
+        """
+        self.start_item = start_item
+        self.retry_seconds = retry_seconds
+        self.ttl_seconds = ttl_seconds
+        self.item_finished = item_finished
+        self._lock = threading.Lock()
+        self._batches: Dict[str, Batch] = {}
+
+    def create(
+        self,
+        texts: List[Dict[str, Any]],
+        kinds: List[str],
+        concurrency: int,
+        purpose: str = '',
+        mode: str = '',
+        client: str = '',
+        new_job_id: Callable[[], str] = lambda: str(uuid.uuid4()),
+        max_attempts: int = 1,
+        parent_job_id: Optional[str] = None
+    ) -> Batch:
+        """
+        Create a batch. Call dispatch() once the items' jobs exist to start it.
+
+        Args:
+            texts: List of {'id': <caller id>, 'text': <text>}
+            kinds: Job kinds to run for every text (e.g. ['go'], ['go', 'go2'])
+            concurrency: Maximum jobs of this batch in flight at once
+            purpose: Purpose passed to every job
+            mode: Mode label reported in status ('go', 'go2', 'both')
+            client: Identity of the submitting client (for fair sharing of the job queue)
+            new_job_id: Factory for job IDs
+            max_attempts: Runs per item when its job fails (1 = no retries)
+            parent_job_id: Job the batch belongs to, if it runs the chunks of a chunked analysis
+
+        Returns:
+            The new batch
+        """
+        self._forget_expired()
+        items = []
+        for entry in texts:
+            for kind in kinds:
+                items.append(BatchItem(len(items), entry.get('id'), kind, entry['text'], new_job_id()))
+        batch = Batch(f"batch-{uuid.uuid4()}", mode, purpose, max(1, concurrency), items, client,
+                      max_attempts=max_attempts, parent_job_id=parent_job_id)
+        with self._lock:
+            self._batches[batch.batch_id] = batch
+        return batch
+
+    def get(self, batch_id: str) -> Optional[Batch]:
+        with self._lock:
+            return self._batches.get(batch_id)
+
+    def dispatch(self, batch: Batch):
+        """Start items until the batch's concurrency cap is reached."""
+        with batch.lock:
+            if batch.dispatching:
+                return
+            batch.dispatching = True
+            try:
+                while ((batch.retry_items or batch.next_index < len(batch.items))
+                       and len(batch.in_flight) < batch.concurrency):
+                    item = batch.retry_items[0] if batch.retry_items else batch.items[batch.next_index]
+                    outcome = self.start_item(batch, item)
+                    if outcome == RETRY:
+                        self._schedule_retry(batch)
+                        return
+                    if batch.retry_items:
+                        batch.retry_items.popleft()
+                    else:
+                        batch.next_index += 1
+                    item.started = True
+                    item.attempts += 1
+                    if item.attempts >= batch.max_attempts:
+                        item.text = None
+                    if outcome == FINISHED:
+                        self._mark_finished(batch, item)
+                    else:
+                        batch.in_flight.add(item.job_id)
+            finally:
+                batch.dispatching = False
+
+    def job_finished(self, batch_id: str, job_id: str, failed: bool = False):
+        """
+        Record that a batch job ended and start the next waiting item.
+        A failed job runs again if its item has attempts left.
+        """
+        batch = self.get(batch_id)
+        if batch is None:
+            return
+        with batch.lock:
+            if job_id not in batch.in_flight:
+                return
+            batch.in_flight.discard(job_id)
+            item = batch.items_by_job[job_id]
+            if failed and item.attempts < batch.max_attempts:
+                batch.retry_items.append(item)
+            else:
+                self._mark_finished(batch, item)
+        self.dispatch(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            batches = list(self._batches.values())
+        return {
+            'batches': len(batches),
+            'active': sum(1 for batch in batches if not batch.is_finished),
+            'items_waiting': sum(len(batch.items) - batch.next_index + len(batch.retry_items) for batch in batches),
+            'items_in_flight': sum(len(batch.in_flight) for batch in batches),
+        }
+
+    def _schedule_retry(self, batch: Batch):
+        """Dispatch the batch again after retry_seconds. Caller must hold the batch lock."""
+        if batch.retry_scheduled:
+            return
+        batch.retry_scheduled = True
+
+        def retry():
+            with batch.lock:
+                batch.retry_scheduled = False
+            self.dispatch(batch)
+
+        timer = threading.Timer(self.retry_seconds, retry)
+        timer.daemon = True
+        timer.start()
+
+    def _mark_finished(self, batch: Batch, item: BatchItem):
+        item.text = None
+        batch.finished += 1
+        if batch.is_finished and batch.completed_at is None:
+            batch.completed_at = datetime.utcnow().isoformat()
+            batch.finished_at_monotonic = time.monotonic()
+        if self.item_finished is not None:
+            self.item_finished(batch, item)
+
+    def _forget_expired(self):
+        if self.ttl_seconds <= 0:
+            return
+        cutoff = time.monotonic() - self.ttl_seconds
+        with self._lock:
+            for batch_id, batch in list(self._batches.items()):
+                if batch.finished_at_monotonic is not None and batch.finished_at_monotonic <= cutoff:
+                    del self._batches[batch_id]
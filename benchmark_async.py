@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Benchmark: threaded (Flask + JobQueue workers) vs asyncio (asgi_server) job execution.
+
+Starts a local fake FinChat API whose COT runs take --cot-seconds, submits --jobs
+distinct analyses through POST /api/mcp/analyze in each mode (each mode in its own
+process), and reports how many jobs were in flight at once, peak threads, peak RSS
+and the time until every job finished.
+
+Usage:
+    python3 benchmark_async.py --jobs 1000 --cot-seconds 10
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+
+def fake_finchat_app(cot_seconds: float):
+    """Minimal FinChat API: sessions, COT chats that complete after cot_seconds, results."""
+    from starlette.applications import Starlette
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    started = {}  # session_id -> (cot_chat_id, started_at)
+
+    async def create_session(request: Request):
+        return JSONResponse({'id': uuid.uuid4().hex})
+
+    async def chats(request: Request):
+        if request.method == 'POST':
+            body = await request.json()
+            chat_id = uuid.uuid4().hex
+            started[body['session']] = (chat_id, time.time())
+            return JSONResponse({'id': chat_id})
+        session_id = request.query_params.get('session_id')
+        if session_id not in started:
+            return JSONResponse({'results': []})
+        chat_id, started_at = started[session_id]
+        elapsed = time.time() - started_at
+        response_chat = {'id': f'r{chat_id}', 'respond_to': chat_id, 'metadata': {
+            'current_progress': min(int(elapsed), int(cot_seconds)), 'total_progress': int(cot_seconds) or 1,
+            'current_step': 'Analyzing...'
+        }}
+        if elapsed >= cot_seconds:
+            response_chat['result_id'] = chat_id
+        return JSONResponse({'results': [response_chat]})
+
+    async def result(request: Request):
+        return JSONResponse({'content': f"Result {request.path_params['result_id']}"})
+
+    return Starlette(routes=[
+        Route('/api/v1/sessions/', create_session, methods=['POST']),
+        Route('/api/v1/chats/', chats, methods=['GET', 'POST']),
+        Route('/api/v1/results/{result_id}/', result, methods=['GET']),
+    ])
+
+
+def serve_fake_finchat(cot_seconds: float) -> str:
+    """Run the fake FinChat API on a background thread and return its base URL."""
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(
+        fake_finchat_app(cot_seconds), host='127.0.0.1', port=port, log_level='warning', backlog=4096
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f'http://127.0.0.1:{port}'
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (Linux)."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(mode: str, jobs: int, timeout: float) -> dict:
+    """Submit jobs through the backend in the given mode and wait for all of them (child process)."""
+    if mode == 'async':
+        import asyncio
+        import asgi_server
+        backend = asgi_server.backend
+    else:
+        import backend_server as backend
+
+    client = backend.app.test_client()
+    stats = {'peak_in_flight': 0, 'peak_threads': threading.active_count()}
+
+    def submit_all():
+        job_ids = []
+        for i in range(jobs):
+            response = client.post('/api/mcp/analyze', json={'text': f'benchmark text {i} {uuid.uuid4().hex}'})
+            job_ids.append(response.get_json()['job_id'])
+        return job_ids
+
+    def sample(job_ids) -> int:
+        records = [backend.jobs.get(job_id) for job_id in job_ids]
+        unfinished = sum(1 for record in records if record is not None and not record.is_finished)
+        in_flight = sum(1 for record in records if record is not None and record.status == 'processing')
+        stats['peak_in_flight'] = max(stats['peak_in_flight'], in_flight)
+        stats['peak_threads'] = max(stats['peak_threads'], threading.active_count())
+        return unfinished
+
+    started = time.time()
+    if mode == 'async':
+        async def main():
+            backend.configure(asgi_server.job_queue, asgi_server.ASYNC_JOB_PROCESSORS)
+            asgi_server.job_queue.bind(asyncio.get_running_loop())
+            job_ids = submit_all()
+            while sample(job_ids) and time.time() - started < timeout:
+                await asyncio.sleep(0.25)
+            return job_ids
+
+        job_ids = asyncio.run(main())
+    else:
+        job_ids = submit_all()
+        while sample(job_ids) and time.time() - started < timeout:
+            time.sleep(0.25)
+
+    records = [backend.jobs.get(job_id) for job_id in job_ids]
+    return {
+        'mode': mode,
+        'jobs': jobs,
+        'completed': sum(1 for record in records if record is not None and record.status == 'completed'),
+        'failed': sum(1 for record in records if record is not None and record.status == 'failed'),
+        'peak_in_flight': stats['peak_in_flight'],
+        'peak_threads': stats['peak_threads'],
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'seconds': round(time.time() - started, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=500, help='Jobs submitted per mode')
+    parser.add_argument('--cot-seconds', type=float, default=10, help='Duration of each fake COT run')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Threaded mode JOB_WORKERS (default: one per job, the best case for threads)')
+    parser.add_argument('--timeout', type=float, default=600, help='Give up waiting after this many seconds')
+    parser.add_argument('--mode', choices=['threads', 'async'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.jobs, args.timeout)))
+        return 0
+
+    base_url = serve_fake_finchat(args.cot_seconds)
+    env = dict(
+        os.environ,
+        FINCHAT_BASE_URL=base_url,
+        FINCHAT_API_TOKEN='',
+        JOB_STORE='memory',
+        RESULT_CACHE_ENABLED='False',
+        JOB_WORKERS=str(args.workers or args.jobs),
+        JOB_QUEUE_DEPTH=str(args.jobs),
+        ASYNC_MAX_JOBS=str(args.jobs),
+        # Let the shared poller keep up with every job so the modes differ only in how jobs wait
+        COT_POLL_RATE=str(max(10, args.jobs)),
+        COT_POLL_CONCURRENCY='16',
+    )
+    results = []
+    for mode in ('threads', 'async'):
+        print(f"Running {mode} mode with {args.jobs} jobs...", file=sys.stderr)
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--mode', mode, '--jobs', str(args.jobs),
+             '--timeout', str(args.timeout)],
+            env=env, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        lines = [line for line in output.stdout.splitlines() if line.startswith('{')]
+        if output.returncode != 0 or not lines:
+            print(output.stderr[-2000:], file=sys.stderr)
+            return 1
+        results.append(json.loads(lines[-1]))
+
+    columns = ['mode', 'jobs', 'completed', 'failed', 'peak_in_flight', 'peak_threads', 'peak_rss_mb', 'seconds']
+    print(' | '.join(f'{column:>14}' for column in columns))
+    for result in results:
+        print(' | '.join(f'{str(result[column]):>14}' for column in columns))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
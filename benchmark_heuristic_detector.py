@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the heuristic detector: a whole batch scored at once
+(evaluate_texts) vs one evaluate_text call per text.
+
+Scores generated paragraphs in batches of several sizes, checks that both ways
+give identical results, and reports texts per second and the speedup.
+
+Usage:
+    python3 benchmark_heuristic_detector.py --batch-sizes 1 100 1000 --words 150 --repeat 3
+"""
+
+import argparse
+import random
+import sys
+import timeit
+
+from heuristic_detector import evaluate_text, evaluate_texts
+
+
+WORDS = ['the', 'model', 'writes', 'fluent', 'text,', 'however', 'report.', 'data', 'analysis!', 'why?',
+         'and', 'of', 'a', 'significant', 'transforming', 'landscape.', '\n\n', 'indeed']
+
+
+def make_texts(count: int, words: int, seed: int = 42):
+    """Generate count paragraphs of about words words each."""
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(WORDS) for _ in range(rng.randint(words // 2, words * 3 // 2)))
+            for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 100, 1000, 10000],
+                        help='Texts per batch')
+    parser.add_argument('--words', type=int, default=150, help='Average words per text')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per case (best is reported)')
+    args = parser.parse_args()
+
+    columns = ['batch', 'single_tps', 'batch_tps', 'speedup']
+    print(' | '.join(f'{column:>12}' for column in columns))
+    for size in args.batch_sizes:
+        texts = make_texts(size, args.words)
+        if evaluate_texts(texts) != [evaluate_text(text) for text in texts]:
+            print(f"Result mismatch for batch size {size}", file=sys.stderr)
+            return 1
+        single = min(timeit.repeat(lambda: [evaluate_text(text) for text in texts], number=1, repeat=args.repeat))
+        batch = min(timeit.repeat(lambda: evaluate_texts(texts), number=1, repeat=args.repeat))
+        row = [size, f'{size / single:.0f}', f'{size / batch:.0f}', f'{single / batch:.1f}x']
+        print(' | '.join(f'{str(value):>12}' for value in row))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
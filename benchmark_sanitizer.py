@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: compiled sanitize_text vs the original multi-pass implementation.
+
+Times both on generated documents of several sizes, plain and with special
+tokens scattered through them, checks that their outputs are identical, and
+reports the best time per call and the speedup.
+
+Usage:
+    python3 benchmark_sanitizer.py --sizes 10000 1000000 5000000 --repeat 5
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import sys
+import timeit
+
+from sanitizer import reference_sanitize_text, sanitize_text
+
+
+WORDS = ['the', 'model', 'writes', 'fluent', 'text', 'costs', '$5', 'and', 'report.', '\n\n', 'end', 'of']
+TOKENS = ['<|endoftext|>', '<endoftext>', '<|fim_pad|>', '&lt;|endoftext|&gt;', '<|user|>']
+
+
+def make_document(size: int, with_tokens: bool, seed: int = 42) -> str:
+    """Generate roughly size characters of prose, optionally with a special token every ~2KB."""
+    rng = random.Random(seed)
+    parts, length = [], 0
+    while length < size:
+        word = rng.choice(TOKENS) if with_tokens and rng.random() < 0.003 else rng.choice(WORDS)
+        parts.append(word)
+        length += len(word) + 1
+    return ' '.join(parts)
+
+
+def best_seconds(fn, text: str, repeat: int) -> float:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return min(timeit.repeat(lambda: fn(text), number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000, 5_000_000],
+                        help='Document sizes in characters')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case (best is reported)')
+    args = parser.parse_args()
+
+    columns = ['size', 'tokens', 'original_ms', 'compiled_ms', 'speedup']
+    print(' | '.join(f'{column:>12}' for column in columns))
+    for size in args.sizes:
+        for with_tokens in (False, True):
+            text = make_document(size, with_tokens)
+            with contextlib.redirect_stdout(io.StringIO()):
+                if sanitize_text(text) != reference_sanitize_text(text):
+                    print(f"Output mismatch for size={size} tokens={with_tokens}", file=sys.stderr)
+                    return 1
+            original = best_seconds(reference_sanitize_text, text, args.repeat)
+            compiled = best_seconds(sanitize_text, text, args.repeat)
+            row = [size, 'yes' if with_tokens else 'no', f'{original * 1000:.1f}', f'{compiled * 1000:.1f}',
+                   f'{original / compiled:.1f}x']
+            print(' | '.join(f'{str(value):>12}' for value in row))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Choose the triage band (TRIAGE_HUMAN_BELOW / TRIAGE_AI_ABOVE) from labeled texts.
+
+Scores every text with the heuristic detector, then, for each target precision,
+finds the widest thresholds at which texts settled without a COT are still
+labeled correctly that often. Prints the share of texts each band settles
+and the environment variables for the chosen precision.
+
+Input: JSON Lines, one {"text": "...", "label": "ai"|"human"} per line
+(label may also be 1/0 or true/false for AI/human).
+
+Usage:
+    python3 calibrate_triage.py labeled.jsonl --precision 0.95 --min-support 5
+"""
+
+import argparse
+import json
+import sys
+
+from heuristic_detector import evaluate_texts
+from triage import calibrate_band
+
+
+AI_LABELS = {'ai', 'ai-generated', '1', 'true', 'yes'}
+HUMAN_LABELS = {'human', 'human-written', '0', 'false', 'no'}
+
+
+def load_labeled(path: str):
+    """Read (texts, labels) from a JSON Lines file; labels are True for AI-generated texts."""
+    texts, labels = [], []
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            label = str(entry.get('label', '')).strip().lower()
+            if label not in AI_LABELS | HUMAN_LABELS:
+                raise ValueError(f"Line {number}: label must be 'ai' or 'human', got {entry.get('label')!r}")
+            texts.append(entry.get('text') or '')
+            labels.append(label in AI_LABELS)
+    return texts, labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help='JSON Lines file of labeled texts')
+    parser.add_argument('--precision', type=float, default=0.95, help='Precision to configure the band for')
+    parser.add_argument('--min-support', type=int, default=5, help='Fewest texts a threshold must settle')
+    args = parser.parse_args()
+
+    texts, labels = load_labeled(args.path)
+    results = evaluate_texts(texts)
+    scored = [(float(result['aiProbability']), label) for result, label in zip(results, labels) if 'error' not in result]
+    if not scored:
+        print('No scorable texts (each needs at least 10 words)', file=sys.stderr)
+        return 1
+    scores, scored_labels = zip(*scored)
+    print(f"{len(scored)} of {len(texts)} texts scored ({sum(scored_labels)} AI, {len(scored) - sum(scored_labels)} human)\n")
+
+    columns = ['precision', 'human_below', 'ai_above', 'settled', 'accuracy', 'escalated']
+    print(' | '.join(f'{column:>11}' for column in columns))
+    for precision in sorted({0.8, 0.9, 0.95, 0.99, args.precision}):
+        calibration = calibrate_band(scores, scored_labels, precision, args.min_support)
+        accuracy = calibration['accuracy']
+        row = [precision, calibration['band'].human_below, calibration['band'].ai_above,
+               f"{calibration['settled']:.1%}", '-' if accuracy is None else f'{accuracy:.1%}', calibration['escalated']]
+        print(' | '.join(f'{str(value):>11}' for value in row))
+
+    band = calibrate_band(scores, scored_labels, args.precision, args.min_support)['band']
+    print(f"\nFor precision {args.precision}:\nTRIAGE_HUMAN_BELOW={band.human_below:g}\nTRIAGE_AI_ABOVE={band.ai_above:g}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Chunking for long documents: split a text into chunks that each run as their
+own COT, then merge the per-chunk results (an aggregated report for GO, the
+humanized chunks stitched back in order for GO2).
+"""
+
+import hashlib
+import re
+from typing import List, NamedTuple, Optional
+
+from report_format import REPORT_RULE
+
+
+# Rough size of a token for English prose, used to turn a token budget into characters
+CHARS_PER_TOKEN = 4
+
+# Split modes, coarsest first. A unit too large for the budget is split at the next finer level.
+CHUNK_MODES = ('paragraph', 'sentence', 'tokens')
+
+# Content-defined chunking (split_content_defined): stable chunk boundaries for incremental re-analysis
+CONTENT_DEFINED = 'content'
+
+_BOUNDARY_RES = {
+    'paragraph': re.compile(r'\s*\n\s*\n\s*'),
+    'sentence': re.compile(r'(?<=[.!?])["\')\]]*\s+'),
+    'tokens': re.compile(r'\s+'),
+}
+
+_VERDICT_RE = re.compile(r'VERDICT\s*[:\-]\s*\**\s*([^\n*]+)', re.IGNORECASE)
+
+
+class Chunk(NamedTuple):
+    """One chunk of a document and the separator that followed it in the original text."""
+    text: str
+    separator: str  # '\n\n' (paragraph break), '\n' (line break), ' ' or '' (last chunk / hard cut)
+
+
+def split_text(text: str, by: str = 'paragraph', max_tokens: int = 1000) -> List[Chunk]:
+    """
+    Split text into chunks of at most max_tokens (approximately). Whole units are
+    packed into each chunk; a cut is made at the coarsest boundary available:
+    paragraphs, then sentences, then words.
+
+    Args:
+        text: Text to split
+        by: Coarsest boundary to cut at: 'paragraph', 'sentence' or 'tokens'
+        max_tokens: Token budget per chunk (CHARS_PER_TOKEN characters per token)
+
+    Returns:
+        Non-empty chunks in document order
+    """
+    if by not in CHUNK_MODES:
+        raise ValueError(f"Unknown chunk mode {by!r}. Expected one of: {', '.join(CHUNK_MODES)}")
+    boundaries = [_BOUNDARY_RES[mode] for mode in CHUNK_MODES[CHUNK_MODES.index(by):]]
+    max_chars = max(1, max_tokens * CHARS_PER_TOKEN)
+
+    chunks: List[Chunk] = []
+    start = len(text) - len(text.lstrip())
+    end_of_text = len(text.rstrip())
+    while start < end_of_text:
+        cut = _find_cut(text, start, end_of_text, max_chars, boundaries)
+        if cut is None:
+            chunks.append(Chunk(text[start:end_of_text], ''))
+            break
+        cut_start, cut_end = cut
+        chunks.append(Chunk(text[start:cut_start], _separator(text[cut_start:cut_end])))
+        start = cut_end
+    return chunks
+
+
+def _find_cut(text: str, start: int, end: int, max_chars: int, boundaries):
+    """
+    Find where the chunk starting at start ends: the last boundary of the coarsest
+    level within max_chars, so units are packed up to the budget.
+    Returns (cut_start, cut_end), or None if the rest of the text fits.
+    """
+    if end - start <= max_chars:
+        return None
+    window_end = start + max_chars + 1
+    for boundary in boundaries:
+        last = None
+        for match in boundary.finditer(text, start, window_end):
+            if match.start() > start:
+                last = match
+        if last is not None:
+            return last.start(), last.end()
+    # No boundary at all within the budget (e.g. one enormous word): hard cut
+    return start + max_chars, start + max_chars
+
+
+def split_content_defined(text: str, max_tokens: int = 1000, boundary_every: int = 3) -> List[Chunk]:
+    """
+    Split text into content-defined chunks for incremental re-analysis. Paragraphs (cut at
+    sentences, then words, when over the budget) are grouped, and a chunk ends after a
+    paragraph whose content hash is divisible by boundary_every, or when the next one would
+    exceed the budget. Boundaries depend only on nearby content, so editing a paragraph
+    changes the chunk around it while the other chunks (and their cached results) stay the same.
+
+    Args:
+        text: Text to split
+        max_tokens: Token budget per chunk (CHARS_PER_TOKEN characters per token)
+        boundary_every: Average number of paragraphs per chunk
+
+    Returns:
+        Non-empty chunks in document order
+    """
+    max_chars = max(1, max_tokens * CHARS_PER_TOKEN)
+    chunks: List[Chunk] = []
+    group: List[Chunk] = []
+    size = 0
+
+    def close_group():
+        nonlocal group, size
+        if group:
+            joined = ''.join(unit.text + unit.separator for unit in group[:-1]) + group[-1].text
+            chunks.append(Chunk(joined, group[-1].separator))
+        group, size = [], 0
+
+    for unit in _paragraph_units(text, max_tokens):
+        if group and size + len(group[-1].separator) + len(unit.text) > max_chars:
+            close_group()
+        size += (len(group[-1].separator) if group else 0) + len(unit.text)
+        group.append(unit)
+        if content_hash(' '.join(unit.text.split()), 8) % max(1, boundary_every) == 0:
+            close_group()
+    close_group()
+    return chunks
+
+
+def _paragraph_units(text: str, max_tokens: int) -> List[Chunk]:
+    """Paragraphs of text, each split further (split_text by sentence) if it is over the budget."""
+    units: List[Chunk] = []
+    start = 0
+    for gap in list(_BOUNDARY_RES['paragraph'].finditer(text)) + [None]:
+        end = gap.start() if gap else len(text)
+        separator = _separator(gap.group()) if gap else ''
+        pieces = split_text(text[start:end], 'sentence', max_tokens)
+        if pieces:
+            units.extend(pieces[:-1])
+            units.append(Chunk(pieces[-1].text, separator))
+        if gap:
+            start = gap.end()
+    return units
+
+
+def content_hash(text: str, size: int = 16) -> int:
+    """Stable hash of text as an integer of size bytes (chunk identity and content-defined boundaries)."""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=size).digest(), 'big')
+
+
+def chunk_hash(text: str) -> str:
+    """Identity of a (sanitized) chunk, used to diff a resubmission against the previous analysis."""
+    return f'{content_hash(text):032x}'
+
+
+def _separator(gap: str) -> str:
+    if gap.count('\n') >= 2:
+        return '\n\n'
+    if '\n' in gap:
+        return '\n'
+    return ' ' if gap else ''
+
+
+def stitch_chunks(results: List[str], separators: List[str]) -> str:
+    """
+    Join per-chunk outputs (e.g. humanized text) in order, with the separators that
+    followed each chunk in the original text ('\n\n' where a separator is missing).
+    """
+    parts = []
+    for index, result in enumerate(results):
+        parts.append(result.strip())
+        if index < len(results) - 1:
+            parts.append((separators[index] if index < len(separators) else '') or '\n\n')
+    return ''.join(parts)
+
+
+def extract_verdict(result: str) -> Optional[str]:
+    """The verdict line of an ai-detector report ('VERDICT: ...'), if it has one."""
+    match = _VERDICT_RE.search(result or '')
+    return match.group(1).strip() if match else None
+
+
+def merge_verdicts(entries: List[dict]) -> str:
+    """
+    Merge per-chunk ai-detector reports into one aggregated report
+    (same layout as formatAggregatedResults in ai_checker.js).
+
+    Args:
+        entries: One dict per chunk in order: {'preview': <chunk text>, 'result': <report>}
+            or {'preview': ..., 'error': <message>} for chunks that failed. 'cached': True
+            marks a result reused from the cache or an earlier analysis instead of a fresh run.
+
+    Returns:
+        The aggregated report
+    """
+    total = len(entries)
+    output = f"{REPORT_RULE}\n\nAI DETECTION ANALYSIS\n(Chunked Analysis - {total} chunk(s))\n\n{REPORT_RULE}\n\n"
+    if not entries:
+        return output + 'No results available.\n'
+
+    # Once any result is reused, every analyzed chunk says whether it is fresh or reused
+    cached = sum(1 for entry in entries if entry.get('cached') and not entry.get('error'))
+    verdicts = {}
+    for number, entry in enumerate(entries, start=1):
+        preview = entry.get('preview') or ''
+        source = ''
+        if cached and not entry.get('error'):
+            source = ' (from cache)' if entry.get('cached') else ' (fresh)'
+        output += f"\n[Chunk {number}/{total}]{source}\n"
+        output += f"\"{preview[:100]}{'...' if len(preview) > 100 else ''}\"\n\n"
+        if entry.get('error'):
+            output += f"⚠️ Error: {entry['error']}\n\n"
+        else:
+            output += f"{entry.get('result', '')}\n\n"
+            verdict = extract_verdict(entry.get('result', ''))
+            if verdict:
+                verdicts[verdict] = verdicts.get(verdict, 0) + 1
+        output += f"{REPORT_RULE}\n\n"
+
+    failed = sum(1 for entry in entries if entry.get('error'))
+    output += '\nSUMMARY\n'
+    output += f"Total Chunks: {total}\n"
+    output += f"Successfully Analyzed: {total - failed}\n"
+    if cached:
+        output += f"Fresh: {total - failed - cached}\nFrom cache: {cached}\n"
+    if failed:
+        output += f"Failed: {failed}\n"
+    if verdicts:
+        output += 'Verdicts: ' + ', '.join(f"{verdict} ({count})" for verdict, count in verdicts.items()) + '\n'
+    return output
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Learned COT completion times.
+Records how long COT runs actually take per COT slug and text-length bucket,
+and uses the observed distribution to schedule completion polls (sparse
+early, dense around the expected finish, backing off after it) and to give
+jobs an ETA.
+"""
+
+import json
+import os
+import tempfile
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+
+# Upper bounds (characters) of the text-length buckets; longer texts fall in the last bucket
+LENGTH_BUCKETS = (500, 2000, 8000, 32000)
+
+# Pseudo-bucket holding every run of a slug, used while a bucket has too few samples
+ALL_LENGTHS = '*'
+
+
+def length_bucket(text_length: int) -> str:
+    """Label of the text-length bucket for a text of text_length characters."""
+    lower = 0
+    for upper in LENGTH_BUCKETS:
+        if text_length < upper:
+            return f'{lower}-{upper}'
+        lower = upper
+    return f'{lower}+'
+
+
+def _quantile(ordered: List[float], q: float) -> float:
+    """Linear-interpolated quantile of an ascending, non-empty list."""
+    position = (len(ordered) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+class CompletionModel:
+    """
+    Recent completion durations per (slug, length bucket), with quantile estimates.
+
+    Estimates fall back from the bucket to all lengths of the slug to a fixed
+    prior while fewer than min_samples runs have been seen. The prior starts
+    dense polling immediately, so scheduling only gets sparser once real
+    history exists.
+    """
+
+    def __init__(
+        self,
+        window: int = 200,
+        min_samples: int = 5,
+        default_seconds: float = 600,
+        path: Optional[str] = None
+    ):
+        """
+        Initialize the model.
+
+        Args:
+            window: Most recent durations kept per bucket
+            min_samples: Samples a bucket needs before its own distribution is used
+            default_seconds: Expected duration assumed before any history exists
+            path: JSON file the samples are loaded from and saved to (None = memory only)
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.default_seconds = default_seconds
+        self.path = path
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+        # (slug, bucket) -> (p10, p50, p90), dropped when the bucket gets a new sample
+        self._quantiles: Dict[Tuple[str, str], Tuple[float, float, float]] = {}
+        self._load()
+
+    def record(self, slug: str, text_length: int, seconds: float):
+        """Record the duration of a completed COT run."""
+        if seconds <= 0:
+            return
+        with self._lock:
+            for key in ((slug, length_bucket(text_length)), (slug, ALL_LENGTHS)):
+                samples = self._samples.get(key)
+                if samples is None:
+                    samples = self._samples[key] = deque(maxlen=self.window)
+                samples.append(round(seconds, 1))
+                self._quantiles.pop(key, None)
+        if self.path:
+            self._save()
+
+    def estimate(self, slug: str, text_length: int) -> Dict[str, Any]:
+        """
+        Expected duration of a run.
+
+        Returns:
+            {'p10', 'p50', 'p90'} in seconds, 'samples' behind them and 'basis'
+            ('bucket', 'slug' or 'default')
+        """
+        with self._lock:
+            for key, basis in (((slug, length_bucket(text_length)), 'bucket'), ((slug, ALL_LENGTHS), 'slug')):
+                samples = self._samples.get(key)
+                if samples is not None and len(samples) >= self.min_samples:
+                    p10, p50, p90 = self._quantiles_for(key)
+                    return {'p10': p10, 'p50': p50, 'p90': p90, 'samples': len(samples), 'basis': basis}
+        return {
+            'p10': 0.0,
+            'p50': self.default_seconds,
+            'p90': self.default_seconds * 1.5,
+            'samples': 0,
+            'basis': 'default'
+        }
+
+    def next_poll_delay(self, slug: str, text_length: int, elapsed: float,
+                        min_interval: float, max_interval: float) -> float:
+        """
+        Seconds until a run that has been going for elapsed seconds should be polled again.
+
+        Before the 10th percentile the delay halves the time left to it, around the
+        expected finish (p10-p90) it is min_interval, and past the 90th percentile it
+        grows with the overrun. The result is clamped to [min_interval, max_interval].
+        """
+        estimate = self.estimate(slug, text_length)
+        p10, p90 = estimate['p10'], estimate['p90']
+        if elapsed < p10:
+            delay = (p10 - elapsed) / 2
+        elif elapsed <= p90:
+            delay = min_interval
+        else:
+            delay = min_interval * (1 + (elapsed - p90) / max(p90 - p10, 1.0))
+        return max(min_interval, min(delay, max_interval))
+
+    def eta(self, slug: str, text_length: int, elapsed: float) -> Dict[str, Any]:
+        """
+        Remaining time of a run that has been going for elapsed seconds.
+
+        Returns:
+            {'seconds': remaining to the median (None once past p90), 'low'/'high':
+            remaining to p10/p90, 'overdue': past p90, 'samples', 'basis'}
+        """
+        estimate = self.estimate(slug, text_length)
+        overdue = elapsed > estimate['p90']
+        return {
+            'seconds': None if overdue else int(max(0.0, estimate['p50'] - elapsed)),
+            'low': int(max(0.0, estimate['p10'] - elapsed)),
+            'high': int(max(0.0, estimate['p90'] - elapsed)),
+            'overdue': overdue,
+            'samples': estimate['samples'],
+            'basis': estimate['basis'],
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Learned distributions per slug and length bucket (for metrics)."""
+        with self._lock:
+            distributions: Dict[str, Dict[str, Any]] = {}
+            for key in sorted(self._samples):
+                slug, bucket = key
+                samples = self._samples[key]
+                p10, p50, p90 = self._quantiles_for(key)
+                distributions.setdefault(slug, {})['all' if bucket == ALL_LENGTHS else bucket] = {
+                    'samples': len(samples),
+                    'p10': round(p10, 1),
+                    'p50': round(p50, 1),
+                    'p90': round(p90, 1),
+                    'min': min(samples),
+                    'max': max(samples),
+                    'used': len(samples) >= self.min_samples,
+                }
+        return {
+            'min_samples': self.min_samples,
+            'default_seconds': self.default_seconds,
+            'distributions': distributions,
+        }
+
+    def _quantiles_for(self, key: Tuple[str, str]) -> Tuple[float, float, float]:
+        """Quantiles of a non-empty bucket. Caller must hold the lock."""
+        cached = self._quantiles.get(key)
+        if cached is None:
+            ordered = sorted(self._samples[key])
+            cached = self._quantiles[key] = (_quantile(ordered, 0.1), _quantile(ordered, 0.5), _quantile(ordered, 0.9))
+        return cached
+
+    def _serialize(self) -> Dict[str, Any]:
+        """Caller must hold the lock."""
+        return {
+            'samples': [
+                {'slug': slug, 'bucket': bucket, 'seconds': list(samples)}
+                for (slug, bucket), samples in self._samples.items()
+            ]
+        }
+
+    def _load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Error loading COT completion times from {self.path}: {e}")
+            return
+        for entry in data.get('samples', []):
+            try:
+                key = (str(entry['slug']), str(entry['bucket']))
+                seconds = [float(value) for value in entry['seconds']]
+            except (KeyError, TypeError, ValueError):
+                continue
+            self._samples[key] = deque(seconds, maxlen=self.window)
+
+    def _save(self):
+        # Serialized so an older snapshot can never replace a newer one
+        with self._save_lock:
+            with self._lock:
+                data = self._serialize()
+            try:
+                # Write to a temp file and rename so a crash never leaves a partial file
+                directory = os.path.dirname(os.path.abspath(self.path))
+                fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Error saving COT completion times to {self.path}: {e}")
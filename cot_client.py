@@ -5,24 +5,128 @@ Handles calling COT prompts via REST API instead of MCP.
 """
 
 import os
+import io
 import json
+import mimetypes
+import threading
+import uuid
+from http.cookiejar import DefaultCookiePolicy
 import time
 import requests
 import polling2
-from typing import Dict, Optional, Any
+from requests.adapters import HTTPAdapter
+from typing import BinaryIO, Dict, List, Optional, Any, Tuple
 import traceback
 
 
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that counts requests sent and connections opened, to measure connection reuse."""
+    
+    def __init__(self, *args, **kwargs):
+        self._stats_lock = threading.Lock()
+        self.requests_sent = 0
+        self.connections_opened = 0
+        super().__init__(*args, **kwargs)
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        adapter = self
+        
+        def counting(pool_class):
+            class CountingPool(pool_class):
+                def _new_conn(self):
+                    with adapter._stats_lock:
+                        adapter.connections_opened += 1
+                    return super()._new_conn()
+            return CountingPool
+        
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: counting(pool_class)
+            for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items()
+        }
+    
+    def send(self, request, **kwargs):
+        with self._stats_lock:
+            self.requests_sent += 1
+        return super().send(request, **kwargs)
+
+
+class MultipartStream:
+    """
+    multipart/form-data body that reads its file part from a file object on demand.
+    
+    requests buffers the whole body when given files=; this body has a known length and
+    is read in blocks by the HTTP connection, so an upload of any size uses constant memory.
+    """
+    
+    def __init__(self, fields: List[Tuple[str, str]], file_field: str, file_name: str, file_obj: BinaryIO,
+                 content_type: Optional[str] = None):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={self.boundary}'
+        file_type = content_type or mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+        head = b''.join(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode('utf-8')
+            for name, value in fields
+        )
+        head += (f'--{self.boundary}\r\nContent-Disposition: form-data; name="{file_field}"; '
+                 f'filename="{file_name.replace(chr(34), "%22")}"\r\n'
+                 f'Content-Type: {file_type}\r\n\r\n').encode('utf-8')
+        tail = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+        
+        start = file_obj.tell()
+        file_obj.seek(0, os.SEEK_END)
+        file_size = file_obj.tell() - start
+        file_obj.seek(start)
+        self._parts = [io.BytesIO(head), file_obj, io.BytesIO(tail)]
+        self._length = len(head) + file_size + len(tail)
+        self._position = 0
+    
+    def __len__(self) -> int:
+        return self._length
+    
+    def tell(self) -> int:
+        # requests sizes the body as len() - tell(); without it the upload would be sent chunked
+        return self._position
+    
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            return b''.join(iter(lambda: self.read(64 * 1024), b''))
+        while self._parts:
+            data = self._parts[0].read(size)
+            if data:
+                self._position += len(data)
+                return data
+            self._parts.pop(0)
+        return b''
+    
+    def __iter__(self):
+        return iter(lambda: self.read(64 * 1024), b'')
+
+
 class FinChatCOTClient:
-    """Client for calling FinChat COT prompts via REST API."""
+    """
+    Client for calling FinChat COT prompts via REST API.
+    
+    Requests go through one requests.Session with a pooled keep-alive adapter,
+    so a single instance can be shared by all threads of the process and
+    reuses its connections to FinChat instead of reconnecting per call.
+    """
     
-    def __init__(self, base_url: Optional[str] = None, api_token: Optional[str] = None):
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_token: Optional[str] = None,
+        pool_connections: int = 4,
+        pool_maxsize: int = 32
+    ):
         """
         Initialize the COT client.
         
         Args:
             base_url: FinChat API base URL (defaults to FINCHAT_BASE_URL env var)
             api_token: API bearer token (optional, defaults to FINCHAT_API_TOKEN env var if set)
+            pool_connections: Number of hosts to keep connection pools for
+            pool_maxsize: Connections kept open per host (should cover the threads calling the client)
         """
         self.base_url = base_url or os.getenv('FINCHAT_BASE_URL', '').rstrip('/')
         self.api_token = api_token or os.getenv('FINCHAT_API_TOKEN', '')
@@ -36,6 +140,38 @@ class FinChatCOTClient:
         }
         if self.api_token:
             self.headers['Authorization'] = f'Bearer {self.api_token}'
+        
+        # Shared keep-alive connection pool. Headers are passed per request and cookies are
+        # not kept, so the session carries no state from one call (or job) to the next.
+        self.pool_maxsize = pool_maxsize
+        self.adapter = PooledHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session = requests.Session()
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+    
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get connection reuse counters.
+        
+        Returns:
+            Dictionary with 'requests', 'connections_opened', 'connections_reused' and 'reuse_rate'
+        """
+        with self.adapter._stats_lock:
+            sent = self.adapter.requests_sent
+            opened = self.adapter.connections_opened
+        reused = max(0, sent - opened)
+        return {
+            'requests': sent,
+            'connections_opened': opened,
+            'connections_reused': reused,
+            'reuse_rate': round(reused / sent, 4) if sent else 0.0,
+            'pool_maxsize': self.pool_maxsize,
+        }
     
     def create_session(self, client_id: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -58,7 +194,7 @@ class FinChatCOTClient:
             'client_id': client_id
         }
         
-        response = requests.post(url, json=payload, headers=self.headers, timeout=30)
+        response = self.session.post(url, json=payload, headers=self.headers, timeout=30)
         response.raise_for_status()
         return response.json()
     
@@ -69,18 +205,22 @@ class FinChatCOTClient:
         file_content: Optional[bytes] = None,
         file_name: Optional[str] = None,
         consomme_id: Optional[str] = None,
-        custom_properties: Optional[Dict[str, Any]] = None
+        custom_properties: Optional[Dict[str, Any]] = None,
+        file_obj: Optional[BinaryIO] = None
     ) -> Dict[str, Any]:
         """
         Upload a document to Consomme and attach it to a FinChat session.
         
+        Files are streamed from disk (or from file_obj) in blocks, never read whole.
+        
         Args:
             session_id: Session UID to attach document to
             file_path: Path to PDF file to upload (mutually exclusive with file_content)
             file_content: File content as bytes (mutually exclusive with file_path)
-            file_name: Name of the file (required if using file_content)
+            file_name: Name of the file (required if using file_content or file_obj)
             consomme_id: Existing Consomme document ID (if not uploading new file)
             custom_properties: Optional dict with 'title' and/or 'file_url'
+            file_obj: Binary file object to stream from its current position
             
         Returns:
             Document object with 'id', 'title', 'file_url', 'consomme_id'
@@ -92,45 +232,26 @@ class FinChatCOTClient:
             'session': session_id
         }
         
-        files = None
-        
         if file_path:
             # Upload from file path
             with open(file_path, 'rb') as f:
-                files = {
-                    'files': (os.path.basename(file_path), f, 'application/pdf')
-                }
-                if custom_properties:
-                    data['custom_properties'] = json.dumps([custom_properties])
-                
-                # Use different headers for multipart/form-data
-                headers = {}
-                if self.api_token:
-                    headers['Authorization'] = f'Bearer {self.api_token}'
-                
-                response = requests.post(url, files=files, data=data, headers=headers, timeout=60)
+                response = self._post_document(url, data, file_name or os.path.basename(file_path), f,
+                                               custom_properties)
+        elif file_obj is not None and file_name:
+            response = self._post_document(url, data, file_name, file_obj, custom_properties)
         elif file_content and file_name:
             # Upload from file content
-            files = {
-                'files': (file_name, file_content, 'application/pdf')
-            }
-            if custom_properties:
-                data['custom_properties'] = json.dumps([custom_properties])
-            
-            headers = {}
-            if self.api_token:
-                headers['Authorization'] = f'Bearer {self.api_token}'
-            
-            response = requests.post(url, files=files, data=data, headers=headers, timeout=60)
+            response = self._post_document(url, data, file_name, io.BytesIO(file_content), custom_properties)
         elif consomme_id:
             # Use existing Consomme ID
             data['consomme_ids'] = [consomme_id]
             if custom_properties:
                 data['custom_properties'] = [custom_properties]
             
-            response = requests.post(url, json=data, headers=self.headers, timeout=60)
+            response = self.session.post(url, json=data, headers=self.headers, timeout=60)
         else:
-            raise ValueError("Either file_path, (file_content and file_name), or consomme_id must be provided")
+            raise ValueError("Either file_path, (file_content and file_name), (file_obj and file_name) "
+                             "or consomme_id must be provided")
         
         response.raise_for_status()
         result = response.json()
@@ -139,6 +260,22 @@ class FinChatCOTClient:
             return result[0]
         return result
     
+    def _post_document(self, url: str, data: Dict[str, str], file_name: str, file_obj: BinaryIO,
+                       custom_properties: Optional[Dict[str, Any]]) -> requests.Response:
+        """POST a document as a streamed multipart/form-data body."""
+        fields = list(data.items())
+        if custom_properties:
+            fields.append(('custom_properties', json.dumps([custom_properties])))
+        body = MultipartStream(fields, 'files', file_name, file_obj,
+                               content_type='application/pdf' if file_name.lower().endswith('.pdf') else None)
+        
+        # Use different headers for multipart/form-data
+        headers = {'Content-Type': body.content_type, 'Content-Length': str(len(body))}
+        if self.api_token:
+            headers['Authorization'] = f'Bearer {self.api_token}'
+        
+        return self.session.post(url, data=body, headers=headers, timeout=60)
+    
     def run_cot(self, session_id: str, cot_slug: str, parameters: Dict[str, str]) -> Dict[str, Any]:
         """
         Run a COT prompt.
@@ -164,7 +301,7 @@ class FinChatCOTClient:
             'message': cot_message
         }
         
-        response = requests.post(url, json=payload, headers=self.headers, timeout=30)
+        response = self.session.post(url, json=payload, headers=self.headers, timeout=30)
         response.raise_for_status()
         return response.json()
     
@@ -185,7 +322,7 @@ class FinChatCOTClient:
             'page_size': page_size
         }
         
-        response = requests.get(url, params=params, headers=self.headers, timeout=30)
+        response = self.session.get(url, params=params, headers=self.headers, timeout=30)
         response.raise_for_status()
         return response.json()
     
@@ -201,7 +338,7 @@ class FinChatCOTClient:
         """
         url = f"{self.base_url}/api/v1/results/{result_id}/"
         
-        response = requests.get(url, headers=self.headers, timeout=30)
+        response = self.session.get(url, headers=self.headers, timeout=30)
         response.raise_for_status()
         return response.json()
     
@@ -334,7 +471,9 @@ class FinChatCOTClient:
         session_id: str,
         timeout_seconds: int = 1200,
         interval_seconds: int = 5,
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[callable] = None,
+        expected_seconds: float = 600,
+        next_delay: Optional[callable] = None
     ) -> Dict[str, Any]:
         """
         Poll for COT v2 completion using the correct v2 results endpoint.
@@ -343,8 +482,12 @@ class FinChatCOTClient:
         Args:
             session_id: New session ID from v2 response
             timeout_seconds: Maximum time to wait in seconds (default 1200 = 20 minutes)
-            interval_seconds: Seconds between polling attempts (default 5)
+            interval_seconds: Seconds between polling attempts (default 5), unless next_delay is given
             progress_callback: Optional callback(progress, status) for progress updates
+            expected_seconds: Expected run time used for the progress estimate
+                (e.g. CompletionModel.estimate()['p50']; default 600 = 10 minutes)
+            next_delay: Optional callable returning the seconds until the next poll
+                (e.g. from CompletionModel.next_poll_delay), called after each poll
             
         Returns:
             Dictionary with 'content' from results
@@ -364,7 +507,7 @@ class FinChatCOTClient:
             nonlocal attempt_count
             attempt_count += 1
             
-            response = requests.get(url, headers=self.headers, timeout=30)
+            response = self.session.get(url, headers=self.headers, timeout=30)
             response.raise_for_status()
             data = response.json()
             
@@ -372,8 +515,8 @@ class FinChatCOTClient:
             
             # Calculate estimated progress based on time elapsed
             elapsed = time.time() - start_time
-            # Assume most COTs take 8-12 minutes, show progress accordingly
-            estimated_progress = min(int((elapsed / 600) * 90), 90)  # Max 90% until actually complete
+            # Show progress against the expected run time
+            estimated_progress = min(int((elapsed / max(expected_seconds, 1)) * 90), 90)  # Max 90% until actually complete
             
             if progress_callback:
                 # Transform status message for better UX with progress
@@ -414,6 +557,7 @@ class FinChatCOTClient:
                 target=fetch_results,
                 check_success=check_success,
                 step=interval_seconds,
+                step_function=(lambda step: next_delay()) if next_delay else polling2.step_constant,
                 timeout=timeout_seconds,
             )
             
@@ -440,12 +584,21 @@ class FinChatCOTClient:
         additional_params: Optional[Dict[str, str]] = None,
         progress_callback: Optional[callable] = None,
         timeout_seconds: int = 1200,
-        interval_seconds: int = 5
+        interval_seconds: int = 5,
+        expected_seconds: Optional[float] = None,
+        completion_model: Optional[Any] = None,
+        cot_slug: Optional[str] = None,
+        max_interval_seconds: float = 30
     ) -> Dict[str, Any]:
         """
         Run a COT prompt using API v2 with pre-existing session.
         Uses the correct v2 polling endpoint with polling2 library.
         
+        With a completion_model (a CompletionModel) and cot_slug, the progress estimate
+        uses the learned median run time for the text's length, polls follow the model's
+        schedule between interval_seconds and max_interval_seconds, and the run's duration
+        is recorded back into the model.
+        
         Args:
             session_id: Pre-existing COT ID (e.g., '69055d25658abfb8d334cfd6')
             text: Text to process
@@ -454,6 +607,11 @@ class FinChatCOTClient:
             progress_callback: Optional callback(progress, status) for progress updates
             timeout_seconds: Maximum time to wait in seconds (default 1200 = 20 minutes)
             interval_seconds: Seconds between polling attempts (default 5 seconds)
+            expected_seconds: Expected run time used for the progress estimate
+                (default: the completion model's p50, or 600 without a model)
+            completion_model: Optional CompletionModel with learned run times
+            cot_slug: Name the run times are learned under (required with completion_model)
+            max_interval_seconds: Longest delay between polls on the model's schedule (default 30)
             
         Returns:
             Dictionary with 'content', 'session_id'
@@ -477,7 +635,7 @@ class FinChatCOTClient:
             progress_callback(5, 'Starting COT execution...')
         
         # Add timeout to the initial POST request
-        response = requests.post(url, json=payload, headers=self.headers, timeout=60)
+        response = self.session.post(url, json=payload, headers=self.headers, timeout=60)
         response.raise_for_status()
         cot_response = response.json()
         
@@ -490,13 +648,25 @@ class FinChatCOTClient:
         if progress_callback:
             progress_callback(10, 'COT started, polling for results...')
         
+        started_at = time.time()
+        next_delay = None
+        if completion_model is not None and cot_slug:
+            if expected_seconds is None:
+                expected_seconds = completion_model.estimate(cot_slug, len(text))['p50']
+            next_delay = lambda: completion_model.next_poll_delay(
+                cot_slug, len(text), time.time() - started_at, interval_seconds, max_interval_seconds)
+        
         # Step 2: Poll using the correct v2 results endpoint
         result = self.poll_for_completion_v2(
             new_session_id,
             timeout_seconds=timeout_seconds,
             interval_seconds=interval_seconds,
-            progress_callback=progress_callback
+            progress_callback=progress_callback,
+            expected_seconds=expected_seconds if expected_seconds is not None else 600,
+            next_delay=next_delay
         )
+        if next_delay is not None:
+            completion_model.record(cot_slug, len(text), time.time() - started_at)
         
         # Results are directly in the response
         return {
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Shared poller for in-flight COT chats.
+One poller owns every outstanding (session_id, cot_chat_id) pair instead of
+each job running its own poll loop. Polls are scheduled on a timer wheel,
+grouped by session (one chat listing answers every chat watched in it, when
+a caller runs several COTs in one session), capped by an upstream request
+rate, and back off while nothing changes.
+"""
+
+import math
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class _TimerWheel:
+    """
+    Hashed timing wheel of keys. schedule() is O(1); advance() visits only the
+    slots of elapsed ticks. Entries further out than one rotation stay in their
+    slot until their tick comes round.
+    """
+
+    def __init__(self, tick_seconds: float, size: int):
+        self.tick_seconds = tick_seconds
+        self._slots: List[List[Tuple[int, str]]] = [[] for _ in range(size)]
+        self._started = time.monotonic()
+        self._current = 0  # Last tick processed
+
+    def now_tick(self) -> int:
+        return int((time.monotonic() - self._started) / self.tick_seconds)
+
+    def schedule(self, key: str, delay: float) -> int:
+        """Schedule key to fire after delay seconds. Returns the tick it fires at."""
+        tick = max(self.now_tick(), self._current + 1) + max(0, math.ceil(delay / self.tick_seconds))
+        self._slots[tick % len(self._slots)].append((tick, key))
+        return tick
+
+    def advance(self) -> List[Tuple[int, str]]:
+        """Collect (tick, key) entries due up to now."""
+        target = self.now_tick()
+        due = []
+        # Never loop more than one full rotation, however long the caller slept
+        start = max(self._current + 1, target - len(self._slots) + 1)
+        for tick in range(start, target + 1):
+            slot = self._slots[tick % len(self._slots)]
+            if not slot:
+                continue
+            keep = []
+            for entry in slot:
+                (due if entry[0] <= target else keep).append(entry)
+            slot[:] = keep
+        self._current = max(self._current, target)
+        return due
+
+
+class _Watch:
+    """One COT chat waiting for its response."""
+
+    __slots__ = ('cot_chat_id', 'future', 'progress_callback', 'next_delay', 'deadline', 'last_state')
+
+    def __init__(self, cot_chat_id: str, progress_callback: Optional[Callable[[int, str], None]],
+                 next_delay: Optional[Callable[[], float]], deadline: float):
+        self.cot_chat_id = cot_chat_id
+        self.future: Future = Future()
+        self.progress_callback = progress_callback
+        self.next_delay = next_delay
+        self.deadline = deadline
+        self.last_state: Optional[Tuple[int, str]] = None
+
+
+class _Session:
+    """Chats watched in one FinChat session and the session's poll schedule."""
+
+    __slots__ = ('session_id', 'watches', 'interval', 'due_tick', 'in_flight', 'errors')
+
+    def __init__(self, session_id: str, interval: float):
+        self.session_id = session_id
+        self.watches: Dict[str, _Watch] = {}
+        self.interval = interval
+        self.due_tick: Optional[int] = None
+        self.in_flight = False
+        self.errors = 0
+
+
+class ChatPoller:
+    """
+    Polls FinChat for the responses of watched COT chats and dispatches
+    progress and completion to the waiting jobs.
+
+    watch() returns a Future resolved with the same dict as
+    FinChatCOTClient.poll_for_completion ('response_chat_id', 'result_id',
+    'metadata'), or failed with RuntimeError / TimeoutError. A watch may
+    bring its own next_delay schedule; a session is polled at the earliest
+    delay any of its watches asks for. While its chats are not changing, a
+    watch asking for more than interval_seconds waits at least the session's
+    backed-off interval; one asking for interval_seconds (its schedule says the
+    chat is due) is still polled that often.
+    """
+
+    def __init__(
+        self,
+        fetch_chats: Callable[[str], Dict[str, Any]],
+        interval_seconds: float = 5.0,
+        max_interval_seconds: float = 30.0,
+        backoff: float = 1.5,
+        max_requests_per_second: float = 10.0,
+        max_concurrent_requests: int = 4,
+        max_errors: int = 5,
+        tick_seconds: float = 0.25,
+        wheel_size: int = 512,
+        name: str = 'cot-poller'
+    ):
+        """
+        Initialize the poller.
+
+        Args:
+            fetch_chats: Callable(session_id) returning the session's chat listing ({'results': [...]})
+            interval_seconds: Delay between polls of a session while its chats are changing
+            max_interval_seconds: Upper bound on the delay while nothing changes
+            backoff: Factor applied to a session's delay after a poll that saw no change
+            max_requests_per_second: Cap on upstream chat listings across all sessions
+            max_concurrent_requests: Chat listings in flight at once
+            max_errors: Consecutive failed listings of a session before its watches fail
+            tick_seconds: Resolution of the timer wheel
+            wheel_size: Number of timer wheel slots
+            name: Name used for threads and log messages
+        """
+        self.fetch_chats = fetch_chats
+        self.interval_seconds = interval_seconds
+        self.max_interval_seconds = max(interval_seconds, max_interval_seconds)
+        self.backoff = backoff
+        self.max_requests_per_second = max_requests_per_second
+        self.max_errors = max_errors
+        self.name = name
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._wheel = _TimerWheel(tick_seconds, wheel_size)
+        self._sessions: Dict[str, _Session] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_requests, thread_name_prefix=f'{name}-fetch')
+        self._max_concurrent = max_concurrent_requests
+        self._fetching = 0
+        self._tokens = max(1.0, max_requests_per_second)
+        self._refilled_at = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+        self._shutdown = False
+        self._requests = 0
+        self._deferred = 0
+        self._completed = 0
+        self._failed = 0
+
+    def start(self):
+        """Start the scheduler thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None or self._shutdown:
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def shutdown(self):
+        """Stop polling. Outstanding watches are left unresolved."""
+        with self._lock:
+            self._shutdown = True
+        self._wake.set()
+        self._executor.shutdown(wait=False)
+
+    def watch(
+        self,
+        session_id: str,
+        cot_chat_id: str,
+        progress_callback: Optional[Callable[[int, str], None]] = None,
+        timeout_seconds: float = 1000,
+        next_delay: Optional[Callable[[], float]] = None
+    ) -> Future:
+        """
+        Start tracking a COT chat. The first poll of a new session happens on the next tick.
+
+        Args:
+            session_id: Session the COT was run in
+            cot_chat_id: COT chat ID from run_cot
+            progress_callback: Optional callback(progress, status), called when the chat's state changes
+            timeout_seconds: Fail the watch with TimeoutError after this long
+            next_delay: Optional callable returning the seconds until this chat should be polled
+                again (called after each poll); while nothing changes, the session's backoff sets
+                a floor under delays above interval_seconds, and applies alone without it
+
+        Returns:
+            Future resolved with {'response_chat_id', 'result_id', 'metadata'}
+        """
+        self.start()
+        watch = _Watch(cot_chat_id, progress_callback, next_delay, time.monotonic() + timeout_seconds)
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _Session(session_id, self.interval_seconds)
+            session.watches[cot_chat_id] = watch
+            # A new chat is news: poll the session soon even if it had backed off
+            session.interval = self.interval_seconds
+            if not session.in_flight:
+                session.due_tick = self._wheel.schedule(session_id, 0)
+        self._wake.set()
+        return watch.future
+
+    def wait(
+        self,
+        session_id: str,
+        cot_chat_id: str,
+        progress_callback: Optional[Callable[[int, str], None]] = None,
+        timeout_seconds: float = 1000,
+        next_delay: Optional[Callable[[], float]] = None
+    ) -> Dict[str, Any]:
+        """Blocking form of watch() for worker threads (same contract as poll_for_completion)."""
+        future = self.watch(session_id, cot_chat_id, progress_callback, timeout_seconds, next_delay)
+        try:
+            # The poller fails the watch at its deadline; the extra margin only covers a stalled poller
+            return future.result(timeout=timeout_seconds + self.max_interval_seconds + 30)
+        except (TimeoutError, FutureTimeoutError):
+            self._drop(session_id, cot_chat_id)
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Get watched chats and upstream request counters."""
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'watched_chats': sum(len(session.watches) for session in self._sessions.values()),
+                'upstream_requests': self._requests,
+                'requests_in_flight': self._fetching,
+                'deferred_by_rate_limit': self._deferred,
+                'completed': self._completed,
+                'failed': self._failed,
+                'max_requests_per_second': self.max_requests_per_second,
+            }
+
+    def _drop(self, session_id: str, cot_chat_id: str):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.watches.pop(cot_chat_id, None)
+                if not session.watches and not session.in_flight:
+                    del self._sessions[session_id]
+
+    def _run(self):
+        while True:
+            self._wake.wait(self._wheel.tick_seconds)
+            self._wake.clear()
+            with self._lock:
+                if self._shutdown:
+                    return
+                now = time.monotonic()
+                self._tokens = min(max(1.0, self.max_requests_per_second),
+                                   self._tokens + (now - self._refilled_at) * self.max_requests_per_second)
+                self._refilled_at = now
+                starts = []
+                for tick, session_id in self._wheel.advance():
+                    session = self._sessions.get(session_id)
+                    # Skip entries superseded by a later schedule()
+                    if session is None or session.due_tick != tick or session.in_flight:
+                        continue
+                    if self._tokens < 1 or self._fetching >= self._max_concurrent:
+                        self._deferred += 1
+                        session.due_tick = self._wheel.schedule(session_id, 0)
+                        continue
+                    self._tokens -= 1
+                    self._fetching += 1
+                    self._requests += 1
+                    session.in_flight = True
+                    session.due_tick = None
+                    starts.append(session)
+            for session in starts:
+                try:
+                    self._executor.submit(self._poll, session)
+                except RuntimeError:
+                    # Executor shut down
+                    return
+
+    def _poll(self, session: _Session):
+        """Fetch one session's chats and resolve or update every chat watched in it."""
+        try:
+            chats = self.fetch_chats(session.session_id).get('results', [])
+            error = None
+        except Exception as e:
+            chats, error = [], e
+            print(f"Error polling session {session.session_id}: {e}")
+
+        events = []  # (callable, args) run outside the lock
+        with self._lock:
+            self._fetching -= 1
+            session.in_flight = False
+            changed = False
+            if error is not None:
+                session.errors += 1
+            else:
+                session.errors = 0
+            by_respond_to = {chat.get('respond_to'): chat for chat in chats}
+            now = time.monotonic()
+            for cot_chat_id, watch in list(session.watches.items()):
+                if watch.future.done():
+                    del session.watches[cot_chat_id]
+                    continue
+                if error is not None:
+                    if session.errors >= self.max_errors:
+                        events.append((watch.future.set_exception, (error,)))
+                        del session.watches[cot_chat_id]
+                        self._failed += 1
+                    continue
+                kind, value = self._inspect(watch, by_respond_to.get(cot_chat_id))
+                if kind in ('unchanged', 'progress'):
+                    if now >= watch.deadline:
+                        events.append((watch.future.set_exception, (TimeoutError(
+                            f"COT execution timed out waiting for chat {cot_chat_id}"),)))
+                        del session.watches[cot_chat_id]
+                        self._failed += 1
+                    elif kind == 'progress':
+                        changed = True
+                        if watch.progress_callback:
+                            events.append((watch.progress_callback, value))
+                    continue
+                del session.watches[cot_chat_id]
+                if kind == 'error':
+                    self._failed += 1
+                    events.append((watch.future.set_exception, (value,)))
+                else:
+                    self._completed += 1
+                    if watch.progress_callback:
+                        events.append((watch.progress_callback, (100, 'completed')))
+                    events.append((watch.future.set_result, (value,)))
+
+            if session.watches:
+                # Poll again soon while chats are moving, back off while they are not
+                if changed or error is not None:
+                    session.interval = self.interval_seconds
+                else:
+                    session.interval = min(session.interval * self.backoff, self.max_interval_seconds)
+                delays = []
+                for watch in session.watches.values():
+                    if not watch.next_delay:
+                        continue
+                    delay = self._watch_delay(watch)
+                    if not changed and error is None and delay > self.interval_seconds:
+                        # A silent chat that is not due yet backs off with its session
+                        delay = max(delay, session.interval)
+                    delays.append(delay)
+                if error is not None or len(delays) < len(session.watches):
+                    delays.append(session.interval)
+                delay = min(delays)
+                session.due_tick = self._wheel.schedule(session.session_id, delay)
+            elif self._sessions.get(session.session_id) is session:
+                del self._sessions[session.session_id]
+
+        for fn, args in events:
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Error dispatching {self.name} event: {e}")
+                traceback.print_exc()
+
+    def _watch_delay(self, watch: _Watch) -> float:
+        """Delay requested by a watch's own schedule, falling back to the base interval."""
+        try:
+            return max(0.0, float(watch.next_delay()))
+        except Exception as e:
+            print(f"Error in {self.name} poll schedule for chat {watch.cot_chat_id}: {e}")
+            return self.interval_seconds
+
+    @staticmethod
+    def _inspect(watch: _Watch, response_chat: Optional[Dict[str, Any]]):
+        """
+        Interpret the response chat of a watched COT chat.
+
+        Returns:
+            ('unchanged', None) if nothing changed since the last poll, ('progress', (progress, status)),
+            ('error', RuntimeError) or ('done', completion dict)
+        """
+        if response_chat is None:
+            state = (0, 'waiting')
+        elif response_chat.get('intent') == 'error':
+            error_msg = response_chat.get('message', 'COT execution failed')
+            return 'error', RuntimeError(f"COT execution failed: {error_msg}")
+        elif response_chat.get('result_id'):
+            return 'done', {
+                'response_chat_id': response_chat.get('id'),
+                'result_id': response_chat.get('result_id'),
+                'metadata': response_chat.get('metadata', {})
+            }
+        else:
+            metadata = response_chat.get('metadata') or {}
+            current_progress = metadata.get('current_progress', 0)
+            total_progress = metadata.get('total_progress', 100)
+            progress = int((current_progress / total_progress * 100)) if total_progress > 0 else 0
+            state = (progress, metadata.get('current_step', 'Processing...'))
+        if state == watch.last_state:
+            return 'unchanged', None
+        watch.last_state = state
+        return 'progress', state
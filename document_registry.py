@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Registry of documents already uploaded to Consomme.
+Maps a document's content hash to the consomme_id FinChat gave it, so a job
+attaching a document that was uploaded before (by any job, since the last
+restart or before it) attaches it by ID instead of uploading it again.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class DocumentRegistry:
+    """
+    content SHA-256 -> (consomme_id, size), persisted to a JSON file.
+
+    Entries expire after ttl_seconds, and only match a document of the same size.
+    The least recently used entries are dropped beyond max_entries. An ID that
+    FinChat no longer accepts is removed with invalidate().
+    """
+
+    def __init__(self, ttl_seconds: float = 7 * 86400, max_entries: int = 10000, path: Optional[str] = None):
+        """
+        Initialize the registry.
+
+        Args:
+            ttl_seconds: Seconds an uploaded document's ID is reused for
+            max_entries: Documents remembered at most
+            path: JSON file the registry is loaded from and saved to (None = memory only)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.path = path
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._invalidated = 0
+        self._bytes_saved = 0
+        self._load()
+
+    def lookup(self, sha256: str, size: int) -> Optional[str]:
+        """consomme_id of an earlier upload of this content, or None if it must be uploaded."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(sha256)
+            if entry is not None and now - entry['uploaded_at'] > self.ttl_seconds:
+                del self._entries[sha256]
+                self._expired += 1
+                entry = None
+            if entry is None or entry['size'] != size:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(sha256)
+            self._hits += 1
+            self._bytes_saved += size
+            return entry['consomme_id']
+
+    def remember(self, sha256: str, size: int, consomme_id: str, name: str = ''):
+        """Record the consomme_id of a freshly uploaded document."""
+        if not consomme_id:
+            return
+        with self._lock:
+            self._entries[sha256] = {'consomme_id': str(consomme_id), 'size': size, 'name': name,
+                                     'uploaded_at': time.time()}
+            self._entries.move_to_end(sha256)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        if self.path:
+            self._save()
+
+    def invalidate(self, sha256: str) -> bool:
+        """
+        Forget a document whose consomme_id (just returned by lookup) was rejected; that
+        lookup counts as a miss instead. Returns True if the document was known.
+        """
+        with self._lock:
+            entry = self._entries.pop(sha256, None)
+            if entry is not None:
+                self._invalidated += 1
+                self._hits -= 1
+                self._misses += 1
+                self._bytes_saved -= entry['size']
+        if entry is not None and self.path:
+            self._save()
+        return entry is not None
+
+    def stats(self) -> Dict[str, Any]:
+        """Get registry counters: attach-by-ID hits, uploads needed, and the resulting hit rate."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'hits': self._hits,
+                'misses': self._misses,
+                'expired': self._expired,
+                'invalidated': self._invalidated,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'bytes_saved': self._bytes_saved,
+                'ttl_seconds': self.ttl_seconds,
+            }
+
+    def _load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Error loading document registry from {self.path}: {e}")
+            return
+        now = time.time()
+        documents = sorted(data.get('documents', {}).items(), key=lambda item: item[1].get('uploaded_at', 0))
+        for sha256, entry in documents:
+            try:
+                entry = {'consomme_id': str(entry['consomme_id']), 'size': int(entry['size']),
+                         'name': str(entry.get('name', '')), 'uploaded_at': float(entry['uploaded_at'])}
+            except (KeyError, TypeError, ValueError):
+                continue
+            if entry['consomme_id'] and now - entry['uploaded_at'] <= self.ttl_seconds:
+                self._entries[sha256] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _save(self):
+        # Serialized so an older snapshot can never replace a newer one
+        with self._save_lock:
+            with self._lock:
+                data = {'documents': dict(self._entries)}
+            try:
+                # Write to a temp file and rename so a crash never leaves a partial file
+                directory = os.path.dirname(os.path.abspath(self.path))
+                fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Error saving document registry to {self.path}: {e}")
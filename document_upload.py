@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Documents uploaded with an analysis request, held until the job attaches them
+to its FinChat session.
+
+The upload is copied off the request in blocks into a temporary file that stays
+in memory only up to a size threshold, and is hashed on the way so identical
+documents share cached results. The job streams the file to FinChat from there,
+so memory per job does not grow with the document's size.
+"""
+
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Dict, Optional
+
+BLOCK_SIZE = 64 * 1024
+
+
+class UploadedDocument:
+    """A spooled upload: name, size and SHA-256, and the file while it is still held."""
+
+    def __init__(self, name: str, size: int, sha256: str, file: Optional[BinaryIO] = None):
+        self.name = name
+        self.size = size
+        self.sha256 = sha256
+        self.file = file  # None once closed, or for a document restored from the job store
+
+    def open(self) -> BinaryIO:
+        """
+        The held file, rewound for reading.
+
+        Raises:
+            RuntimeError: If the file is no longer held (e.g. it was lost in a server restart)
+        """
+        if self.file is None:
+            raise RuntimeError(f'Uploaded document {self.name!r} is no longer available; submit it again')
+        self.file.seek(0)
+        return self.file
+
+    def close(self):
+        """Release the held file (deletes its temporary file, if it was spooled to disk)."""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def to_dict(self) -> Dict:
+        """Description for the job store (the content itself is not persisted)."""
+        return {'name': self.name, 'size': self.size, 'sha256': self.sha256}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'UploadedDocument':
+        return cls(data.get('name', ''), data.get('size', 0), data.get('sha256', ''))
+
+
+def spool_upload(stream: BinaryIO, name: str, max_memory: int) -> UploadedDocument:
+    """
+    Copy an upload stream in blocks into a temporary file, hashing it on the way.
+
+    Args:
+        stream: Binary stream of the upload (e.g. werkzeug FileStorage.stream)
+        name: File name to upload it under
+        max_memory: Bytes held in memory before the copy rolls over to a file on disk
+
+    Returns:
+        UploadedDocument holding the copy
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    sha = hashlib.sha256()
+    size = 0
+    try:
+        for block in iter(lambda: stream.read(BLOCK_SIZE), b''):
+            sha.update(block)
+            spooled.write(block)
+            size += len(block)
+    except BaseException:
+        spooled.close()
+        raise
+    return UploadedDocument(os.path.basename(name or '') or 'document.pdf', size, sha.hexdigest(), spooled)
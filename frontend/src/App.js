@@ -10,6 +10,7 @@ function App() {
   const [elapsedTime, setElapsedTime] = useState(0);
   const [progressStatus, setProgressStatus] = useState('');
   const [progressPercent, setProgressPercent] = useState(0);
+  const [provisional, setProvisional] = useState(null); // Heuristic verdict shown while a GO analysis runs
   // eslint-disable-next-line no-unused-vars
   const [isBackendConnected, setIsBackendConnected] = useState(false);
   const [showWarning, setShowWarning] = useState(false);
@@ -201,6 +202,7 @@ function App() {
     setElapsedTime(0);
     setProgressStatus('');
     setProgressPercent(0);
+    setProvisional(null);
     setShowWarning(false);
     setShowSameTextWarning(false);
     setAnalysisType('GO');
@@ -269,6 +271,7 @@ function App() {
       setOutputText(''); // Clear output when starting new analysis
       setProgressStatus('Initializing...');
       setProgressPercent(0);
+      setProvisional(null);
       setAnalysisType('GO'); // Mark as GO analysis
       
       // Reset timer - will be set by useEffect when isProcessing becomes true
@@ -290,7 +293,7 @@ function App() {
       // Use polling mode
       // Pass abort check function so polling can be cancelled
       const analysisPromise = client.analyze('', paragraph, 'AI detection analysis', {
-        callback: (progress, status, statusMessage) => {
+        callback: (progress, status, statusMessage, provisionalVerdict) => {
           // Ignore progress updates if reset was clicked
           if (resetFlagRef.current || analysisAbortRef.current) {
             return;
@@ -298,6 +301,9 @@ function App() {
           // Progress callback for polling updates
           setProgressPercent(progress || 0);
           setProgressStatus(statusMessage || status || 'Processing...');
+          if (provisionalVerdict) {
+            setProvisional(provisionalVerdict);
+          }
         },
         shouldAbort: () => analysisAbortRef.current || resetFlagRef.current
       });
@@ -312,6 +318,8 @@ function App() {
       
       // Only set result if analysis wasn't aborted
       if (!analysisAbortRef.current) {
+        // The COT result replaces the provisional verdict
+        setProvisional(null);
         setOutputText(formatResult(result, 'GO'));
         setProgressStatus('Completed');
         setProgressPercent(100);
@@ -393,6 +401,7 @@ function App() {
     setOutputText('');
     setProgressStatus('Initializing GO2...');
     setProgressPercent(0);
+    setProvisional(null);
     setAnalysisType('GO2'); // Mark as GO2 analysis
     
     // Reset timer
@@ -643,6 +652,12 @@ function App() {
                 <div className="processing-spinner">⏳</div>
                 <div className="processing-text">
                   <div className="processing-status-message">{progressStatus}</div>
+                  {provisional && analysisType === 'GO' && (
+                    <div className="processing-provisional">
+                      Provisional (quick heuristic): <strong>{provisional.verdict}</strong>
+                      {' '}- {provisional.aiProbability}% AI probability. The full analysis is still running.
+                    </div>
+                  )}
                   {progressPercent > 0 && (
                     <div className="processing-progress-bar">
                       <div 
@@ -105,6 +105,11 @@ export class FinChatClient {
         throw new Error('No job ID received from server');
       }
 
+      // Served from the backend result cache - no need to wait
+      if (startData.status === 'completed' && startData.result) {
+        return startData.result;
+      }
+
       console.log(`Starting to poll for job ID: ${jobId}`);
       // Step 2: Poll for results
       // Extract shouldAbort from onProgress if it's an object, otherwise use null
@@ -116,7 +121,11 @@ export class FinChatClient {
         : (onProgress && typeof onProgress === 'object' && onProgress.callback) 
           ? onProgress.callback 
           : null;
-      return await this.pollForResult(jobId, progressCallback, abortCheck);
+      // Heuristic verdict computed at submission, shown until the COT result arrives
+      if (progressCallback && startData.provisional) {
+        progressCallback(0, startData.status, startData.message || '', startData.provisional);
+      }
+      return await this.waitForResult(jobId, progressCallback, abortCheck);
       
     } catch (error) {
       throw new Error(`Failed to analyze: ${error.message}`);
@@ -162,6 +171,11 @@ export class FinChatClient {
         throw new Error('No job ID received from server');
       }
 
+      // Served from the backend result cache - no need to wait
+      if (startData.status === 'completed' && startData.result) {
+        return startData.result;
+      }
+
       console.log(`Starting to poll for GO2 job ID: ${jobId}`);
       // Step 2: Poll for results (same polling logic as GO button)
       const abortCheck = onProgress && typeof onProgress === 'object' && onProgress.shouldAbort 
@@ -172,13 +186,81 @@ export class FinChatClient {
         : (onProgress && typeof onProgress === 'object' && onProgress.callback) 
           ? onProgress.callback 
           : null;
-      return await this.pollForResult(jobId, progressCallback, abortCheck);
+      return await this.waitForResult(jobId, progressCallback, abortCheck);
       
     } catch (error) {
       throw new Error(`Failed to analyze with GO2: ${error.message}`);
     }
   }
 
+  async waitForResult(jobId, onProgress = null, shouldAbort = null) {
+    // Prefer the Server-Sent Events stream; fall back to polling if it is unavailable
+    if (typeof EventSource !== 'undefined') {
+      try {
+        return await this.streamForResult(jobId, onProgress, shouldAbort);
+      } catch (error) {
+        if (!error.streamUnavailable) {
+          throw error;
+        }
+        console.warn(`Progress stream unavailable for job ${jobId}, falling back to polling:`, error.message);
+      }
+    }
+    return await this.pollForResult(jobId, onProgress, shouldAbort);
+  }
+
+  streamForResult(jobId, onProgress = null, shouldAbort = null) {
+    return new Promise((resolve, reject) => {
+      const source = new EventSource(`${this.backendUrl}/api/mcp/stream/${jobId}`);
+      let receivedEvent = false;
+
+      const finish = (callback, value) => {
+        clearInterval(abortTimer);
+        source.close();
+        callback(value);
+      };
+
+      // EventSource has no abort hook, so check the abort flag periodically
+      const abortTimer = setInterval(() => {
+        if (shouldAbort && shouldAbort()) {
+          console.log(`Stream aborted for job ${jobId}`);
+          finish(reject, new Error('Analysis cancelled - restart requested'));
+        }
+      }, 500);
+
+      source.addEventListener('progress', (event) => {
+        receivedEvent = true;
+        const status = JSON.parse(event.data);
+        if (onProgress) {
+          onProgress(status.progress || 0, status.status, status.status_message || '', status.provisional || null);
+        }
+      });
+
+      source.addEventListener('result', (event) => {
+        const status = JSON.parse(event.data);
+        console.log(`Job ${jobId} completed! Result length:`, status.result ? status.result.length : 0);
+        finish(resolve, status.result || 'Analysis completed');
+      });
+
+      source.addEventListener('error', (event) => {
+        // Server-sent 'error' event (job failed) carries data; connection errors do not
+        if (event.data) {
+          const status = JSON.parse(event.data);
+          console.error(`Job ${jobId} failed:`, status.error);
+          finish(reject, new Error(status.error || 'Analysis failed'));
+          return;
+        }
+        // A non-200 answer (404, or 503 when the server is at its stream limit) closes the
+        // EventSource for good instead of reconnecting, so fall back to polling then too
+        if (!receivedEvent || source.readyState === EventSource.CLOSED) {
+          const error = new Error('Could not open progress stream');
+          error.streamUnavailable = true;
+          finish(reject, error);
+        }
+        // Otherwise EventSource reconnects on its own, resuming with Last-Event-ID
+      });
+    });
+  }
+
   async pollForResult(jobId, onProgress = null, shouldAbort = null) {
     const pollInterval = 5000; // Poll every 5 seconds
     const maxAttempts = 200; // 200 * 5s = 1000s = ~16 minutes
@@ -303,7 +385,7 @@ export class FinChatClient {
 
         // Call progress callback if provided
         if (onProgress) {
-          onProgress(status.progress || 0, status.status, status.status_message || '');
+          onProgress(status.progress || 0, status.status, status.status_message || '', status.provisional || null);
         }
 
         // Status is 'processing', continue polling
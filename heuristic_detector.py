@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Server-side port of the browser's heuristic AI detector (evaluateText in ai_checker.js),
+for analysis without FinChat (fallback and bulk scoring).
+
+Features are extracted per text with the JS tokenization rules (JavaScript's \\s and
+\\w, UTF-16 string lengths); a whole batch is then scored at once with NumPy array
+operations. Results match evaluateText field for field, including toFixed formatting.
+"""
+
+import math
+import re
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from report_format import REPORT_RULE
+
+
+# JavaScript's \s (WhiteSpace and LineTerminator); Python's differs (e.g. \x1c-\x1f, \x85, \ufeff)
+_JS_SPACE = '\t\n\x0b\x0c\r \xa0\u1680' + ''.join(map(chr, range(0x2000, 0x200b))) + '\u2028\u2029\u202f\u205f\u3000\ufeff'
+_SPACE_RE = re.compile(f'[{_JS_SPACE}]+')
+_SENTENCE_END_RE = re.compile(r'[.!?]+')
+_NON_WORD_RE = re.compile(r'[^A-Za-z0-9_ ]')  # JavaScript's [^\w] (ASCII), keeping the spaces between words
+_PARAGRAPH_BREAK_RE = re.compile(r'\n\n+')
+_ASTRAL_RE = re.compile('[\U00010000-\U0010ffff]')
+
+TRANSITIONS = ('however', 'therefore', 'moreover', 'furthermore', 'nevertheless',
+               'consequently', 'additionally', 'similarly', 'conversely', 'indeed')
+# JavaScript /\btransition\b/gi: ASCII word boundaries and ASCII-only case folding
+_TRANSITION_RE = re.compile(r'\b(?:' + '|'.join(TRANSITIONS) + r')\b', re.IGNORECASE | re.ASCII)
+
+MIN_WORDS = 10
+
+EMPTY_TEXT_ERROR = 'Please enter some text to evaluate.'
+SHORT_TEXT_ERROR = 'Text is too short. Please provide at least 10 words for accurate evaluation.'
+
+
+def evaluate_text(text: str) -> Dict:
+    """
+    Score one text (same result as evaluateText in ai_checker.js).
+
+    Returns:
+        {'isAI', 'aiProbability', 'humanProbability', 'confidence', 'wordCount', 'sentenceCount',
+        'avgWordsPerSentence', 'metrics': {...}}, or {'error': <message>} for empty or short texts
+    """
+    return evaluate_texts([text])[0]
+
+
+def evaluate_texts(texts: Sequence[str]) -> List[Dict]:
+    """Score a batch of texts at once; one result per text, in order (see evaluate_text())."""
+    features = [_extract_features(text) for text in texts]
+    scored = [feature for feature in features if 'error' not in feature]
+    results = iter(_score(scored)) if scored else iter(())
+    return [feature if 'error' in feature else next(results) for feature in features]
+
+
+def _js_trim(text: str) -> str:
+    """String.prototype.trim (strips JavaScript's \\s)."""
+    return text.strip(_JS_SPACE)
+
+
+def _js_lengths(words: List[str], text: str) -> np.ndarray:
+    """Lengths of text's words in UTF-16 code units, like JavaScript's .length (characters beyond U+FFFF count twice)."""
+    if not text.isascii() and _ASTRAL_RE.search(text):
+        return np.fromiter((len(word.encode('utf-16-le')) // 2 for word in words), dtype=np.int64, count=len(words))
+    return np.fromiter(map(len, words), dtype=np.int64, count=len(words))
+
+
+def _extract_features(text: str) -> Dict:
+    """Counts and per-item lengths of one text; {'error': ...} if it cannot be scored."""
+    if not isinstance(text, str) or not _js_trim(text):
+        return {'error': EMPTY_TEXT_ERROR}
+    words = [word for word in _SPACE_RE.split(text) if word]
+    if len(words) < MIN_WORDS:
+        return {'error': SHORT_TEXT_ERROR}
+    sentences = [_js_trim(sentence) for sentence in _SENTENCE_END_RE.split(text)]
+    sentences = [sentence for sentence in sentences if sentence]
+    sentence_words = [len(_SPACE_RE.split(sentence)) for sentence in sentences]
+    return {
+        'word_count': len(words),
+        'sentence_count': len(sentences),
+        'sentence_lengths': sentence_words,
+        'word_lengths': _js_lengths(words, text),
+        # Words never contain spaces, so the normalized words can be built in one pass over the text
+        'unique_words': len(set(_NON_WORD_RE.sub('', ' '.join(words).lower()).split(' '))),
+        'transition_count': len(_TRANSITION_RE.findall(text)),
+        'punctuation_variety': text.count('!') + text.count('?'),
+        'paragraph_breaks': len(_PARAGRAPH_BREAK_RE.findall(text)),
+        'complex_sentences': sum(1 for sentence, count in zip(sentences, sentence_words)
+                                 if count > 20 or sentence.count(',') > 2),
+    }
+
+
+def _variances(rows: List[Sequence[int]]) -> np.ndarray:
+    """
+    Population variance of each row (calculateVariance; 0 for an empty row). Rows are
+    padded into one matrix; the squared differences are summed left to right (cumsum)
+    so the floating-point result is the same as the JS reduce.
+    """
+    lengths = np.array([len(row) for row in rows], dtype=np.int64)
+    matrix = np.zeros((len(rows), max(1, int(lengths.max()))))
+    mask = np.arange(matrix.shape[1]) < lengths[:, None]
+    matrix[mask] = np.concatenate([np.asarray(row, dtype=np.float64) for row in rows])
+    divisor = np.maximum(lengths, 1)
+    mean = matrix.sum(axis=1) / divisor  # Sums of integers are exact in any order
+    squared = np.where(mask, np.square(matrix - mean[:, None]), 0.0)
+    return np.where(lengths > 0, np.cumsum(squared, axis=1)[:, -1] / divisor, 0.0)
+
+
+def _score(features: List[Dict]) -> List[Dict]:
+    """Score extracted features with the evaluateText rules, all texts at once."""
+    def column(name):
+        return np.array([feature[name] for feature in features])
+
+    word_count = column('word_count')
+    sentence_count = column('sentence_count')
+    transition_count = column('transition_count')
+    punctuation_variety = column('punctuation_variety')
+    paragraph_breaks = column('paragraph_breaks')
+    sentence_variance = _variances([feature['sentence_lengths'] for feature in features])
+    word_length_variance = _variances([feature['word_lengths'] for feature in features])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Texts with no sentence (e.g. only punctuation) give Infinity / NaN, as in JS
+        avg_words_per_sentence = word_count / sentence_count
+        complexity_ratio = column('complex_sentences') / sentence_count
+    repetition_score = 1 - column('unique_words') / word_count
+
+    # The if / else-if pairs of evaluateText: each "human" condition already excludes its "AI" one
+    consistent = (avg_words_per_sentence > 15) & (avg_words_per_sentence < 25) & (sentence_variance < 15)
+    ai_score = (
+        np.where(sentence_variance < 20, 15, 0)
+        + np.where(repetition_score > 0.4, 20, 0)
+        + np.where(consistent, 10, 0)
+        + np.where((transition_count == 0) & (sentence_count > 5), 5, 0)
+        + np.where((punctuation_variety == 0) & (sentence_count > 3), 5, 0)
+        + np.where((paragraph_breaks == 0) & (word_count > 100), 5, 0)
+        + np.where(complexity_ratio > 0.8, 10, 0)
+        + np.where(word_length_variance < 2, 5, 0)
+    )
+    human_score = (
+        np.where(sentence_variance > 40, 15, 0)
+        + np.where(repetition_score < 0.25, 15, 0)
+        + np.where(sentence_variance > 30, 10, 0)
+        + np.where(transition_count > sentence_count * 0.1, 10, 0)
+        + np.where(punctuation_variety > 2, 8, 0)
+        + np.where(paragraph_breaks > 2, 10, 0)
+        + np.where(complexity_ratio < 0.5, 10, 0)
+    )
+
+    total_score = ai_score + human_score
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ai_probability = np.where(total_score > 0, ai_score / total_score * 100, 50.0)
+    human_probability = 100 - ai_probability
+    confidence = np.maximum(ai_probability, human_probability)
+
+    return [{
+        'isAI': bool(ai_probability[i] > 55),
+        'aiProbability': to_fixed(ai_probability[i], 1),
+        'humanProbability': to_fixed(human_probability[i], 1),
+        'confidence': to_fixed(confidence[i], 1),
+        'wordCount': int(word_count[i]),
+        'sentenceCount': int(sentence_count[i]),
+        'avgWordsPerSentence': to_fixed(avg_words_per_sentence[i], 1),
+        'metrics': {
+            'sentenceVariance': to_fixed(sentence_variance[i], 2),
+            'repetitionScore': to_fixed(repetition_score[i] * 100, 1) + '%',
+            'transitionCount': int(transition_count[i]),
+            'punctuationVariety': int(punctuation_variety[i]),
+            'paragraphBreaks': int(paragraph_breaks[i]),
+            'complexityRatio': to_fixed(complexity_ratio[i] * 100, 1) + '%',
+        },
+    } for i in range(len(features))]
+
+
+def format_report(result: Dict) -> str:
+    """Text report of an evaluate_text() result (formatResults in ai_checker.js)."""
+    if 'error' in result:
+        return result['error']
+    verdict = 'LIKELY AI-GENERATED' if result['isAI'] else 'LIKELY HUMAN-WRITTEN'
+    metrics = result['metrics']
+    return (
+        f"{'🔴' if result['isAI'] else '🟢'} VERDICT: {verdict}\n\n"
+        f"Confidence: {result['confidence']}%\n"
+        f"AI Probability: {result['aiProbability']}%\n"
+        f"Human Probability: {result['humanProbability']}%\n\n"
+        f"{REPORT_RULE}\n\n"
+        "TEXT ANALYSIS\n\n"
+        f"Word Count: {result['wordCount']}\n"
+        f"Sentence Count: {result['sentenceCount']}\n"
+        f"Avg Words per Sentence: {result['avgWordsPerSentence']}\n\n"
+        "DETAILED METRICS\n\n"
+        f"• Sentence Length Variance: {metrics['sentenceVariance']}\n"
+        f"• Word Repetition: {metrics['repetitionScore']}\n"
+        f"• Transition Phrases: {metrics['transitionCount']}\n"
+        f"• Punctuation Variety: {metrics['punctuationVariety']}\n"
+        f"• Paragraph Breaks: {metrics['paragraphBreaks']}\n"
+        f"• Complexity Ratio: {metrics['complexityRatio']}\n\n"
+        f"{REPORT_RULE}\n\n"
+        "Note: This is a local heuristic-based analysis."
+    )
+
+
+def to_fixed(value: float, digits: int) -> str:
+    """JavaScript Number.prototype.toFixed: the exact binary value rounded half away from zero."""
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return 'Infinity' if value > 0 else '-Infinity'
+    return str(Decimal(value).quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP))
@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+"""
+Bounded job queue for COT analysis jobs.
+Runs jobs on a fixed pool of worker threads with a maximum queue depth
+and optional per-kind concurrency limits (e.g. GO vs GO2).
+
+Waiting jobs are scheduled by priority class first (interactive before
+bulk) and by weighted fair queuing between clients within a class, so one
+client's batch cannot starve everyone else. Bulk jobs that have waited
+longer than bulk_aging_seconds are promoted ahead of interactive work so
+they still finish under sustained interactive load.
+"""
+
+import threading
+import time
+import traceback
+from collections import deque
+from itertools import count
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+
+# Priority classes, highest first
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+PRIORITY_CLASSES = (INTERACTIVE, BULK)
+
+# Number of recent queue waits per class kept for percentiles in stats()
+WAIT_SAMPLES = 1000
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted to a queue that is already at capacity."""
+
+    def __init__(self, depth: int, max_depth: int):
+        super().__init__(f"Job queue is full ({depth}/{max_depth} jobs waiting)")
+        self.depth = depth
+        self.max_depth = max_depth
+
+
+class _QueuedTask:
+    """A job waiting in (or taken from) the queue."""
+
+    __slots__ = ('job_id', 'kind', 'fn', 'args', 'kwargs', 'job_class', 'client', 'seq', 'enqueued_at')
+
+    def __init__(self, job_id: str, kind: str, fn: Callable, args: tuple, kwargs: dict,
+                 job_class: str, client: str, seq: int):
+        self.job_id = job_id
+        self.kind = kind
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.job_class = job_class
+        self.client = client
+        self.seq = seq
+        self.enqueued_at = time.time()
+
+
+class JobQueue:
+    """Fixed-size worker pool with a bounded, priority- and fair-share-scheduled queue."""
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        max_queue_depth: int = 200,
+        kind_limits: Optional[Dict[str, int]] = None,
+        name: str = 'jobs',
+        class_limits: Optional[Dict[str, int]] = None,
+        client_weights: Optional[Dict[str, float]] = None,
+        bulk_aging_seconds: float = 120
+    ):
+        """
+        Initialize the queue. Worker threads are started lazily on first submit.
+
+        Args:
+            max_workers: Number of worker threads (maximum jobs running at once)
+            max_queue_depth: Maximum number of jobs waiting to run; submits beyond this are rejected
+            kind_limits: Optional dict of kind -> maximum concurrently running jobs of that kind
+            name: Name used for worker threads and log messages
+            class_limits: Optional dict of priority class -> maximum concurrently running jobs of that class
+            client_weights: Optional dict of client -> fair-share weight (default 1.0)
+            bulk_aging_seconds: Bulk jobs waiting longer than this run before interactive ones (0 disables aging)
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if max_queue_depth < 0:
+            raise ValueError("max_queue_depth must not be negative")
+
+        self.max_workers = max_workers
+        self.max_queue_depth = max_queue_depth
+        self.kind_limits = dict(kind_limits or {})
+        self.name = name
+        self.class_limits = dict(class_limits or {})
+        self.client_weights = dict(client_weights or {})
+        self.bulk_aging_seconds = bulk_aging_seconds
+
+        self._cond = threading.Condition()
+        # Priority class -> client -> FIFO of that client's waiting tasks
+        self._queues: Dict[str, Dict[str, Deque[_QueuedTask]]] = {job_class: {} for job_class in PRIORITY_CLASSES}
+        # Start-time fair queuing state: virtual time per class, last finish tag per (class, client)
+        self._virtual_time: Dict[str, float] = {job_class: 0.0 for job_class in PRIORITY_CLASSES}
+        self._finish_tags: Dict[Tuple[str, str], float] = {}
+        self._depth = 0
+        self._seq = count()
+        self._running: Dict[str, int] = {}
+        self._running_by_class: Dict[str, int] = {}
+        self._workers: List[threading.Thread] = []
+        self._shutdown = False
+
+        # Counters for /api/metrics
+        self._submitted = 0
+        self._rejected = 0
+        self._completed = 0
+        self._failed = 0
+        self._promoted = 0
+        self._waits: Dict[str, Deque[float]] = {job_class: deque(maxlen=WAIT_SAMPLES) for job_class in PRIORITY_CLASSES}
+        self._wait_totals: Dict[str, List[float]] = {job_class: [0, 0.0, 0.0] for job_class in PRIORITY_CLASSES}
+
+    def submit(self, job_id: str, kind: str, fn: Callable, *args: Any,
+               job_class: str = INTERACTIVE, client: str = '', **kwargs: Any) -> int:
+        """
+        Queue a job for execution.
+
+        Args:
+            job_id: Job identifier (used for queue position lookups)
+            kind: Job kind, matched against kind_limits (e.g. 'go', 'go2')
+            fn: Callable to run on a worker thread
+            *args, **kwargs: Arguments passed to fn
+            job_class: Priority class (INTERACTIVE or BULK); consumed by the queue, not passed to fn
+            client: Client or API key identity used for fair sharing; consumed by the queue, not passed to fn
+
+        Returns:
+            1-based position of the job in the queue
+
+        Raises:
+            QueueFullError: If max_queue_depth jobs are already waiting
+            ValueError: If job_class is not a known priority class
+            RuntimeError: If the queue has been shut down
+        """
+        if job_class not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown job class '{job_class}'. Expected one of: {', '.join(PRIORITY_CLASSES)}")
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError(f"Job queue '{self.name}' is shut down")
+            if self._depth >= self.max_queue_depth:
+                self._rejected += 1
+                raise QueueFullError(self._depth, self.max_queue_depth)
+
+            task = _QueuedTask(job_id, kind, fn, args, kwargs, job_class, client, next(self._seq))
+            client_queue = self._queues[job_class].setdefault(client, deque())
+            client_queue.append(task)
+            self._depth += 1
+            self._submitted += 1
+            self._ensure_workers()
+            self._cond.notify()
+            return self._dispatch_order().index(job_id) + 1
+
+    def position(self, job_id: str) -> Optional[int]:
+        """
+        Get the 1-based queue position of a waiting job, assuming no further submissions.
+
+        Returns:
+            Position in the queue, or None if the job is not waiting (running, finished or unknown)
+        """
+        with self._cond:
+            order = self._dispatch_order()
+        try:
+            return order.index(job_id) + 1
+        except ValueError:
+            return None
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Remove a waiting job from the queue.
+
+        Returns:
+            True if the job was waiting and has been removed, False otherwise
+        """
+        with self._cond:
+            for clients in self._queues.values():
+                for client, client_queue in clients.items():
+                    for task in client_queue:
+                        if task.job_id == job_id:
+                            client_queue.remove(task)
+                            if not client_queue:
+                                del clients[client]
+                            self._depth -= 1
+                            return True
+        return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Get a snapshot of queue depth, running jobs, per-class waits and counters."""
+        with self._cond:
+            waiting_by_kind: Dict[str, int] = {}
+            waiting_by_class: Dict[str, int] = {}
+            oldest = None
+            for task in self._pending_tasks():
+                waiting_by_kind[task.kind] = waiting_by_kind.get(task.kind, 0) + 1
+                waiting_by_class[task.job_class] = waiting_by_class.get(task.job_class, 0) + 1
+                if oldest is None or task.enqueued_at < oldest:
+                    oldest = task.enqueued_at
+            oldest_wait = time.time() - oldest if oldest is not None else 0.0
+            return {
+                'name': self.name,
+                'max_workers': self.max_workers,
+                'max_queue_depth': self.max_queue_depth,
+                'kind_limits': dict(self.kind_limits),
+                'class_limits': dict(self.class_limits),
+                'bulk_aging_seconds': self.bulk_aging_seconds,
+                'workers_started': len(self._workers),
+                'waiting': self._depth,
+                'waiting_by_kind': waiting_by_kind,
+                'waiting_by_class': waiting_by_class,
+                'waiting_clients': sum(len(clients) for clients in self._queues.values()),
+                'running': sum(self._running.values()),
+                'running_by_kind': {k: v for k, v in self._running.items() if v},
+                'running_by_class': {k: v for k, v in self._running_by_class.items() if v},
+                'oldest_wait_seconds': round(oldest_wait, 3),
+                'wait_by_class': {job_class: self._wait_stats(job_class) for job_class in PRIORITY_CLASSES},
+                'submitted': self._submitted,
+                'rejected': self._rejected,
+                'completed': self._completed,
+                'failed': self._failed,
+                'promoted': self._promoted,
+            }
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None):
+        """
+        Stop accepting jobs and stop the workers once the queue has drained.
+
+        Args:
+            wait: Wait for worker threads to exit
+            timeout: Maximum seconds to wait per worker thread
+        """
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+            workers = list(self._workers)
+        if wait:
+            for worker in workers:
+                worker.join(timeout)
+
+    def _ensure_workers(self):
+        """Start worker threads up to max_workers. Caller must hold the lock."""
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"{self.name}-worker-{len(self._workers) + 1}",
+                daemon=True
+            )
+            self._workers.append(worker)
+            worker.start()
+
+    def _pending_tasks(self):
+        """Iterate over every waiting task. Caller must hold the lock."""
+        for clients in self._queues.values():
+            for client_queue in clients.values():
+                yield from client_queue
+
+    def _weight(self, client: str) -> float:
+        return max(self.client_weights.get(client, 1.0), 0.001)
+
+    def _runnable(self, task: _QueuedTask) -> bool:
+        """Whether a task's kind and class are under their running limits. Caller must hold the lock."""
+        kind_limit = self.kind_limits.get(task.kind)
+        if kind_limit is not None and self._running.get(task.kind, 0) >= kind_limit:
+            return False
+        class_limit = self.class_limits.get(task.job_class)
+        return class_limit is None or self._running_by_class.get(task.job_class, 0) < class_limit
+
+    def _aged(self, task: _QueuedTask, now: float) -> bool:
+        return (task.job_class == BULK and self.bulk_aging_seconds > 0
+                and now - task.enqueued_at >= self.bulk_aging_seconds)
+
+    def _next_task(self) -> Optional[_QueuedTask]:
+        """
+        Pop the next task to run. Caller must hold the lock.
+
+        Aged bulk tasks go first (oldest first), then interactive, then bulk. Within a
+        class, the client with the smallest start tag goes next (start-time fair queuing),
+        and each client's own tasks run in submission order. Tasks whose kind or class
+        is at its running limit are skipped.
+        """
+        now = time.time()
+        aged = [
+            task for client_queue in self._queues[BULK].values()
+            for task in client_queue if self._aged(task, now) and self._runnable(task)
+        ]
+        if aged:
+            task = min(aged, key=lambda task: task.seq)
+            self._promoted += 1
+            self._take(task)
+            return task
+
+        for job_class in PRIORITY_CLASSES:
+            best = None
+            for client, client_queue in self._queues[job_class].items():
+                task = next((task for task in client_queue if self._runnable(task)), None)
+                if task is None:
+                    continue
+                start = max(self._virtual_time[job_class], self._finish_tags.get((job_class, client), 0.0))
+                if best is None or (start, task.seq) < (best[0], best[1].seq):
+                    best = (start, task)
+            if best is not None:
+                self._take(best[1], best[0])
+                return best[1]
+        return None
+
+    def _take(self, task: _QueuedTask, start: Optional[float] = None):
+        """Remove a task from its client queue and advance fair-queuing state. Caller must hold the lock."""
+        job_class, client = task.job_class, task.client
+        if start is None:
+            start = max(self._virtual_time[job_class], self._finish_tags.get((job_class, client), 0.0))
+        self._virtual_time[job_class] = start
+        self._finish_tags[(job_class, client)] = start + 1.0 / self._weight(client)
+
+        clients = self._queues[job_class]
+        clients[client].remove(task)
+        if not clients[client]:
+            del clients[client]
+        self._depth -= 1
+
+        # Idle clients whose tag is already behind the virtual time carry no state worth keeping
+        for key in [key for key, tag in self._finish_tags.items()
+                    if key[1] not in self._queues[key[0]] and tag <= self._virtual_time[key[0]]]:
+            del self._finish_tags[key]
+
+        wait = time.time() - task.enqueued_at
+        self._waits[job_class].append(wait)
+        totals = self._wait_totals[job_class]
+        totals[0] += 1
+        totals[1] += wait
+        totals[2] = max(totals[2], wait)
+
+    def _dispatch_order(self) -> List[str]:
+        """
+        Job IDs in the order they would be started if nothing else were submitted,
+        ignoring running limits. Caller must hold the lock.
+        """
+        now = time.time()
+        order = [
+            task.job_id for task in sorted(
+                (task for client_queue in self._queues[BULK].values() for task in client_queue
+                 if self._aged(task, now)),
+                key=lambda task: task.seq
+            )
+        ]
+        promoted = set(order)
+        for job_class in PRIORITY_CLASSES:
+            virtual_time = self._virtual_time[job_class]
+            queues = {
+                client: [task for task in client_queue if task.job_id not in promoted]
+                for client, client_queue in self._queues[job_class].items()
+            }
+            tags = {client: self._finish_tags.get((job_class, client), 0.0) for client in queues}
+            heads = {client: 0 for client in queues}
+            while True:
+                best = None
+                for client, tasks in queues.items():
+                    if heads[client] >= len(tasks):
+                        continue
+                    task = tasks[heads[client]]
+                    start = max(virtual_time, tags[client])
+                    if best is None or (start, task.seq) < (best[0], best[2].seq):
+                        best = (start, client, task)
+                if best is None:
+                    break
+                start, client, task = best
+                virtual_time = start
+                tags[client] = start + 1.0 / self._weight(client)
+                heads[client] += 1
+                order.append(task.job_id)
+        return order
+
+    def _wait_stats(self, job_class: str) -> Dict[str, Any]:
+        """Queue wait summary for one class. Caller must hold the lock."""
+        samples = sorted(self._waits[job_class])
+        started, total, longest = self._wait_totals[job_class]
+
+        def percentile(fraction: float) -> float:
+            if not samples:
+                return 0.0
+            return round(samples[min(len(samples) - 1, int(fraction * len(samples)))], 3)
+
+        return {
+            'started': int(started),
+            'mean_seconds': round(total / started, 3) if started else 0.0,
+            'p50_seconds': percentile(0.5),
+            'p95_seconds': percentile(0.95),
+            'max_seconds': round(longest, 3),
+        }
+
+    def _worker_loop(self):
+        """Worker thread main loop."""
+        while True:
+            with self._cond:
+                task = self._next_task()
+                while task is None:
+                    if self._shutdown and not self._depth:
+                        return
+                    self._cond.wait()
+                    task = self._next_task()
+                self._running[task.kind] = self._running.get(task.kind, 0) + 1
+                self._running_by_class[task.job_class] = self._running_by_class.get(task.job_class, 0) + 1
+
+            failed = False
+            try:
+                task.fn(*task.args, **task.kwargs)
+            except Exception as e:
+                failed = True
+                print(f"Error in {self.name} job {task.job_id}: {e}")
+                traceback.print_exc()
+            finally:
+                with self._cond:
+                    self._running[task.kind] -= 1
+                    self._running_by_class[task.job_class] -= 1
+                    if failed:
+                        self._failed += 1
+                    else:
+                        self._completed += 1
+                    # A finished job may unblock a task held back by its kind or class limit
+                    self._cond.notify_all()
+
+
+class AsyncJobQueue(JobQueue):
+    """
+    JobQueue variant that runs jobs as coroutines on an asyncio event loop.
+
+    Scheduling (priority classes, fair share, kind/class limits, queue depth) is the
+    same as JobQueue; max_workers is the number of jobs in flight at once, which can
+    be much larger because a waiting job costs a coroutine rather than a thread.
+    submit() is thread-safe and takes coroutine functions.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._loop = None
+        self._tasks: set = set()
+
+    def bind(self, loop):
+        """Attach the event loop that runs the jobs and start anything already queued."""
+        with self._cond:
+            self._loop = loop
+        loop.call_soon_threadsafe(self._dispatch)
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None):
+        """Stop accepting jobs. Jobs in flight are left to finish (or be cancelled with their loop)."""
+        with self._cond:
+            self._shutdown = True
+
+    def _ensure_workers(self):
+        """Schedule a dispatch on the event loop (replaces starting worker threads). Caller must hold the lock."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._dispatch)
+
+    def _dispatch(self):
+        """Start queued jobs up to max_workers. Runs on the event loop."""
+        with self._cond:
+            while sum(self._running.values()) < self.max_workers:
+                task = self._next_task()
+                if task is None:
+                    return
+                self._running[task.kind] = self._running.get(task.kind, 0) + 1
+                self._running_by_class[task.job_class] = self._running_by_class.get(task.job_class, 0) + 1
+                job = self._loop.create_task(self._run(task))
+                # Keep a reference so the task is not garbage collected while it runs
+                self._tasks.add(job)
+                job.add_done_callback(self._tasks.discard)
+
+    async def _run(self, task: _QueuedTask):
+        failed = False
+        try:
+            await task.fn(*task.args, **task.kwargs)
+        except Exception as e:
+            failed = True
+            print(f"Error in {self.name} job {task.job_id}: {e}")
+            traceback.print_exc()
+        finally:
+            with self._cond:
+                self._running[task.kind] -= 1
+                self._running_by_class[task.job_class] -= 1
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+            # A finished job frees a slot and may unblock a task held back by its kind or class limit
+            self._dispatch()
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Job storage backends for the backend server.
+Persists job state so in-flight and completed jobs survive a process restart.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Statuses that mean a job has not finished yet (candidates for recovery after a restart)
+UNFINISHED_STATUSES = ('pending', 'processing')
+
+# Statuses of finished jobs, which retention eventually deletes
+FINISHED_STATUSES = ('completed', 'failed')
+
+
+class JobStore:
+    """Interface for job storage backends."""
+
+    def save(self, job_id: str, job: Dict[str, Any], payload: Optional[Dict[str, Any]] = None):
+        """
+        Insert or replace a job.
+
+        Args:
+            job_id: Job identifier
+            job: Job fields (status, progress, result, ...) - must be JSON serializable
+            payload: Input needed to re-run the job after a restart (text, kind, ...).
+                     Pass None to keep the stored payload unchanged.
+        """
+        raise NotImplementedError
+
+    def update_progress(self, job_id: str, progress: int, status_message: str):
+        """Record a progress update. Backends may batch these writes."""
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job by ID, or None if it is not stored."""
+        raise NotImplementedError
+
+    def get_payload(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the stored re-run payload for a job, or None."""
+        raise NotImplementedError
+
+    def list_unfinished(self) -> List[Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]]:
+        """List (job_id, job, payload) for every pending or processing job, oldest first."""
+        raise NotImplementedError
+
+    def delete(self, job_id: str):
+        """Remove a job."""
+        raise NotImplementedError
+
+    def evicted(self, job_id: str):
+        """
+        Called when the in-process job table evicts a finished job. Persistent stores
+        keep serving it until retention purges it; the default does nothing.
+        """
+
+    def purge_finished(self, created_before: str) -> int:
+        """
+        Delete finished jobs created before a timestamp.
+
+        Args:
+            created_before: ISO timestamp (same format as the jobs' created_at)
+
+        Returns:
+            Number of jobs deleted
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """Write out any batched progress updates."""
+
+    def close(self):
+        """Flush and release resources."""
+        self.flush()
+
+
+class InMemoryJobStore(JobStore):
+    """
+    Job store that keeps everything in process memory (no restart survival). Used for tests.
+
+    It only mirrors the job table, so a job the table evicts (by its TTL or bytes
+    budget) is dropped here too rather than kept as an unbounded second copy.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._payloads: Dict[str, Dict[str, Any]] = {}
+
+    def save(self, job_id: str, job: Dict[str, Any], payload: Optional[Dict[str, Any]] = None):
+        with self._lock:
+            self._jobs[job_id] = dict(job)
+            if payload is not None:
+                self._payloads[job_id] = dict(payload)
+            if job.get('status') not in UNFINISHED_STATUSES:
+                self._payloads.pop(job_id, None)
+
+    def update_progress(self, job_id: str, progress: int, status_message: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.get('status') in UNFINISHED_STATUSES:
+                job['progress'] = progress
+                job['status_message'] = status_message
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def get_payload(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            payload = self._payloads.get(job_id)
+            return dict(payload) if payload is not None else None
+
+    def list_unfinished(self) -> List[Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]]:
+        with self._lock:
+            unfinished = [
+                (job_id, dict(job), self._payloads.get(job_id))
+                for job_id, job in self._jobs.items()
+                if job.get('status') in UNFINISHED_STATUSES
+            ]
+        unfinished.sort(key=lambda item: item[1].get('created_at') or '')
+        return unfinished
+
+    def delete(self, job_id: str):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+            self._payloads.pop(job_id, None)
+
+    def evicted(self, job_id: str):
+        self.delete(job_id)
+
+    def purge_finished(self, created_before: str) -> int:
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.get('status') in FINISHED_STATUSES and (job.get('created_at') or '') < created_before
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Job store backed by a local SQLite database in WAL mode.
+
+    Status changes are written immediately. Progress updates are buffered and
+    written in one transaction every flush_interval seconds, so frequent
+    progress callbacks do not each cost a commit. Finished jobs older than
+    retention_seconds are deleted every purge_interval seconds by the same
+    background thread.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 2.0, retention_seconds: float = 0,
+                 purge_interval: float = 3600):
+        """
+        Open (or create) the database.
+
+        Args:
+            path: Path to the SQLite database file
+            flush_interval: Seconds between batched progress writes
+            retention_seconds: Age (from created_at) after which finished jobs are deleted (0 keeps them forever)
+            purge_interval: Seconds between retention purges
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.retention_seconds = retention_seconds
+        self.purge_interval = purge_interval
+        self._next_purge = 0.0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        # WAL + NORMAL only fsyncs at checkpoints; a crash can lose the last commits but not corrupt the DB
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA busy_timeout=5000')
+        self._create_schema()
+
+        self._pending_progress: Dict[str, Tuple[int, str, float]] = {}
+        self._pending_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name='job-store-flush', daemon=True)
+        self._flusher.start()
+
+    def _create_schema(self):
+        with self._lock:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    progress INTEGER NOT NULL DEFAULT 0,
+                    status_message TEXT,
+                    created_at TEXT,
+                    updated_at REAL NOT NULL,
+                    data TEXT NOT NULL,
+                    payload TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+                CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs (created_at);
+            """)
+
+    def save(self, job_id: str, job: Dict[str, Any], payload: Optional[Dict[str, Any]] = None):
+        status = job.get('status', 'pending')
+        finished = status not in UNFINISHED_STATUSES
+        with self._pending_lock:
+            # The full row supersedes any buffered progress for this job
+            self._pending_progress.pop(job_id, None)
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO jobs (job_id, status, progress, status_message, created_at, updated_at, data, payload)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(job_id) DO UPDATE SET
+                    status = excluded.status,
+                    progress = excluded.progress,
+                    status_message = excluded.status_message,
+                    updated_at = excluded.updated_at,
+                    data = excluded.data,
+                    payload = CASE
+                        WHEN ? THEN NULL
+                        WHEN excluded.payload IS NOT NULL THEN excluded.payload
+                        ELSE jobs.payload
+                    END
+                """,
+                (
+                    job_id,
+                    status,
+                    int(job.get('progress', 0) or 0),
+                    job.get('status_message', ''),
+                    job.get('created_at'),
+                    time.time(),
+                    json.dumps(job),
+                    None if finished or payload is None else json.dumps(payload),
+                    1 if finished else 0,
+                )
+            )
+
+    def update_progress(self, job_id: str, progress: int, status_message: str):
+        with self._pending_lock:
+            self._pending_progress[job_id] = (int(progress), status_message, time.time())
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data, progress, status_message FROM jobs WHERE job_id = ?', (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = json.loads(row[0])
+        job['progress'] = row[1]
+        job['status_message'] = row[2]
+        with self._pending_lock:
+            pending = self._pending_progress.get(job_id)
+        if pending:
+            job['progress'], job['status_message'] = pending[0], pending[1]
+        return job
+
+    def get_payload(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute('SELECT payload FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return json.loads(row[0])
+
+    def list_unfinished(self) -> List[Tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]]:
+        self.flush()
+        placeholders = ','.join('?' for _ in UNFINISHED_STATUSES)
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT job_id, data, progress, status_message, payload FROM jobs
+                WHERE status IN ({placeholders})
+                ORDER BY created_at
+                """,
+                UNFINISHED_STATUSES
+            ).fetchall()
+        unfinished = []
+        for job_id, data, progress, status_message, payload in rows:
+            job = json.loads(data)
+            job['progress'] = progress
+            job['status_message'] = status_message
+            unfinished.append((job_id, job, json.loads(payload) if payload else None))
+        return unfinished
+
+    def delete(self, job_id: str):
+        with self._pending_lock:
+            self._pending_progress.pop(job_id, None)
+        with self._lock:
+            self._conn.execute('DELETE FROM jobs WHERE job_id = ?', (job_id,))
+
+    def purge_finished(self, created_before: str) -> int:
+        placeholders = ','.join('?' for _ in FINISHED_STATUSES)
+        with self._lock:
+            # Served by idx_jobs_created_at
+            cursor = self._conn.execute(
+                f'DELETE FROM jobs WHERE status IN ({placeholders}) AND created_at < ?',
+                FINISHED_STATUSES + (created_before,)
+            )
+        return cursor.rowcount
+
+    def purge_expired(self) -> int:
+        """Delete finished jobs older than retention_seconds (no-op when retention is disabled)."""
+        if self.retention_seconds <= 0:
+            return 0
+        cutoff = datetime.utcnow() - timedelta(seconds=self.retention_seconds)
+        return self.purge_finished(cutoff.isoformat())
+
+    def flush(self):
+        with self._pending_lock:
+            if not self._pending_progress:
+                return
+            batch = [
+                (progress, status_message, updated_at, job_id)
+                for job_id, (progress, status_message, updated_at) in self._pending_progress.items()
+            ]
+            self._pending_progress.clear()
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany(
+                    f"""
+                    UPDATE jobs SET progress = ?, status_message = ?, updated_at = ?
+                    WHERE job_id = ? AND status IN ({','.join('?' for _ in UNFINISHED_STATUSES)})
+                    """,
+                    [row + UNFINISHED_STATUSES for row in batch]
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def close(self):
+        self._closed.set()
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def _flush_loop(self):
+        """Background thread writing buffered progress updates and purging expired jobs."""
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing job progress: {e}")
+            if self.retention_seconds > 0 and time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + self.purge_interval
+                try:
+                    purged = self.purge_expired()
+                    if purged:
+                        print(f"Purged {purged} finished jobs older than {self.retention_seconds:.0f}s from the job store")
+                except Exception as e:
+                    print(f"Error purging job store: {e}")
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+In-process job table for the backend server.
+Holds compact JobRecord objects, notifies subscribers when a job changes,
+and evicts finished jobs by TTL and by a total-bytes budget (least
+recently used first).
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional
+
+
+# Statuses after which a job no longer changes and becomes eligible for eviction
+FINISHED_STATUSES = ('completed', 'failed')
+
+# Rough fixed cost of a record (object, slots, lock, small strings) used in the bytes budget
+RECORD_OVERHEAD_BYTES = 512
+
+
+class JobRecord:
+    """
+    State of one analysis job.
+
+    Fields are fixed (__slots__) to keep per-job overhead small, and all
+    reads/writes go through a per-record lock because workers, progress
+    callbacks and request threads touch the same job concurrently.
+    """
+
+    __slots__ = (
+        'job_id', 'status', 'progress', 'status_message', 'created_at', 'completed_at',
+        'text', 'purpose', 'type', 'has_file', 'result', 'error', 'session_id', 'cot_chat_id',
+        'cot_started_at', 'text_length', 'cached', 'coalesced', 'batch_id', 'chunk_batch_id', 'chunk_jobs',
+        'provisional', 'triage', 'version', '_lock',
+    )
+
+    # Fields included in to_dict() / accepted by from_dict() and update()
+    FIELDS = (
+        'status', 'progress', 'status_message', 'created_at', 'completed_at',
+        'text', 'purpose', 'type', 'has_file', 'result', 'error', 'session_id', 'cot_chat_id',
+        'cot_started_at', 'text_length', 'cached', 'coalesced', 'batch_id', 'chunk_batch_id', 'chunk_jobs',
+        'provisional', 'triage', 'version',
+    )
+
+    def __init__(self, job_id: str, **fields: Any):
+        self.job_id = job_id
+        self.status = 'pending'
+        self.progress = 0
+        self.status_message = 'Queued'
+        self.created_at: Optional[str] = None
+        self.completed_at: Optional[str] = None
+        self.text = ''
+        self.purpose = ''
+        self.type: Optional[str] = None
+        self.has_file = False
+        self.result: Optional[str] = None
+        self.error: Optional[str] = None
+        self.session_id: Optional[str] = None
+        self.cot_chat_id: Optional[str] = None
+        # Epoch seconds when the COT was submitted and the length of the analyzed text (for the ETA)
+        self.cot_started_at: Optional[float] = None
+        self.text_length: Optional[int] = None
+        self.cached = False
+        self.coalesced = False
+        self.batch_id: Optional[str] = None
+        # Batch running this job's chunks, for a chunked analysis (the job itself runs no COT)
+        self.chunk_batch_id: Optional[str] = None
+        # Chunk hash -> chunk job id, so a resubmission can reuse the results of unchanged chunks
+        self.chunk_jobs: Optional[Dict[str, str]] = None
+        # Heuristic verdict from submission time, shown until the COT result arrives
+        self.provisional: Optional[Dict[str, Any]] = None
+        # 'settled' (decided by the local heuristic, no COT) or 'escalated', for triaged analyses
+        self.triage: Optional[str] = None
+        # Bumped on every update; clients use it to detect changes (SSE event IDs, long-poll)
+        self.version = 0
+        self._lock = threading.Lock()
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    @classmethod
+    def from_dict(cls, job_id: str, data: Dict[str, Any]) -> 'JobRecord':
+        """Build a record from a stored job dict, ignoring unknown keys."""
+        return cls(job_id, **{name: data[name] for name in cls.FIELDS if name in data})
+
+    def update(self, **fields: Any) -> int:
+        """
+        Set several fields atomically and bump the version.
+
+        Returns:
+            The new version
+
+        Raises:
+            AttributeError: If a field name is not a JobRecord field
+        """
+        for name in fields:
+            if name not in self.FIELDS or name == 'version':
+                raise AttributeError(f"JobRecord has no updatable field '{name}'")
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.version += 1
+            return self.version
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Consistent snapshot of the job's fields (None values omitted)."""
+        with self._lock:
+            return {
+                name: getattr(self, name)
+                for name in self.FIELDS
+                if getattr(self, name) is not None
+            }
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def size_bytes(self) -> int:
+        """Approximate memory held by this record, dominated by the result text."""
+        size = RECORD_OVERHEAD_BYTES
+        for value in (self.result, self.error, self.text, self.status_message, self.purpose):
+            if value:
+                size += len(value)
+        if self.chunk_jobs:
+            # Hash and job id strings plus the dict slot for each chunk
+            size += sum(len(digest) + len(job_id) + 100 for digest, job_id in self.chunk_jobs.items())
+        if self.provisional:
+            size += len(json.dumps(self.provisional, default=str))
+        return size
+
+
+class JobTable:
+    """
+    Thread-safe job_id -> JobRecord map with eviction of finished jobs.
+
+    Running and queued jobs are never evicted. Finished jobs are dropped once
+    they are older than ttl_seconds, or least-recently-used first when their
+    combined size exceeds max_bytes.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 3600,
+        max_bytes: int = 64 * 1024 * 1024,
+        sweep_interval: float = 60,
+        on_evict: Optional[Callable[[JobRecord], None]] = None
+    ):
+        """
+        Initialize the table.
+
+        Args:
+            ttl_seconds: Seconds a finished job is kept after it finished (0 disables TTL eviction)
+            max_bytes: Budget for the combined size of finished jobs (0 disables the budget)
+            sweep_interval: Seconds between background sweeps (see start_sweeper)
+            on_evict: Optional callback invoked with each evicted record
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.on_evict = on_evict
+
+        self._lock = threading.Lock()
+        self._records: Dict[str, JobRecord] = {}
+        # Finished jobs in LRU order: job_id -> (size_bytes, finished_at)
+        self._finished: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._finished_bytes = 0
+        self._evicted_ttl = 0
+        self._evicted_budget = 0
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # job_id -> callbacks invoked (with the record) after each change
+        self._subscribers: Dict[str, list] = {}
+
+    def add(self, record: JobRecord):
+        """Insert or replace a record."""
+        evicted = []
+        with self._lock:
+            self._forget_finished(record.job_id)
+            self._records[record.job_id] = record
+            if record.is_finished:
+                self._track_finished(record)
+                evicted = self._enforce_budget()
+        self._notify_evicted(evicted)
+        self._notify_changed(record)
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        """Get a record, marking it as recently used."""
+        with self._lock:
+            record = self._records.get(job_id)
+            if record is not None and job_id in self._finished:
+                self._finished.move_to_end(job_id)
+            return record
+
+    def update(self, job_id: str, **fields: Any) -> Optional[JobRecord]:
+        """
+        Update fields of a record, tracking its transition to a finished status.
+
+        Returns:
+            The updated record, or None if the job is not in the table
+        """
+        with self._lock:
+            record = self._records.get(job_id)
+        if record is None:
+            return None
+        record.update(**fields)
+
+        if 'status' in fields or 'result' in fields:
+            evicted = []
+            with self._lock:
+                if self._records.get(job_id) is record:
+                    self._forget_finished(job_id)
+                    if record.is_finished:
+                        self._track_finished(record)
+                        evicted = self._enforce_budget()
+            self._notify_evicted(evicted)
+        self._notify_changed(record)
+        return record
+
+    def remove(self, job_id: str) -> Optional[JobRecord]:
+        """Remove a record without counting it as an eviction."""
+        with self._lock:
+            self._forget_finished(job_id)
+            return self._records.pop(job_id, None)
+
+    def subscribe(self, job_id: str, callback: Callable[[JobRecord], None]):
+        """
+        Call callback(record) after every change to a job until unsubscribed.
+        Callbacks run on the updating thread and must not block.
+        """
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append(callback)
+
+    def unsubscribe(self, job_id: str, callback: Callable[[JobRecord], None]):
+        """Stop calling a callback registered with subscribe()."""
+        with self._lock:
+            callbacks = self._subscribers.get(job_id)
+            if callbacks and callback in callbacks:
+                callbacks.remove(callback)
+                if not callbacks:
+                    del self._subscribers[job_id]
+
+    def wait_for_change(self, job_id: str, version: int, timeout: float) -> Optional[JobRecord]:
+        """
+        Block until a job's version differs from version, or the timeout expires.
+
+        Returns:
+            The record (changed or not), or None if the job is not in the table
+        """
+        changed = threading.Event()
+        callback = lambda record: changed.set()
+        self.subscribe(job_id, callback)
+        try:
+            record = self.get(job_id)
+            if record is None or record.version != version:
+                return record
+            changed.wait(timeout)
+            return self.get(job_id)
+        finally:
+            self.unsubscribe(job_id, callback)
+
+    def __contains__(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._records
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._records))
+
+    def sweep(self) -> int:
+        """
+        Evict finished jobs past their TTL and enforce the bytes budget.
+
+        Returns:
+            Number of records evicted
+        """
+        evicted = []
+        with self._lock:
+            if self.ttl_seconds > 0:
+                cutoff = time.monotonic() - self.ttl_seconds
+                for job_id, (_, finished_at) in list(self._finished.items()):
+                    if finished_at <= cutoff:
+                        evicted.append(self._evict(job_id))
+                        self._evicted_ttl += 1
+            evicted.extend(self._enforce_budget())
+        self._notify_evicted(evicted)
+        return len(evicted)
+
+    def start_sweeper(self):
+        """Start the background sweeper thread (idempotent)."""
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(target=self._sweep_loop, name='job-table-sweeper', daemon=True)
+            self._sweeper.start()
+
+    def stop_sweeper(self):
+        """Stop the background sweeper thread."""
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get table size and eviction counters."""
+        with self._lock:
+            return {
+                'jobs': len(self._records),
+                'active': len(self._records) - len(self._finished),
+                'finished': len(self._finished),
+                'finished_bytes': self._finished_bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'evicted_ttl': self._evicted_ttl,
+                'evicted_budget': self._evicted_budget,
+                'subscribers': sum(len(callbacks) for callbacks in self._subscribers.values()),
+            }
+
+    def _track_finished(self, record: JobRecord):
+        """Start LRU/TTL accounting for a finished record. Caller must hold the lock."""
+        size = record.size_bytes()
+        self._finished[record.job_id] = (size, time.monotonic())
+        self._finished_bytes += size
+
+    def _forget_finished(self, job_id: str):
+        """Stop LRU/TTL accounting for a record. Caller must hold the lock."""
+        entry = self._finished.pop(job_id, None)
+        if entry is not None:
+            self._finished_bytes -= entry[0]
+
+    def _evict(self, job_id: str) -> Optional[JobRecord]:
+        """Drop a finished record. Caller must hold the lock."""
+        self._forget_finished(job_id)
+        return self._records.pop(job_id, None)
+
+    def _enforce_budget(self) -> list:
+        """Evict least recently used finished records until under max_bytes. Caller must hold the lock."""
+        evicted = []
+        if self.max_bytes <= 0:
+            return evicted
+        while self._finished_bytes > self.max_bytes and self._finished:
+            job_id = next(iter(self._finished))
+            evicted.append(self._evict(job_id))
+            self._evicted_budget += 1
+        return evicted
+
+    def _notify_changed(self, record: JobRecord):
+        with self._lock:
+            callbacks = list(self._subscribers.get(record.job_id, ()))
+        for callback in callbacks:
+            try:
+                callback(record)
+            except Exception as e:
+                print(f"Error notifying subscriber of job {record.job_id}: {e}")
+
+    def _notify_evicted(self, evicted: list):
+        if not self.on_evict:
+            return
+        for record in evicted:
+            if record is not None:
+                self.on_evict(record)
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error sweeping job table: {e}")
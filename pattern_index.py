@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Index of AI-writing tells from the bundled pattern PDFs.
+
+The phrase lists in the PDFs (quoted example phrases, the AI-vocabulary word
+lists and literal artifact strings) are extracted once and compiled into an
+Aho-Corasick automaton, so a text is scanned for all of them in one linear
+pass. Each match comes back with character offsets into the scanned text and
+the PDF section it was listed under.
+
+Parsing the PDFs takes about a second, so the extracted patterns are kept in a
+small JSON artifact next to them (load_or_build) and only re-extracted when a
+PDF's size, mtime and content hash no longer match it.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class Pattern(NamedTuple):
+    """One phrase to look for and where it was listed."""
+    phrase: str
+    category: str  # PDF section, e.g. '7. Overuse of “AI vocabulary”'
+    source: str  # PDF file name
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over a fixed set of keys. iter_matches() reports every
+    occurrence of every key in one pass over the text, O(len(text) + matches).
+    """
+
+    def __init__(self, keys: Iterable[Tuple[str, object]]):
+        # Node 0 is the root; goto[n] maps a character to the next node
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[Tuple[int, object]]] = [[]]  # (key length, value) ending at the node
+        for key, value in keys:
+            if key:
+                self._add(key, value)
+        self._link()
+
+    def _add(self, key: str, value: object):
+        node = 0
+        for char in key:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            node = next_node
+        self._outputs[node].append((len(key), value))
+
+    def _link(self):
+        """Breadth-first failure links; each node's outputs include those of its failure node."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, object]]:
+        """Yield (start, end, value) for every key occurrence, in order of end offset."""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, value in outputs[node]:
+                yield index + 1 - length, index + 1, value
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+
+# --- Extraction from the PDFs' text ---
+
+# Section headings: '### **7. Title**' (markdown list PDF) or '6. UPPERCASE TITLE' (report PDF)
+# (an uppercase title ends on a word of 3+ letters, so a following 'AI ...' sentence is not part of it)
+_HEADING_RE = re.compile(r'#{2,}\s*\*\*(\d+\.\s*[^*]+?)\*\*'
+                         r'|(?<![\d.])\b(\d{1,2}\.\s+[A-Z][A-Z&.,\- ]*[A-Z]{3}(?: \([A-Z0-9,\- ]+\))?)(?=\s)')
+# Top-level headings ('# **II. LEXICAL & LANGUAGE SIGNS**'); sections that list non-signs are skipped
+_PART_RE = re.compile(r'(?<!#)#\s*\*\*([^*]+(?:\*[^*]+\*[^*]*)*)\*\*')
+_SKIPPED_PARTS_RE = re.compile(r'NOT\*?\s+A\s+RELIABLE|MASTER SUMMARY', re.IGNORECASE)
+_QUOTED_RE = re.compile(r'“([^”]+)”')
+_CODE_RE = re.compile(r'`([^`\s]+)`')
+_BOLD_LIST_RE = re.compile(r'\*\*([^*]+)\*\*')
+# Placeholders inside example phrases ('from X to Y', 'Not only…, but…'); phrases are split around them
+_PLACEHOLDER_RE = re.compile(r'…|\.\.\.|\[\.\.\.\]|\b[XYZ]\b')
+_PARENTHETICAL_RE = re.compile(r'\s*\([^)]*\)')
+
+MIN_PHRASE_CHARS = 6  # Single-word fragments shorter than this ('No', 'Just') are too common to flag
+
+
+def extract_patterns(text: str, source: str) -> List[Pattern]:
+    """
+    Extract the phrases listed in a pattern PDF's text (whitespace already collapsed).
+
+    Taken from each section: quoted example phrases (split around placeholders such
+    as X / Y and ellipses), comma-separated bold word lists, and literal artifact
+    strings in backticks. Sections listing what is not a sign are skipped.
+    """
+    headings = [(match.start(), (match.group(1) or match.group(2)).strip()) for match in _HEADING_RE.finditer(text)]
+    skipped = _skipped_ranges(text)
+    patterns: Dict[Tuple[str, str], Pattern] = {}
+
+    def category_at(offset: int) -> Optional[str]:
+        current = None
+        for start, title in headings:
+            if start > offset:
+                break
+            current = title
+        return current
+
+    def add(phrase: str, offset: int):
+        phrase = _clean(phrase)
+        category = category_at(offset)
+        if not phrase or category is None or any(start <= offset < end for start, end in skipped):
+            return
+        if ' ' not in phrase and len(phrase) < MIN_PHRASE_CHARS:
+            return
+        patterns.setdefault((phrase.lower(), category), Pattern(phrase, category, source))
+
+    heading_spans = [(match.start(), match.end()) for match in _HEADING_RE.finditer(text)]
+    for match in _QUOTED_RE.finditer(text):
+        if any(start <= match.start() < end for start, end in heading_spans) or '→' in match.group(1):
+            continue  # Quotes in headings name the sign; arrows illustrate a process, not a phrase
+        for fragment in _PLACEHOLDER_RE.split(match.group(1)):
+            add(fragment, match.start())
+    for match in _BOLD_LIST_RE.finditer(text):
+        if match.group(1).count(',') >= 4:
+            for word in match.group(1).split(','):
+                add(_PARENTHETICAL_RE.sub('', word), match.start())
+    for match in _CODE_RE.finditer(text):
+        add(_PLACEHOLDER_RE.sub('', match.group(1)), match.start())
+    return list(patterns.values())
+
+
+def _skipped_ranges(text: str) -> List[Tuple[int, int]]:
+    parts = [(match.start(), match.group(1)) for match in _PART_RE.finditer(text)]
+    ranges = []
+    for index, (start, title) in enumerate(parts):
+        if _SKIPPED_PARTS_RE.search(title):
+            ranges.append((start, parts[index + 1][0] if index + 1 < len(parts) else len(text)))
+    return ranges
+
+
+def _clean(phrase: str) -> str:
+    """Trim punctuation and markup left around an extracted phrase."""
+    phrase = ' '.join(phrase.replace('*', ' ').split())
+    return phrase.strip(' ,.;:!?\'"‘’-–—').strip()
+
+
+def read_pdf_text(path: str) -> str:
+    """
+    Text of a PDF with whitespace collapsed (the pattern PDFs put every word on its own line).
+
+    Raises:
+        RuntimeError: If pypdf is not installed
+    """
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise RuntimeError('pypdf is required to read the pattern PDFs (pip install pypdf)')
+    reader = PdfReader(path)
+    return ' '.join(' '.join((page.extract_text() or '').split()) for page in reader.pages)
+
+
+# --- Matching ---
+
+# Folded to one character each so offsets in the folded text are offsets in the original
+_FOLD = str.maketrans({'’': "'", '‘': "'", '“': '"', '”': '"', '–': '-', '—': '-'})
+
+
+def _fold(text: str) -> str:
+    """Lowercase and unify quotes and dashes, keeping the length (and so every offset) unchanged."""
+    text = text.translate(_FOLD)
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return ''.join(char if len(char.lower()) != 1 else char.lower() for char in text)
+
+
+class PatternIndex:
+    """Compiled phrase lists of the pattern PDFs."""
+
+    def __init__(self, patterns: Sequence[Pattern]):
+        self.patterns = list(patterns)
+        self._automaton = AhoCorasick((_fold(pattern.phrase), pattern) for pattern in self.patterns)
+
+    @classmethod
+    def from_pdfs(cls, paths: Iterable[str]) -> 'PatternIndex':
+        """Extract and compile the patterns of the given PDFs."""
+        patterns = []
+        for path in paths:
+            patterns.extend(extract_patterns(read_pdf_text(path), os.path.basename(path)))
+        return cls(patterns)
+
+    def scan(self, text: str) -> List[Dict]:
+        """
+        Find every listed phrase in text, case-insensitively and on word boundaries.
+
+        Returns:
+            Matches in order of position: {'start', 'end', 'text', 'phrase', 'category', 'source'},
+            with start / end as character offsets into text
+        """
+        folded = _fold(text)
+        matches = []
+        for start, end, pattern in self._automaton.iter_matches(folded):
+            if _is_word_char(folded, start - 1) and _is_word_char(folded, start):
+                continue
+            if _is_word_char(folded, end) and _is_word_char(folded, end - 1):
+                continue
+            matches.append({'start': start, 'end': end, 'text': text[start:end], 'phrase': pattern.phrase,
+                            'category': pattern.category, 'source': pattern.source})
+        matches.sort(key=lambda match: (match['start'], -match['end']))
+        return matches
+
+    def stats(self) -> Dict:
+        categories = {pattern.category for pattern in self.patterns}
+        return {'patterns': len(self.patterns), 'categories': len(categories), 'automaton_nodes': len(self._automaton)}
+
+
+def _is_word_char(text: str, index: int) -> bool:
+    return 0 <= index < len(text) and (text[index].isalnum() or text[index] == '_')
+
+
+# --- Parsed-pattern artifact ---
+
+CACHE_VERSION = 1  # Bump when extraction changes, so artifacts from older code are rebuilt
+
+
+def fingerprint(path: str, digest: Optional[str] = None) -> Dict:
+    """Size, mtime and SHA-256 of a file (digest is reused when already known)."""
+    stat = os.stat(path)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+        digest = sha.hexdigest()
+    return {'name': os.path.basename(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+
+
+def _read_artifact(cache_path: str) -> Optional[Dict]:
+    try:
+        with open(cache_path, encoding='utf-8') as f:
+            artifact = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return artifact if isinstance(artifact, dict) and artifact.get('version') == CACHE_VERSION else None
+
+
+def _write_artifact(cache_path: str, artifact: Dict):
+    """Write atomically, so concurrent workers never read a half-written artifact."""
+    directory = os.path.dirname(os.path.abspath(cache_path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.patterns-', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(artifact, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_or_build(pdf_paths: Sequence[str], cache_path: str) -> Tuple[PatternIndex, Dict]:
+    """
+    Pattern index of the PDFs, from the artifact at cache_path when it still matches them.
+
+    A PDF matches its artifact entry when size and mtime are unchanged (no read needed), or,
+    failing that, when its SHA-256 is unchanged (e.g. a fresh checkout); the artifact's
+    stamps are then refreshed. Otherwise the PDFs are parsed again and the artifact rewritten.
+
+    Returns:
+        (index, info) with info = {'state': 'loaded' | 'built', 'seconds', 'cache_path',
+        'cache_error' (if the artifact could not be written), 'pdfs': [fingerprint, ...], **index.stats()}
+    """
+    started = time.perf_counter()
+    artifact = _read_artifact(cache_path)
+    cached = {entry['name']: entry for entry in artifact['pdfs']} if artifact else {}
+    if artifact and len(cached) != len(pdf_paths):
+        cached = {}
+
+    pdfs, stale, restamped = [], False, False
+    for path in pdf_paths:
+        entry = cached.get(os.path.basename(path))
+        stat = os.stat(path)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            pdfs.append(entry)
+            continue
+        current = fingerprint(path)
+        pdfs.append(current)
+        if entry and entry['sha256'] == current['sha256']:
+            restamped = True
+        else:
+            stale = True
+
+    info = {'cache_path': cache_path}
+    if artifact and not stale:
+        index = PatternIndex([Pattern(*pattern) for pattern in artifact['patterns']])
+        info['state'] = 'loaded'
+    else:
+        index = PatternIndex.from_pdfs(pdf_paths)
+        info['state'] = 'built'
+    if info['state'] == 'built' or restamped:
+        try:
+            _write_artifact(cache_path, {'version': CACHE_VERSION, 'pdfs': pdfs,
+                                         'patterns': [list(pattern) for pattern in index.patterns]})
+        except OSError as e:
+            info['cache_error'] = str(e)  # Read-only filesystem: the index still works, only for this process
+    info['seconds'] = round(time.perf_counter() - started, 4)
+    info['pdfs'] = pdfs
+    info.update(index.stats())
+    return index, info
@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+"""
+Shared formatting of the plain-text analysis reports (heuristic detector reports
+and merged chunk reports), kept free of heavy imports.
+"""
+
+# Horizontal rule between report sections
+REPORT_RULE = '━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━'
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of COT results.
+Keys are a hash of the COT slug plus its normalized parameters, so pressing
+GO twice on the same text is answered without another FinChat run.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_KEY_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keys: Unicode NFC, collapsed whitespace, stripped."""
+    return _WHITESPACE_RE.sub(' ', unicodedata.normalize('NFC', text or '')).strip()
+
+
+def make_cache_key(cot_slug: str, parameters: Dict[str, str]) -> str:
+    """
+    Build a cache key for a COT run.
+
+    Args:
+        cot_slug: COT slug (e.g. 'ai-detector-e1')
+        parameters: Parameters passed to the COT (e.g. {'purpose': 'general', 'text': ...})
+
+    Returns:
+        Hex SHA-256 digest identifying the run
+    """
+    canonical = json.dumps(
+        {
+            'slug': cot_slug,
+            'parameters': {key: normalize_text(str(value)) for key, value in parameters.items()},
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier result cache: an in-memory LRU and an optional on-disk directory.
+
+    Entries expire after ttl_seconds in both tiers. Disk hits are promoted
+    back into memory.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 86400,
+        disk_dir: Optional[str] = None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum entries kept in memory
+            max_bytes: Maximum combined size of cached content kept in memory
+            ttl_seconds: Seconds an entry stays valid (0 = never expires)
+            disk_dir: Directory for the on-disk tier (None disables it)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # key -> (content, stored_at wall-clock time)
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Get cached content for a key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._expired(entry[1]):
+                    self._remove(key)
+                else:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry[0]
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+            self._insert(key, entry[0], entry[1])
+            return entry[0]
+
+    def put(self, key: str, content: str):
+        """Store content for a key in both tiers."""
+        stored_at = time.time()
+        with self._lock:
+            self._insert(key, content, stored_at)
+            self._stores += 1
+        self._write_disk(key, content, stored_at)
+
+    def invalidate(self, key: Optional[str] = None) -> int:
+        """
+        Remove one entry, or every entry when key is None.
+
+        Returns:
+            Number of entries removed (memory and disk entries counted once per key)
+        """
+        if key is not None and not _KEY_RE.match(key):
+            return 0
+        removed = set()
+        with self._lock:
+            keys = [key] if key else list(self._entries)
+            for k in keys:
+                if k in self._entries:
+                    self._remove(k)
+                    removed.add(k)
+
+        if self.disk_dir:
+            if key:
+                if self._delete_disk(key):
+                    removed.add(key)
+            else:
+                for name in os.listdir(self.disk_dir):
+                    if name.endswith('.json') and _KEY_RE.match(name[:-5]) and self._delete_disk(name[:-5]):
+                        removed.add(name[:-5])
+        return len(removed)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters."""
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+                'disk_enabled': bool(self.disk_dir),
+                'hits': self._hits,
+                'disk_hits': self._disk_hits,
+                'misses': self._misses,
+                'hit_rate': round((self._hits + self._disk_hits) / lookups, 4) if lookups else 0.0,
+                'stores': self._stores,
+                'evictions': self._evictions,
+            }
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - stored_at > self.ttl_seconds
+
+    def _insert(self, key: str, content: str, stored_at: float):
+        """Insert into the memory tier and evict LRU entries. Caller must hold the lock."""
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (content, stored_at)
+        self._bytes += len(content)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self._evictions += 1
+
+    def _remove(self, key: str):
+        """Remove from the memory tier. Caller must hold the lock."""
+        content, _ = self._entries.pop(key)
+        self._bytes -= len(content)
+
+    def _disk_path(self, key: str) -> str:
+        if not _KEY_RE.match(key):
+            raise ValueError(f"Invalid cache key: {key!r}")
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[tuple]:
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        stored_at = data.get('stored_at', 0)
+        if self._expired(stored_at):
+            self._delete_disk(key)
+            return None
+        return data.get('content', ''), stored_at
+
+    def _write_disk(self, key: str, content: str, stored_at: float):
+        if not self.disk_dir:
+            return
+        try:
+            # Write to a temp file and rename so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'content': content, 'stored_at': stored_at}, f)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError as e:
+            print(f"Error writing result cache entry {key}: {e}")
+
+    def _delete_disk(self, key: str) -> bool:
+        try:
+            os.remove(self._disk_path(key))
+            return True
+        except (OSError, ValueError):
+            return False
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Compiled sanitizer for text sent to FinChat COTs.
+Removes special tokens that break FinChat's tiktoken encoder (e.g. <|endoftext|>),
+replaces '$' (COT parameter syntax) with 'USD' and collapses whitespace.
+
+sanitize_text() gives the same output as the original multi-pass implementation
+(kept as reference_sanitize_text for equivalence tests and benchmarks):
+- Text without special-token syntax ('<|', '[|' or '&lt;|') takes one regex
+  pass for the bracket-only tokens, then a split/join whitespace collapse
+  (str.split() splits on exactly the characters regex \\s matches).
+- Text with it runs the original sequence of replacements, with every pattern
+  compiled once and the literal-token passes merged into one alternation.
+  The sequence is kept because removing one token can expose another, and the
+  original's bounded number of passes decides what survives.
+
+StreamingSanitizer / sanitize_stream() / sanitize_file() sanitize text that
+arrives in chunks (e.g. an upload) with the same result as sanitize_text()
+on the whole text, holding only the unfinished tail in memory.
+"""
+
+import codecs
+import re
+from typing import BinaryIO, Iterable, Iterator
+
+
+# Special tokens that cause issues with tiktoken
+PROBLEMATIC_TOKENS = (
+    '<|endoftext|>',
+    '<|end_of_text|>',
+    '<|fim_prefix|>',
+    '<|fim_middle|>',
+    '<|fim_suffix|>',
+    '<|fim_pad|>',
+    '<|startoftext|>',
+    '<|start_of_text|>',
+)
+
+# Pattern: <|...|> or [|...|] or &lt;|...|&gt; where ... contains endoftext, etc.
+TOKEN_PATTERNS = (
+    # Standard format with pipes
+    r'<\|endoftext\|>',
+    r'<\|end_of_text\|>',
+    r'<\|end\s*of\s*text\|>',  # Handle spaces: <|end of text|>
+    r'<\|fim_prefix\|>',
+    r'<\|fim_middle\|>',
+    r'<\|fim_suffix\|>',
+    r'<\|fim_pad\|>',
+    r'<\|startoftext\|>',
+    r'<\|start_of_text\|>',
+    r'<\|start\s*of\s*text\|>',  # Handle spaces: <|start of text|>
+    # Square brackets
+    r'\[\|endoftext\|\]',
+    r'\[\|end_of_text\|\]',
+    r'\[\|end\s*of\s*text\|\]',
+    # HTML entities
+    r'&lt;\|endoftext\|&gt;',
+    r'&lt;\|end_of_text\|&gt;',
+    # Without pipes (just brackets)
+    r'<endoftext>',
+    r'<end_of_text>',
+    r'\[endoftext\]',
+    # Case variations (comprehensive)
+    r'<\|[Ee][Nn][Dd][Oo][Ff][Tt][Ee][Xx][Tt]\|>',
+    r'<\|[Ss][Tt][Aa][Rr][Tt][Oo][Ff][Tt][Ee][Xx][Tt]\|>',
+)
+
+# Catch-all for any <|...|> with common token names inside
+CATCH_ALL_PATTERNS = (
+    r'<\|[^|]*end[^|]*text[^|]*\|>',  # <|anything with "end" and "text"|>
+    r'<\|[^|]*start[^|]*text[^|]*\|>',  # <|anything with "start" and "text"|>
+    r'<\|[^|]*fim[^|]*\|>',  # <|anything with "fim"|>
+)
+
+SUSPICIOUS_PATTERN = r'<\|[^|]*(?:end|start|fim)[^|]*\|>'
+
+# Token patterns that need no pipe; they are the only ones that can match text
+# without special-token syntax
+_BRACKET_ONLY_PATTERNS = tuple(pattern for pattern in TOKEN_PATTERNS if '|' not in pattern)
+
+# Every other pattern starts with one of these (case-insensitively)
+_TOKEN_SYNTAX_RE = re.compile(r'<\||\[\||&lt;\|', re.IGNORECASE)
+
+_BRACKET_ONLY_RE = re.compile('|'.join(_BRACKET_ONLY_PATTERNS), re.IGNORECASE)
+
+# Literal tokens in their <|...|>, &lt;|...|&gt; and [|...|] forms. No two overlap and none
+# contains whitespace, so one alternation pass removes exactly what repeated str.replace did.
+_LITERAL_TOKENS_RE = re.compile('|'.join(
+    re.escape(variant)
+    for token in PROBLEMATIC_TOKENS
+    for variant in (token, token.replace('<', '&lt;').replace('>', '&gt;'), token.replace('<', '[').replace('>', ']'))
+))
+_TOKEN_RES = tuple(re.compile(pattern, re.IGNORECASE) for pattern in TOKEN_PATTERNS + CATCH_ALL_PATTERNS)
+_SUSPICIOUS_RE = re.compile(SUSPICIOUS_PATTERN, re.IGNORECASE)
+
+
+def _collapse_whitespace(text: str) -> str:
+    """Same result as re.sub(r'\\s+', ' ', text).strip(), without a regex pass."""
+    return ' '.join(text.split())
+
+
+def sanitize_text(text: str) -> str:
+    """
+    Sanitize text by removing or replacing special tokens that cause issues with tiktoken encoding.
+    FinChat's tiktoken encoder throws errors when encountering certain special tokens like <|endoftext|>.
+    Also replaces '$' signs with 'USD' to avoid conflicts with COT parameter syntax.
+
+    Args:
+        text: Input text that may contain problematic special tokens
+
+    Returns:
+        Sanitized text with special tokens removed or replaced
+    """
+    if not text:
+        return text
+
+    # Replace '$' signs with 'USD' to avoid conflicts with COT parameter syntax ($param:value)
+    sanitized = str(text).replace('$', 'USD')
+
+    if '|' not in sanitized or not _TOKEN_SYNTAX_RE.search(sanitized):
+        return _collapse_whitespace(_BRACKET_ONLY_RE.sub(' ', sanitized))
+
+    sanitized = _LITERAL_TOKENS_RE.sub(' ', sanitized)
+    for pattern in _TOKEN_RES:
+        sanitized = pattern.sub(' ', sanitized)
+
+    # Clean up multiple spaces that might result from replacements (stripping early
+    # does not change what the patterns below match)
+    sanitized = _collapse_whitespace(sanitized)
+
+    # Final check: if text still contains suspicious patterns, log a warning
+    if '<|' in sanitized or '|>' in sanitized:
+        suspicious_pattern = _SUSPICIOUS_RE.search(sanitized)
+        if suspicious_pattern:
+            print(f"WARNING: Suspicious token pattern found after sanitization: {suspicious_pattern.group()}")
+            # Remove it aggressively
+            sanitized = _collapse_whitespace(_SUSPICIOUS_RE.sub(' ', sanitized))
+
+    return sanitized
+
+
+class StreamingSanitizer:
+    """
+    Incremental sanitize_text(). feed() chunks as they arrive and close() at the end;
+    the concatenated return values equal sanitize_text() of the concatenated chunks.
+
+    Text is sanitized in segments cut at whitespace where no pipe-delimited token can
+    be open. Every pattern match (at any pass, including matches exposed by removing a
+    nested token) is bracketed by an opening pipe ('<|', '[|', '&lt;|') and a closing
+    pipe ('|>', '|]', '|&gt;') and contains no whitespace outside them, so a cut where
+    every opening pipe has been closed (or a bare '|' intervened) splits no match. A
+    token that is opened and never closed keeps the rest of the text buffered, which
+    is what exact equivalence requires.
+    """
+
+    def __init__(self, segment_size: int = 64 * 1024):
+        self.segment_size = segment_size
+        self._buffer = ''
+        self._scanned = 0  # Pipes before this buffer index have been classified
+        self._depth = 0  # Opening pipes that are not closed yet
+        self._zero_from = 0  # Start of the current stretch with depth 0
+        self._cut = 0  # Latest safe cut found (0: none)
+        self._emitted = False
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk; returns the sanitized text that is final so far (possibly '')."""
+        self._buffer += chunk
+        if len(self._buffer) < self.segment_size:
+            return ''
+        self._scan()
+        if not self._cut:
+            return ''
+        cut = self._cut
+        segment, self._buffer = self._buffer[:cut], self._buffer[cut:]
+        self._scanned -= cut
+        self._zero_from = max(self._zero_from - cut, 0)
+        self._cut = 0
+        return self._emit(segment)
+
+    def close(self) -> str:
+        """Sanitize whatever is still buffered; returns the last piece of output."""
+        segment, self._buffer = self._buffer, ''
+        self._scanned = self._depth = self._zero_from = self._cut = 0
+        return self._emit(segment)
+
+    def _emit(self, segment: str) -> str:
+        sanitized = sanitize_text(segment)
+        if not sanitized:
+            return ''
+        # Segments start at whitespace, so their words are separated by exactly one space
+        if self._emitted:
+            sanitized = ' ' + sanitized
+        self._emitted = True
+        return sanitized
+
+    def _scan(self):
+        buffer = self._buffer
+        # A pipe's role depends on up to 4 following characters ('|&gt;')
+        limit = len(buffer) - 4
+        position = self._scanned
+        while True:
+            pipe = buffer.find('|', position, limit)
+            if pipe < 0:
+                break
+            # Conservative: ';' stands in for '&lt;' and '&' for '&gt;'
+            if pipe and buffer[pipe - 1] in '<[;':
+                if not self._depth:
+                    self._note_cut(self._zero_from, pipe)
+                self._depth += 1
+            elif buffer[pipe + 1] in '>]&':
+                if self._depth:
+                    self._depth -= 1
+                    if not self._depth:
+                        self._zero_from = pipe + 1
+            elif self._depth:
+                # A bare pipe is never removed and no match crosses it
+                self._depth = 0
+                self._zero_from = pipe + 1
+            position = pipe + 1
+        self._scanned = max(position, limit)
+        if not self._depth:
+            self._note_cut(self._zero_from, self._scanned)
+
+    def _note_cut(self, start: int, end: int):
+        cut = max(self._buffer.rfind(' ', start, end), self._buffer.rfind('\n', start, end))
+        if cut > self._cut:
+            self._cut = cut
+
+
+def sanitize_stream(chunks: Iterable[str], segment_size: int = 64 * 1024) -> Iterator[str]:
+    """Yield sanitized pieces of a chunked text; ''.join() of them equals sanitize_text() of it."""
+    sanitizer = StreamingSanitizer(segment_size)
+    for chunk in chunks:
+        piece = sanitizer.feed(chunk)
+        if piece:
+            yield piece
+    piece = sanitizer.close()
+    if piece:
+        yield piece
+
+
+def sanitize_file(stream: BinaryIO, encoding: str = 'utf-8', chunk_size: int = 64 * 1024) -> str:
+    """
+    Sanitize a binary stream (e.g. an uploaded file) without reading it into memory first.
+    Undecodable bytes are replaced, as for form fields.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+
+    def chunks():
+        while True:
+            data = stream.read(chunk_size)
+            if not data:
+                break
+            yield decoder.decode(data)
+        yield decoder.decode(b'', final=True)
+
+    return ''.join(sanitize_stream(chunks(), segment_size=chunk_size))
+
+
+def reference_sanitize_text(text: str) -> str:
+    """
+    Original multi-pass sanitizer. sanitize_text() must produce identical output;
+    this is kept as the oracle for the equivalence tests and the benchmark.
+    """
+    if not text:
+        return text
+
+    sanitized = str(text)  # Ensure it's a string
+
+    # Replace '$' signs with 'USD' to avoid conflicts with COT parameter syntax ($param:value)
+    sanitized = sanitized.replace('$', 'USD')
+
+    # First, do exact replacements (case-sensitive) - multiple passes to catch nested cases
+    for _ in range(3):  # Multiple passes to catch overlapping patterns
+        for token in PROBLEMATIC_TOKENS:
+            sanitized = sanitized.replace(token, ' ')
+            # Also try with different bracket styles
+            sanitized = sanitized.replace(token.replace('<', '&lt;').replace('>', '&gt;'), ' ')
+            sanitized = sanitized.replace(token.replace('<', '[').replace('>', ']'), ' ')
+
+    for pattern in TOKEN_PATTERNS:
+        sanitized = re.sub(pattern, ' ', sanitized, flags=re.IGNORECASE)
+
+    for pattern in CATCH_ALL_PATTERNS:
+        sanitized = re.sub(pattern, ' ', sanitized, flags=re.IGNORECASE)
+
+    # Clean up multiple spaces that might result from replacements
+    sanitized = re.sub(r'\s+', ' ', sanitized)
+
+    # Final check: if text still contains suspicious patterns, log a warning
+    if '<|' in sanitized or '|>' in sanitized:
+        # Check if it's a legitimate pattern (like <|user|> or <|assistant|>) or suspicious
+        suspicious_pattern = re.search(SUSPICIOUS_PATTERN, sanitized, re.IGNORECASE)
+        if suspicious_pattern:
+            print(f"WARNING: Suspicious token pattern found after sanitization: {suspicious_pattern.group()}")
+            # Remove it aggressively
+            sanitized = re.sub(SUSPICIOUS_PATTERN, ' ', sanitized, flags=re.IGNORECASE)
+            sanitized = re.sub(r'\s+', ' ', sanitized)
+
+    return sanitized.strip()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Pool of pre-created FinChat sessions.
+A background thread keeps ready sessions on hand so jobs can submit their
+COT without waiting for a create_session round-trip. Each session is handed
+out once; checkouts trigger a refill, and an empty pool falls back to
+creating a session on demand.
+
+Sessions that expire (or are still ready at shutdown) are passed to
+release_session when one is given. Without it they are only forgotten, and
+remain, unused, on the upstream side - so expired sessions are then replaced
+only after the next checkout, and an idle pool stops creating sessions.
+"""
+
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+
+class SessionPool:
+    """
+    Keeps between min_size and max_size unused sessions ready.
+
+    The target size starts at min_size, grows by one (up to max_size) each
+    time a checkout finds the pool empty, and shrinks back towards min_size
+    when sessions expire unused. Without release_session, expired sessions
+    are not replaced until the next checkout.
+    """
+
+    def __init__(
+        self,
+        create_session: Callable[[], str],
+        min_size: int = 2,
+        max_size: int = 10,
+        max_age_seconds: float = 900,
+        retry_seconds: float = 10,
+        name: str = 'session-pool',
+        release_session: Optional[Callable[[str], None]] = None
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            create_session: Callable creating one upstream session and returning its ID
+            min_size: Sessions kept ready when demand is low (0 disables pre-warming)
+            max_size: Upper bound on ready sessions
+            max_age_seconds: Sessions older than this are discarded instead of handed out
+            retry_seconds: Delay before creating sessions again after a failure
+            name: Name used for the maintainer thread and log messages
+            release_session: Optional callable deleting an unused upstream session by ID,
+                called for sessions that expire or are dropped at shutdown
+        """
+        self.create_session = create_session
+        self.min_size = max(0, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.max_age_seconds = max_age_seconds
+        self.retry_seconds = retry_seconds
+        self.name = name
+        self.release_session = release_session
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        # (session_id, created_at monotonic), oldest first
+        self._ready: Deque[Tuple[str, float]] = deque()
+        self._target = self.min_size
+        # Cleared when sessions expire unreleased, set again by the next checkout
+        self._refill = True
+        self._thread: Optional[threading.Thread] = None
+        self._shutdown = False
+        self._hits = 0
+        self._misses = 0
+        self._created = 0
+        self._expired = 0
+        self._errors = 0
+
+    def start(self):
+        """Start the maintainer thread (idempotent; no-op when pre-warming is disabled)."""
+        with self._lock:
+            if self._thread is not None or self._shutdown or self.max_size == 0:
+                return
+            self._thread = threading.Thread(target=self._maintain, name=self.name, daemon=True)
+            self._thread.start()
+
+    def shutdown(self):
+        """Stop refilling. Ready sessions are dropped (and released, with release_session)."""
+        with self._lock:
+            self._shutdown = True
+            dropped = [session_id for session_id, _ in self._ready]
+            self._ready.clear()
+        self._wake.set()
+        self._release(dropped)
+
+    def try_acquire(self) -> Optional[str]:
+        """
+        Take a ready session without blocking.
+
+        Returns:
+            A session ID, or None if the pool is empty (the caller creates its own)
+        """
+        self.start()
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            self._refill = True
+            while self._ready:
+                session_id, created_at = self._ready.popleft()
+                if now - created_at <= self.max_age_seconds:
+                    self._hits += 1
+                    break
+                expired.append(session_id)
+                self._expired += 1
+            else:
+                session_id = None
+                self._misses += 1
+                # Demand outran the pool: keep more sessions ready from now on
+                self._target = min(self.max_size, self._target + 1)
+        self._wake.set()
+        self._release(expired)
+        return session_id
+
+    def acquire(self) -> str:
+        """Take a ready session, or create one on demand if the pool is empty."""
+        return self.try_acquire() or self.create_session()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool size and hit/miss counters."""
+        with self._lock:
+            checkouts = self._hits + self._misses
+            return {
+                'ready': len(self._ready),
+                'target': self._target,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / checkouts, 4) if checkouts else 0.0,
+                'created': self._created,
+                'expired': self._expired,
+                'errors': self._errors,
+            }
+
+    def _drop_expired(self) -> List[str]:
+        """Discard sessions too old to hand out and return their IDs. Caller must hold the lock."""
+        cutoff = time.monotonic() - self.max_age_seconds
+        expired = []
+        while self._ready and self._ready[0][1] < cutoff:
+            expired.append(self._ready.popleft()[0])
+            self._expired += 1
+            # Sessions aging out unused means the pool is larger than demand
+            self._target = max(self.min_size, self._target - 1)
+        if expired and not self.release_session:
+            # They stay upstream: don't replace them until a checkout shows demand
+            self._refill = False
+        return expired
+
+    def _release(self, session_ids: List[str]):
+        """Release dropped sessions upstream (outside the lock; failures are only logged)."""
+        if not self.release_session:
+            return
+        for session_id in session_ids:
+            try:
+                self.release_session(session_id)
+            except Exception as e:
+                print(f"Error releasing session {session_id} in {self.name}: {e}")
+
+    def _maintain(self):
+        while True:
+            with self._lock:
+                if self._shutdown:
+                    return
+                expired = self._drop_expired()
+                missing = self._target - len(self._ready) if self._refill else 0
+            self._release(expired)
+            if missing <= 0:
+                # Wake on checkout, or in time to replace the oldest session when it expires
+                self._wake.wait(max(1.0, self.max_age_seconds / 4))
+                self._wake.clear()
+                continue
+
+            try:
+                session_id = self.create_session()
+            except Exception as e:
+                with self._lock:
+                    self._errors += 1
+                print(f"Error pre-creating session in {self.name}: {e}")
+                traceback.print_exc()
+                self._wake.wait(self.retry_seconds)
+                self._wake.clear()
+                continue
+
+            with self._lock:
+                shutdown = self._shutdown
+                if not shutdown:
+                    self._ready.append((session_id, time.monotonic()))
+                    self._created += 1
+            if shutdown:
+                # Created while the pool was shutting down: never handed out
+                self._release([session_id])
+                return
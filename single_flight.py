@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Single-flight coalescing of identical in-flight COT runs.
+The first job for a key leads the upstream run; identical jobs submitted
+while it is running attach to it and share its progress and result.
+"""
+
+import threading
+from typing import Any, Dict, List
+
+
+class SingleFlight:
+    """Tracks in-flight runs by key and the job IDs attached to each."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key -> job IDs attached to the run, leader first
+        self._flights: Dict[str, List[str]] = {}
+        self._led = 0
+        self._coalesced = 0
+
+    def join(self, key: str, job_id: str) -> bool:
+        """
+        Attach a job to the run for key, starting a new run if none is in flight.
+
+        Returns:
+            True if the job leads a new run (the caller must execute it),
+            False if it attached to a run already in flight
+        """
+        with self._lock:
+            attached = self._flights.get(key)
+            if attached is None:
+                self._flights[key] = [job_id]
+                self._led += 1
+                return True
+            if job_id not in attached:
+                attached.append(job_id)
+                self._coalesced += 1
+            return False
+
+    def leader(self, key: str) -> str:
+        """Get the job ID leading the run for key, or '' if none is in flight."""
+        with self._lock:
+            attached = self._flights.get(key)
+            return attached[0] if attached else ''
+
+    def attached(self, key: str, job_id: str) -> List[str]:
+        """
+        Get every job attached to the run for key.
+
+        Returns:
+            Attached job IDs (leader first), or [job_id] if no run is in flight for key
+        """
+        with self._lock:
+            attached = self._flights.get(key)
+            return list(attached) if attached else [job_id]
+
+    def finish(self, key: str, job_id: str) -> List[str]:
+        """
+        End the run for key. Later joins start a new run.
+
+        Returns:
+            Job IDs that were attached (leader first), or [job_id] if no run was in flight
+        """
+        with self._lock:
+            attached = self._flights.pop(key, None)
+            return attached if attached else [job_id]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get in-flight and coalescing counters."""
+        with self._lock:
+            return {
+                'in_flight': len(self._flights),
+                'attached_jobs': sum(len(attached) - 1 for attached in self._flights.values()),
+                'runs_started': self._led,
+                'jobs_coalesced': self._coalesced,
+            }
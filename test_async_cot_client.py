@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests for the asyncio FinChat COT client.
+Runs offline against an httpx mock transport - no FinChat access required.
+"""
+
+import asyncio
+import sys
+
+import httpx
+
+from async_cot_client import AsyncFinChatCOTClient
+
+
+def _mock_finchat():
+    """Mock FinChat API whose COT has finished by the time its chats are listed."""
+    calls = {'get_chats': 0}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path == '/api/v1/sessions/':
+            return httpx.Response(200, json={'id': 'session-1'})
+        if path == '/api/v1/chats/' and request.method == 'POST':
+            return httpx.Response(200, json={'id': 'chat-1', 'message': request.read().decode('utf-8')})
+        if path == '/api/v1/chats/':
+            calls['get_chats'] += 1
+            assert request.url.params['session_id'] == 'session-1'
+            return httpx.Response(200, json={'results': [
+                {'id': 'reply-1', 'respond_to': 'chat-1', 'result_id': 'result-1'}]})
+        if path == '/api/v1/results/result-1/':
+            return httpx.Response(200, json={'content': 'done'})
+        return httpx.Response(404)
+
+    return httpx.MockTransport(handler), calls
+
+
+def test_run_to_result():
+    """create_session -> run_cot -> get_chats -> get_result against the same endpoints as the sync client."""
+    transport, calls = _mock_finchat()
+
+    async def run():
+        client = AsyncFinChatCOTClient(base_url='http://finchat.test', transport=transport)
+        try:
+            session = await client.create_session()
+            chat = await client.run_cot(session['id'], 'ai-detector-e1', {'purpose': 'general', 'text': 'hi'})
+            assert 'cot ai-detector-e1 $purpose:general $text:hi' in chat['message']
+            reply = (await client.get_chats(session['id']))['results'][0]
+            assert reply['respond_to'] == chat['id']
+            return await client.get_result(reply['result_id'])
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == {'content': 'done'}
+    assert calls['get_chats'] == 1
+
+
+def main():
+    """Run all tests."""
+    for test in (test_run_to_result,):
+        test()
+        print(f"✓ {test.__name__}")
+    print("✓ All async COT client tests passed!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
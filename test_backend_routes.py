@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Tests for the Flask routes of the backend server, end to end through app.test_client()
+with a stub COT client in place of FinChat.
+Runs offline - no FinChat access required.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# backend_server reads its settings at import time: use memory-only stores, create sessions
+# on demand and poll fast. The environment is restored afterwards so other tests don't see it.
+_TEST_ENV = {
+    'JOB_STORE': 'memory',
+    'SESSION_POOL_MIN': '0',
+    'SESSION_POOL_MAX': '0',
+    'FINCHAT_BASE_URL': 'http://finchat.test',
+    'DOCUMENT_REGISTRY_PATH': '',
+    'COT_TIMING_PATH': '',
+    'RESULT_CACHE_DIR': '',
+    'PATTERNS_CACHE_PATH': os.path.join(tempfile.mkdtemp(), 'patterns-cache.json'),
+    'COT_POLL_INTERVAL': '0.05',
+    'COT_POLL_MAX_INTERVAL': '0.2',
+    'CHUNK_AUTO_CHARS': '0',
+}
+_saved_env = {name: os.environ.get(name) for name in _TEST_ENV}
+os.environ.update(_TEST_ENV)
+import backend_server  # noqa: E402
+for _name, _value in _saved_env.items():
+    if _value is None:
+        os.environ.pop(_name, None)
+    else:
+        os.environ[_name] = _value
+
+from job_queue import QueueFullError  # noqa: E402
+from job_table import JobRecord  # noqa: E402
+from pattern_index import Pattern, PatternIndex  # noqa: E402
+
+
+class FakeCOTClient:
+    """
+    Stands in for FinChatCOTClient. Every COT answers "Report: <text>"; while gate is
+    cleared, runs stay in progress (at 50%) so tests can attach to them or wait on them.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.gate = threading.Event()
+        self.gate.set()
+        self.sessions = 0
+        self.runs = []  # (session_id, cot_slug, parameters), index = chat number
+        self.chats = {}  # session_id -> [chat_id, ...]
+
+    def create_session(self):
+        with self.lock:
+            self.sessions += 1
+            return {'id': f'session-{self.sessions}'}
+
+    def run_cot(self, session_id, cot_slug, parameters):
+        with self.lock:
+            chat_id = f'chat-{len(self.runs)}'
+            self.runs.append((session_id, cot_slug, dict(parameters)))
+            self.chats.setdefault(session_id, []).append(chat_id)
+            return {'id': chat_id}
+
+    def get_chats(self, session_id):
+        with self.lock:
+            chat_ids = list(self.chats.get(session_id, []))
+        if not self.gate.is_set():
+            return {'results': [{'id': f'response-{chat_id}', 'respond_to': chat_id,
+                                 'metadata': {'current_progress': 50, 'total_progress': 100,
+                                              'current_step': 'Analyzing'}}
+                                for chat_id in chat_ids]}
+        return {'results': [{'id': f'response-{chat_id}', 'respond_to': chat_id, 'result_id': f'result-{chat_id}'}
+                            for chat_id in chat_ids]}
+
+    def get_result(self, result_id):
+        with self.lock:
+            _, _, parameters = self.runs[int(result_id.rsplit('-', 1)[1])]
+        return {'content': f"Report: {parameters.get('text') or parameters.get('paragraph')}"}
+
+    def texts_run(self):
+        """Texts sent to a COT so far, in order."""
+        with self.lock:
+            return [parameters.get('text') or parameters.get('paragraph') for _, _, parameters in self.runs]
+
+
+cot = FakeCOTClient()
+backend_server.get_cot_client = lambda: cot
+app = backend_server.app.test_client()
+
+# Long enough for the heuristic (at least 10 words); scores 37.5% AI
+SCORABLE = ('The quick brown fox jumps over the lazy dog. It was a sunny day and everyone '
+            'was happy to be outside in the park.')
+
+
+def _wait_for(predicate, timeout=10.0):
+    """Wait until predicate() is true or the timeout expires."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+def _status(job_id):
+    return app.get(f'/api/mcp/status/{job_id}').get_json()
+
+
+def _finished(job_id):
+    return _wait_for(lambda: _status(job_id)['status'] in ('completed', 'failed'))
+
+
+def test_analyze_runs_cot_then_serves_cache():
+    """A GO analysis runs the COT once; the same text again is served from the result cache."""
+    text = f'Cache me once. {time.time()}'
+    response = app.post('/api/mcp/analyze', json={'text': text})
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    assert _finished(job_id)
+    status = _status(job_id)
+    assert status['status'] == 'completed' and status['result'] == f'Report: {text}'
+
+    runs = len(cot.runs)
+    response = app.post('/api/mcp/analyze', json={'text': text})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['cached'] is True and body['result'] == f'Report: {text}'
+    assert len(cot.runs) == runs
+
+
+def test_identical_submissions_coalesce():
+    """A text already running attaches to that run; both jobs get its result from one COT."""
+    text = f'Coalesce me. {time.time()}'
+    cot.gate.clear()
+    try:
+        first = app.post('/api/mcp/analyze', json={'text': text}).get_json()['job_id']
+        assert _wait_for(lambda: text in cot.texts_run())
+        response = app.post('/api/mcp/analyze', json={'text': text})
+        assert response.status_code == 202
+        second = response.get_json()
+        assert second['coalesced'] is True
+    finally:
+        cot.gate.set()
+    assert _finished(first) and _finished(second['job_id'])
+    assert _status(second['job_id'])['result'] == f'Report: {text}'
+    assert cot.texts_run().count(text) == 1
+
+
+def test_analyze_rejects_bad_requests():
+    """Missing text, unknown options and a full queue are refused; unknown jobs are 404."""
+    assert app.post('/api/mcp/analyze', json={}).status_code == 400
+    assert app.post('/api/mcp/analyze', json={'text': 'x', 'chunk_by': 'page'}).status_code == 400
+    assert app.post('/api/mcp/analyze', json={'text': 'x', 'triage': True, 'triage_band': [80, 20]}).status_code == 400
+    assert app.post('/api/mcp/analyze-v2', json=['not', 'an', 'object']).status_code == 400
+    assert app.get('/api/mcp/status/no-such-job').status_code == 404
+
+    class FullQueue:
+        def submit(self, *args, **kwargs):
+            raise QueueFullError(1, 1)
+
+        def position(self, job_id):
+            return None
+
+    queue, processors = backend_server.job_queue, backend_server.JOB_PROCESSORS
+    backend_server.configure(FullQueue(), processors)
+    try:
+        response = app.post('/api/mcp/analyze-v2', json={'text': f'No room. {time.time()}'})
+    finally:
+        backend_server.configure(queue, processors)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(backend_server.JOB_QUEUE_RETRY_AFTER)
+
+
+def test_provisional_verdict_until_the_cot_finishes():
+    """A GO job reports the heuristic verdict at once and drops it when the COT result is in."""
+    cot.gate.clear()
+    try:
+        response = app.post('/api/mcp/analyze', json={'text': f'{SCORABLE} {time.time()}'})
+        body = response.get_json()
+        assert response.status_code == 202
+        assert body['provisional']['source'] == 'local-heuristic'
+        assert body['provisional']['verdict'] == 'LIKELY HUMAN-WRITTEN'
+        assert 'provisional' in _status(body['job_id'])
+    finally:
+        cot.gate.set()
+    assert _finished(body['job_id'])
+    assert 'provisional' not in _status(body['job_id'])
+
+
+def test_triage_settles_decisive_texts_without_cot():
+    """With triage, a score outside the band completes at once; an unscorable text escalates."""
+    runs = len(cot.runs)
+    response = app.post('/api/mcp/analyze', json={'text': SCORABLE, 'triage': True, 'triage_band': [50, 90]})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['triage'] == 'settled' and 'Settled by triage' in body['result']
+    assert len(cot.runs) == runs
+
+    response = app.post('/api/mcp/analyze', json={'text': f'Too short {time.time()}', 'triage': True})
+    assert response.status_code == 202 and response.get_json()['triage'] == 'escalated'
+    assert _finished(response.get_json()['job_id'])
+
+
+def test_long_poll_returns_on_change():
+    """?since=&wait= returns as soon as the job's version moves, or at once if it already has."""
+    cot.gate.clear()
+    try:
+        job_id = app.post('/api/mcp/analyze-v2', json={'text': f'Long-poll me. {time.time()}'}).get_json()['job_id']
+        assert _wait_for(lambda: _status(job_id).get('progress') == 65)
+        version = _status(job_id)['version']
+
+        stale = app.get(f'/api/mcp/status/{job_id}?since={version - 1}&wait=5').get_json()
+        assert stale['version'] == version
+
+        threading.Timer(0.3, cot.gate.set).start()
+        started = time.monotonic()
+        changed = app.get(f'/api/mcp/status/{job_id}?since={version}&wait=5').get_json()
+        assert changed['version'] > version
+        assert time.monotonic() - started < 4
+    finally:
+        cot.gate.set()
+    assert _finished(job_id)
+
+
+def test_stream_sends_progress_then_result():
+    """The SSE stream ends with the result event; unknown jobs are 404 and a full server is 503."""
+    job_id = app.post('/api/mcp/analyze', json={'text': f'Stream me. {time.time()}'}).get_json()['job_id']
+    response = app.get(f'/api/mcp/stream/{job_id}')
+    assert response.status_code == 200 and response.mimetype == 'text/event-stream'
+    body = response.get_data(as_text=True)
+    assert body.startswith(f'retry: {backend_server.SSE_RETRY_MS}')
+    assert 'event: result' in body and 'Report: Stream me.' in body
+
+    assert app.get('/api/mcp/stream/no-such-job').status_code == 404
+
+    slots = backend_server.sse_slots
+    backend_server.sse_slots = threading.BoundedSemaphore(1)
+    backend_server.sse_slots.acquire()
+    try:
+        response = app.get(f'/api/mcp/stream/{job_id}')
+    finally:
+        backend_server.sse_slots = slots
+    assert response.status_code == 503 and 'Retry-After' in response.headers
+
+
+def test_batch_triage_and_paging():
+    """A triaged batch settles decisive texts, runs the rest, and pages its items."""
+    short = f'Short text {time.time()}'
+    items = [SCORABLE, {'id': 'short', 'text': short}] + [f'{SCORABLE} Copy {n}.' for n in range(3)]
+    response = app.post('/api/mcp/analyze-batch', json={'items': items, 'triage': True, 'triage_band': [50, 90]})
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body['total'] == 5 and body['triage'] == {'skipped': 4, 'escalated': 1}
+    batch_id = body['batch_id']
+
+    assert _wait_for(lambda: app.get(f'/api/mcp/batch/{batch_id}').get_json()['status'] == 'completed')
+    assert app.get(f'/api/mcp/batch/{batch_id}').get_json()['counts']['completed'] == 5
+    assert cot.texts_run().count(short) == 1
+
+    page = app.get(f'/api/mcp/batch/{batch_id}/items?offset=1&limit=2').get_json()
+    assert page['total'] == 5 and [item['index'] for item in page['items']] == [1, 2]
+    assert page['items'][0]['id'] == 'short' and page['items'][0]['result'] == f'Report: {short}'
+
+    assert app.post('/api/mcp/analyze-batch', json={'items': []}).status_code == 400
+    assert app.post('/api/mcp/analyze-batch', json={'items': ['x'], 'mode': 'all'}).status_code == 400
+    assert app.post('/api/mcp/analyze-batch', json=[{'text': 'x'}]).status_code == 400
+    assert app.get('/api/mcp/batch/no-such-batch').status_code == 404
+    assert app.get('/api/mcp/batch/no-such-batch/items').status_code == 404
+
+
+def test_chunked_analysis_and_incremental_rerun():
+    """Chunks run as their own COTs; a resubmission with previous_job_id reruns only changed chunks."""
+    stamp = time.time()
+    paragraphs = [f'First paragraph {stamp}.', f'Second paragraph {stamp}.', f'Third paragraph {stamp}.']
+    response = app.post('/api/mcp/analyze-v2', json={'text': '\n\n'.join(paragraphs), 'chunk_by': 'content',
+                                                     'chunk_tokens': 12})
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body['chunks'] == 3
+    assert _finished(body['job_id'])
+    status = _status(body['job_id'])
+    assert status['status'] == 'completed'
+    assert all(f'Report: {paragraph}' in status['result'] for paragraph in paragraphs)
+
+    runs = len(cot.runs)
+    paragraphs[1] = f'Second paragraph, edited {stamp}.'
+    response = app.post('/api/mcp/analyze-v2', json={'text': '\n\n'.join(paragraphs), 'chunk_tokens': 12,
+                                                     'previous_job_id': body['job_id']})
+    body = response.get_json()
+    assert body['diff']['unchanged'] == 2 and body['diff']['changed'] == 1
+    assert _finished(body['job_id'])
+    assert f'Report: {paragraphs[1]}' in _status(body['job_id'])['result']
+    assert cot.texts_run()[runs:] == [paragraphs[1]]
+
+
+def test_local_analyze():
+    """The heuristic scores one text or a list, and rejects bodies it cannot score."""
+    response = app.post('/api/local/analyze', json={'text': SCORABLE})
+    assert response.status_code == 200 and response.get_json()['aiProbability'] == '37.5'
+
+    results = app.post('/api/local/analyze', json={'texts': [SCORABLE, 'too short']}).get_json()['results']
+    assert 'aiProbability' in results[0] and 'error' in results[1]
+
+    assert app.post('/api/local/analyze', json={'text': 'too short'}).status_code == 400
+    assert app.post('/api/local/analyze', json={'texts': []}).status_code == 400
+    assert app.post('/api/local/analyze', json=[SCORABLE]).status_code == 400
+
+
+def test_pattern_scan_and_health():
+    """Scans find listed phrases; a pattern index that fails to load is a 503 and shows in /health."""
+    index, info = backend_server._pattern_index, backend_server._pattern_index_info
+    load_or_build = backend_server.load_or_build
+    try:
+        backend_server._pattern_index = PatternIndex([Pattern('rich tapestry', 'cliche', 'a.pdf')])
+        response = app.post('/api/patterns/scan', json={'text': 'A rich tapestry of ideas.'})
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body['count'] == 1 and body['categories'] == {'cliche': 1}
+        assert body['matches'][0]['start'] == 2
+        assert app.post('/api/patterns/scan', json={'text': ' '}).status_code == 400
+
+        def broken(paths, cache_path):
+            raise ImportError('No module named pypdf')
+
+        backend_server._pattern_index = None
+        backend_server.load_or_build = broken
+        response = app.post('/api/patterns/scan', json={'text': 'A rich tapestry of ideas.'})
+        assert response.status_code == 503 and 'pypdf' in response.get_json()['error']
+        health = app.get('/health').get_json()
+        assert health['status'] == 'ok' and health['cot_configured'] is True
+        assert health['pattern_index']['state'] == 'error' and 'pypdf' in health['pattern_index']['error']
+    finally:
+        backend_server._pattern_index, backend_server._pattern_index_info = index, info
+        backend_server.load_or_build = load_or_build
+
+
+def test_recover_jobs_resumes_submitted_cots():
+    """Unfinished jobs are re-queued on start: a submitted COT is polled again, an unknown one fails."""
+    text = f'Recover me. {time.time()}'
+    session_id = cot.create_session()['id']
+    chat_id = cot.run_cot(session_id, 'ai-detector-e1', {'purpose': 'general', 'text': text})['id']
+    runs = len(cot.runs)
+    record = JobRecord('recovered-job', status='processing', progress=40, created_at='2000-01-01T00:00:00',
+                       session_id=session_id, cot_chat_id=chat_id, cot_started_at=time.time())
+    backend_server.job_store.save('recovered-job', record.to_dict(),
+                                  payload={'kind': 'go', 'text': text, 'purpose': 'general'})
+    lost = JobRecord('lost-job', status='pending', created_at='2000-01-01T00:00:01')
+    backend_server.job_store.save('lost-job', lost.to_dict())
+
+    assert backend_server.recover_jobs() == 1
+    assert _finished('recovered-job')
+    assert _status('recovered-job')['result'] == f'Report: {text}'
+    assert len(cot.runs) == runs
+    lost_status = _status('lost-job')
+    assert lost_status['status'] == 'failed' and 'restart' in lost_status['error']
+
+
+def main():
+    """Run all tests."""
+    for test in (
+        test_analyze_runs_cot_then_serves_cache,
+        test_identical_submissions_coalesce,
+        test_analyze_rejects_bad_requests,
+        test_provisional_verdict_until_the_cot_finishes,
+        test_triage_settles_decisive_texts_without_cot,
+        test_long_poll_returns_on_change,
+        test_stream_sends_progress_then_result,
+        test_batch_triage_and_paging,
+        test_chunked_analysis_and_incremental_rerun,
+        test_local_analyze,
+        test_pattern_scan_and_health,
+        test_recover_jobs_resumes_submitted_cots,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
+    print("✓ All backend route tests passed!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for batch fan-out with a per-batch concurrency cap.
+Runs offline - no FinChat access required.
+"""
+
+import sys
+import time
+
+from batch import BatchManager, STARTED, FINISHED, RETRY
+
+
+def test_concurrency_cap_and_completion():
+    """At most `concurrency` items are in flight; finishing one starts the next."""
+    started = []
+    manager = BatchManager(lambda batch, item: started.append(item.job_id) or STARTED)
+    batch = manager.create([{'id': i, 'text': f'text {i}'} for i in range(3)], ['go', 'go2'], concurrency=2)
+    assert len(batch.items) == 6
+    assert [item.kind for item in batch.items[:2]] == ['go', 'go2']
+
+    manager.dispatch(batch)
+    assert started == [batch.items[0].job_id, batch.items[1].job_id]
+    # Started items release their text
+    assert batch.items[0].text is None and batch.items[2].text == 'text 1'
+
+    for item in batch.items:
+        manager.job_finished(batch.batch_id, item.job_id)
+        assert len(batch.in_flight) <= 2
+    assert batch.is_finished and batch.completed_at is not None
+    assert len(started) == 6
+    # Unknown batches and repeated notifications are ignored
+    manager.job_finished(batch.batch_id, batch.items[0].job_id)
+    manager.job_finished('missing', 'job')
+    assert batch.finished == 6
+
+
+def test_immediately_finished_items_do_not_hold_slots():
+    """Items finished by start_item (cache hits) are counted without occupying a slot."""
+    manager = BatchManager(lambda batch, item: FINISHED)
+    batch = manager.create([{'text': 'a'}, {'text': 'b'}, {'text': 'c'}], ['go'], concurrency=1)
+    manager.dispatch(batch)
+    assert batch.is_finished
+    assert manager.stats()['active'] == 0
+
+
+def test_retry_when_queue_full():
+    """A RETRY outcome leaves the item waiting and dispatches again later."""
+    outcomes = [RETRY, STARTED]
+    manager = BatchManager(lambda batch, item: outcomes.pop(0) if outcomes else STARTED, retry_seconds=0.05)
+    batch = manager.create([{'text': 'a'}], ['go'], concurrency=1)
+    manager.dispatch(batch)
+    assert batch.next_index == 0
+
+    deadline = time.time() + 2
+    while batch.next_index == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert batch.next_index == 1
+    assert batch.in_flight == {batch.items[0].job_id}
+
+
+def test_failed_items_are_retried_until_attempts_run_out():
+    """A failed job runs again (same job, before new items) until max_attempts; then it is finished."""
+    started, finished = [], []
+    manager = BatchManager(lambda batch, item: started.append((item.job_id, item.attempts)) or STARTED,
+                           item_finished=lambda batch, item: finished.append(item.index))
+    batch = manager.create([{'text': 'a'}, {'text': 'b'}], ['go'], concurrency=1, max_attempts=2,
+                           parent_job_id='parent')
+    first, second = batch.items
+    manager.dispatch(batch)
+
+    manager.job_finished(batch.batch_id, first.job_id, failed=True)
+    assert started == [(first.job_id, 0), (first.job_id, 1)]
+    assert first.text is None and second.text == 'b'
+    manager.job_finished(batch.batch_id, first.job_id, failed=True)
+    assert finished == [0] and started[-1] == (second.job_id, 0)
+    manager.job_finished(batch.batch_id, second.job_id)
+    assert finished == [0, 1] and batch.is_finished and batch.parent_job_id == 'parent'
+
+
+def main():
+    """Run all tests."""
+    for test in (
+        test_concurrency_cap_and_completion,
+        test_immediately_finished_items_do_not_hold_slots,
+        test_retry_when_queue_full,
+        test_failed_items_are_retried_until_attempts_run_out,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
+    print("✓ All batch tests passed!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for splitting long documents into chunks and merging the per-chunk results.
+Runs offline - no FinChat access required.
+"""
+
+import sys
+
+from chunking import (CHARS_PER_TOKEN, chunk_hash, merge_verdicts, split_content_defined, split_text,
+                      stitch_chunks)
+
+
+DOCUMENT = (
+    "The first paragraph opens the report. It has two sentences.\n\n"
+    "The second paragraph is longer. It keeps going for a while. Then it stops!\n\n\n"
+    "  A third paragraph closes it."
+)
+
+
+def test_paragraphs_are_packed_up_to_the_budget():
+    """Whole paragraphs are packed into a chunk while they fit; separators are kept for stitching."""
+    chunks = split_text(DOCUMENT, 'paragraph', max_tokens=40)
+    assert [chunk.text for chunk in chunks] == [
+        "The first paragraph opens the report. It has two sentences.\n\n"
+        "The second paragraph is longer. It keeps going for a while. Then it stops!",
+        "A third paragraph closes it.",
+    ]
+    assert [chunk.separator for chunk in chunks] == ['\n\n', '']
+    assert len(split_text(DOCUMENT, 'paragraph', max_tokens=1000)) == 1
+
+
+def test_oversized_units_fall_back_to_finer_boundaries():
+    """A paragraph over the budget is cut at sentences, and a sentence over it at words."""
+    chunks = split_text(DOCUMENT, 'paragraph', max_tokens=10)
+    assert all(len(chunk.text) <= 10 * CHARS_PER_TOKEN for chunk in chunks)
+    assert chunks[0].text == "The first paragraph opens the report."
+    assert chunks[0].separator == ' ' and chunks[1].separator == '\n\n'
+
+    words = split_text('one two three four five six', 'sentence', max_tokens=2)
+    assert [chunk.text for chunk in words] == ['one two', 'three', 'four', 'five six']
+    assert [chunk.text for chunk in split_text('x' * 10, 'tokens', max_tokens=1)] == ['xxxx', 'xxxx', 'xx']
+
+
+def test_stitching_restores_document_order_and_breaks():
+    """Stitched outputs keep the original paragraph and sentence breaks between chunks."""
+    chunks = split_text(DOCUMENT, 'paragraph', max_tokens=10)
+    assert stitch_chunks([chunk.text for chunk in chunks], [chunk.separator for chunk in chunks]) == (
+        "The first paragraph opens the report. It has two sentences.\n\n"
+        "The second paragraph is longer. It keeps going for a while. Then it stops!\n\n"
+        "A third paragraph closes it."
+    )
+    assert stitch_chunks([' a ', 'b'], []) == 'a\n\nb'
+
+
+def test_merged_report_lists_chunks_errors_and_verdicts():
+    """The aggregated report has one section per chunk and a summary with failures and verdicts."""
+    report = merge_verdicts([
+        {'preview': 'First chunk', 'result': 'VERDICT: Likely AI\nDetails...'},
+        {'preview': 'Second chunk', 'error': 'COT timed out'},
+        {'preview': 'Third chunk', 'result': '**VERDICT:** Likely AI'},
+    ])
+    assert '(Chunked Analysis - 3 chunk(s))' in report
+    assert '[Chunk 2/3]\n"Second chunk"\n\n⚠️ Error: COT timed out' in report
+    assert 'Successfully Analyzed: 2\nFailed: 1\nVerdicts: Likely AI (2)' in report
+    assert 'No results available.' in merge_verdicts([])
+
+
+def test_content_defined_chunks_survive_an_edit():
+    """Editing one paragraph changes only the chunks around it; the rest keep their hashes."""
+    paragraphs = [f"Paragraph {number} discusses point {number * 7} at some length. It then ends." for number in range(30)]
+    before = split_content_defined('\n\n'.join(paragraphs), max_tokens=60)
+    assert all(len(chunk.text) <= 60 * CHARS_PER_TOKEN for chunk in before)
+    assert stitch_chunks([chunk.text for chunk in before], [chunk.separator for chunk in before]) == '\n\n'.join(paragraphs)
+
+    paragraphs[12] = "A rewritten paragraph that is quite a bit longer than the one it replaces, on purpose."
+    after = [chunk_hash(chunk.text) for chunk in split_content_defined('\n\n'.join(paragraphs), max_tokens=60)]
+    unchanged = {chunk_hash(chunk.text) for chunk in before}
+    assert sum(1 for digest in after if digest not in unchanged) <= 2
+    assert len(before) > 4
+
+
+def test_merged_report_marks_fresh_and_cached_chunks():
+    """Once a chunk result is reused, every analyzed chunk is labelled fresh or from cache."""
+    report = merge_verdicts([
+        {'preview': 'First chunk', 'result': 'VERDICT: Human', 'cached': True},
+        {'preview': 'Second chunk', 'result': 'VERDICT: Human', 'cached': False},
+        {'preview': 'Third chunk', 'error': 'COT timed out'},
+    ])
+    assert '[Chunk 1/3] (from cache)' in report and '[Chunk 2/3] (fresh)' in report
+    assert '[Chunk 3/3]\n' in report
+    assert 'Fresh: 1\nFrom cache: 1\nFailed: 1' in report
+    assert '(fresh)' not in merge_verdicts([{'preview': 'Only', 'result': 'VERDICT: Human'}])
+
+
+def main():
+    """Run all tests."""
+    for test in (
+        test_paragraphs_are_packed_up_to_the_budget,
+        test_oversized_units_fall_back_to_finer_boundaries,
+        test_stitching_restores_document_order_and_breaks,
+        test_merged_report_lists_chunks_errors_and_verdicts,
+        test_content_defined_chunks_survive_an_edit,
+        test_merged_report_marks_fresh_and_cached_chunks,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
+    print("✓ All chunking tests passed!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
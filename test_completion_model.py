@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for learned COT completion times (poll schedule and ETA).
+Runs offline - no FinChat access required.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from completion_model import CompletionModel, length_bucket
+from cot_client import FinChatCOTClient
+
+
+class _FakeV2Session:
+    """Stands in for the client's requests session: a v2 run that finishes after finish_after seconds."""
+
+    def __init__(self, finish_after):
+        self.finish_after = finish_after
+        self.started = None
+        self.polls = 0
+
+    def post(self, url, **kwargs):
+        self.started = time.monotonic()
+        return _FakeResponse({'id': 'run-session'})
+
+    def get(self, url, **kwargs):
+        self.polls += 1
+        if time.monotonic() - self.started < self.finish_after:
+            return _FakeResponse({'status': 'loading', 'results': []})
+        return _FakeResponse({'status': 'idle', 'results': [{'content': 'report'}]})
+
+    def close(self):
+        pass
+
+
+class _FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+def test_estimate_falls_back_from_bucket_to_slug_to_default():
+    """Buckets are used once they have min_samples runs; until then the slug, then the prior."""
+    model = CompletionModel(min_samples=3, default_seconds=600)
+    assert model.estimate('slug', 100)['basis'] == 'default'
+
+    for seconds in (100, 120, 140):
+        model.record('slug', 100, seconds)
+    short = model.estimate('slug', 100)
+    assert short['basis'] == 'bucket' and short['p50'] == 120
+    # A long text has no history of its own yet and uses every run of the slug
+    assert model.estimate('slug', 50000)['basis'] == 'slug'
+    assert model.estimate('other', 100)['basis'] == 'default'
+    assert length_bucket(100) != length_bucket(50000)
+
+    snapshot = model.snapshot()['distributions']['slug']
+    assert snapshot['all']['samples'] == 3 and snapshot[length_bucket(100)]['used']
+
+
+def test_poll_schedule_is_sparse_early_dense_near_finish_and_backs_off():
+    """Delays shrink towards the 10th percentile, stay at the minimum until the 90th, then grow."""
+    model = CompletionModel(min_samples=1)
+    for seconds in range(500, 701, 10):
+        model.record('slug', 100, seconds)
+
+    early = model.next_poll_delay('slug', 100, 0, 5, 60)
+    later = model.next_poll_delay('slug', 100, 450, 5, 60)
+    assert early == 60 and 5 < later < early
+    assert model.next_poll_delay('slug', 100, 600, 5, 60) == 5
+    assert 5 < model.next_poll_delay('slug', 100, 800, 5, 60) <= 60
+    # Without history polling is dense from the start, as before
+    assert model.next_poll_delay('unknown', 100, 0, 5, 60) == 5
+
+    eta = model.eta('slug', 100, 300)
+    assert eta['seconds'] == 300 and eta['low'] < eta['seconds'] < eta['high'] and not eta['overdue']
+    overdue = model.eta('slug', 100, 1000)
+    assert overdue['overdue'] and overdue['seconds'] is None
+
+
+def test_history_survives_restart():
+    """With a path, samples are saved on every record and loaded by a new model."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'timings.json')
+        model = CompletionModel(min_samples=2, path=path)
+        model.record('slug', 100, 200)
+        model.record('slug', 100, 300)
+
+        reloaded = CompletionModel(min_samples=2, path=path)
+        assert reloaded.estimate('slug', 100)['p50'] == 250
+
+
+def test_v2_run_polls_on_the_learned_schedule():
+    """run_cot_v2 with a model estimates progress from p50, polls on its schedule and records the run."""
+    model = CompletionModel(min_samples=1)
+    for seconds in (0.4, 0.5, 0.6):
+        model.record('v2-slug', 4, seconds)
+    client = FinChatCOTClient(base_url='http://finchat.invalid')
+    client.session = _FakeV2Session(finish_after=0.5)
+    progress = []
+    result = client.run_cot_v2('cot-id', 'text', progress_callback=lambda p, status: progress.append(p),
+                               interval_seconds=0.02, max_interval_seconds=1, completion_model=model,
+                               cot_slug='v2-slug')
+
+    assert result['content'] == 'report'
+    # Sparse before p10 (0.4s), dense after: far fewer polls than a fixed 0.02s step would make
+    assert 3 <= client.session.polls <= 15, client.session.polls
+    assert max(p for p in progress if p < 100) >= 30  # Against p50 = 0.5s; the 600s default would show 0
+    assert model.estimate('v2-slug', 4)['samples'] == 4
+    client.close()
+
+
+def main():
+    """Run all tests."""
+    for test in (
+        test_estimate_falls_back_from_bucket_to_slug_to_default,
+        test_poll_schedule_is_sparse_early_dense_near_finish_and_backs_off,
+        test_history_survives_restart,
+        test_v2_run_polls_on_the_learned_schedule,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
+    print("✓ All completion model tests passed!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
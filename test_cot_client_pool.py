@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for connection pooling in the FinChat COT client.
+Runs offline against a local keep-alive HTTP server - no FinChat access required.
+"""
+
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cot_client import FinChatCOTClient
+
+
+class _FinChatHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep connections open between requests
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        # Cookies must not leak from one call to the next through the shared session
+        self.send_header('Set-Cookie', 'sessionid=abc; Path=/')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply({'results': [], 'cookie': self.headers.get('Cookie')})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._reply({'id': 'session-1'})
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FinChatHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def test_requests_reuse_one_connection():
+    """Sequential calls share one keep-alive connection, and the reuse shows in stats()."""
+    server, base_url = _serve()
+    client = FinChatCOTClient(base_url=base_url)
+    try:
+        assert client.create_session()['id'] == 'session-1'
+        for _ in range(4):
+            assert client.get_chats('session-1')['cookie'] is None
+        stats = client.stats()
+        assert stats['requests'] == 5
+        assert stats['connections_opened'] == 1
+        assert stats['connections_reused'] == 4 and stats['reuse_rate'] == 0.8
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def test_client_is_shared_across_threads():
+    """Concurrent threads use one client; connections are bounded by the pool, not by calls."""
+    server, base_url = _serve()
+    client = FinChatCOTClient(base_url=base_url, pool_maxsize=4)
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(10):
+                client.get_chats('session-1')
+        except Exception as e:
+            errors.append(e)
+
+    try:
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = client.stats()
+        assert not errors
+        assert stats['requests'] == 40
+        assert stats['connections_opened'] <= 4
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def main():
+    """Run all tests."""
+    for test in (test_requests_reuse_one_connection, test_client_is_shared_across_threads):
+        test()
+        print(f"✓ {test.__name__}")
+    print("✓ All COT client pooling tests passed!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared COT chat poller.
+Runs offline against a fake chat listing - no FinChat access required.
+"""
+
+import sys
+import threading
+import time
+
+from completion_model import CompletionModel
+from cot_poller import ChatPoller
+
+
+class FakeChats:
+    """Chat listings per session; tests mutate the response chats between polls."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.calls = []
+
+    def set(self, session_id, chat):
+        with self.lock:
+            chats = self.sessions.setdefault(session_id, {})
+            chats[chat['respond_to']] = chat
+
+    def __call__(self, session_id):
+        with self.lock:
+            self.calls.append(session_id)
+            return {'results': list(self.sessions.get(session_id, {}).values())}
+
+
+def _poller(fetch, **kwargs):
+    options = dict(interval_seconds=0.05, max_interval_seconds=0.2, tick_seconds=0.01, wheel_size=64)
+    options.update(kwargs)
+    return ChatPoller(fetch, **options)
+
+
+def test_one_listing_resolves_every_chat_in_a_session():
+    """Chats watched in the same session share each poll; progress is dispatched only on change."""
+    fetch = FakeChats()
+    poller = _poller(fetch)
+    progress = []
+    running = {'respond_to': 'chat-1', 'id': 'r1',
+               'metadata': {'current_progress': 1, 'total_progress': 4, 'current_step': 'Step 1'}}
+    fetch.set('s1', running)
+    first = poller.watch('s1', 'chat-1', lambda value, status: progress.append((value, status)))
+    second = poller.watch('s1', 'chat-2')
+
+    time.sleep(0.3)
+    assert progress == [(25, 'Step 1')]
+    fetch.set('s1', dict(running, result_id='result-1'))
+    fetch.set('s1', {'respond_to': 'chat-2', 'id': 'r2', 'result_id': 'result-2'})
+
+    assert first.result(timeout=2)['result_id'] == 'result-1'
+    assert second.result(timeout=2)['response_chat_id'] == 'r2'
+    assert progress[-1] == (100, 'completed')
+    assert set(fetch.calls) == {'s1'}
+    stats = poller.stats()
+    assert stats['completed'] == 2 and stats['watched_chats'] == 0
+    poller.shutdown()
+
+
+def test_rate_cap_limits_upstream_requests():
+    """Across many sessions, upstream listings stay under max_requests_per_second."""
+    fetch = FakeChats()
+    poller = _poller(fetch, interval_seconds=0.01, max_interval_seconds=0.01, max_requests_per_second=20)
+    for i in range(50):
+        poller.watch(f's{i}', 'chat')
+
+    time.sleep(1.0)
+    # One second of polling: an initial burst of at most 20 plus 20/s refill
+    assert 15 <= len(fetch.calls) <= 45
+    assert poller.stats()['deferred_by_rate_limit'] > 0
+    poller.shutdown()
+
+
+def test_errors_and_timeouts_fail_the_watch():
+    """An error response raises RuntimeError; a chat that never answers raises TimeoutError."""
+    fetch = FakeChats()
+    poller = _poller(fetch)
+    fetch.set('s1', {'respond_to': 'chat-1', 'intent': 'error', 'message': 'boom'})
+
+    try:
+        poller.wait('s1', 'chat-1')
+        assert False, "expected RuntimeError"
+    except RuntimeError as e:
+        assert 'boom' in str(e)
+
+    try:
+        poller.wait('s2', 'chat-2', timeout_seconds=0.2)
+        assert False, "expected TimeoutError"
+    except TimeoutError:
+        pass
+    assert poller.stats()['failed'] == 2
+    poller.shutdown()
+
+
+def test_watch_schedule_sets_poll_delay():
+    """A watch's next_delay decides when its session is polled again."""
+    fetch = FakeChats()
+    poller = _poller(fetch, max_interval_seconds=0.05)
+    poller.watch('sparse', 'chat', next_delay=lambda: 5)
+    poller.watch('dense', 'chat', next_delay=lambda: 0.02)
+
+    time.sleep(0.5)
+    assert fetch.calls.count('sparse') == 1
+    assert fetch.calls.count('dense') >= 5
+    poller.shutdown()
+
+
+def test_unchanged_session_backs_off_despite_schedule():
+    """While a chat does not change, the session's backoff is a floor under a next_delay above the interval."""
+    fetch = FakeChats()
+    poller = _poller(fetch, interval_seconds=0.02, max_interval_seconds=0.3, backoff=2)
+    poller.watch('quiet', 'chat', next_delay=lambda: 0.05)
+    time.sleep(0.6)
+    # Without the backoff this would be ~12 polls; with it 0, 0.05, 0.13, 0.29, 0.59
+    assert 3 <= fetch.calls.count('quiet') <= 7, fetch.calls.count('quiet')
+
+    progress = 0
+    while fetch.calls.count('quiet') < 12:
+        progress += 1
+        fetch.set('quiet', {'respond_to': 'chat', 'metadata': {'current_progress': progress % 100}})
+        time.sleep(0.01)
+        if progress > 200:
+            raise AssertionError('A changing chat must be polled at its own schedule')
+    poller.shutdown()
+
+
+def test_due_chat_is_polled_at_min_interval_while_unchanged():
+    """A watch asking for interval_seconds (inside its p10-p90 window) is not slowed by the session backoff."""
+    fetch = FakeChats()
+    poller = _poller(fetch, interval_seconds=0.02, max_interval_seconds=0.3, backoff=2)
+    model = CompletionModel(default_seconds=600)
+    # 600s into a run expected to take 0-900s: inside p10-p90, so the schedule asks for min_interval
+    poller.watch('due', 'chat', next_delay=lambda: model.next_poll_delay('cot', 1000, 600, 0.02, 0.3))
+    time.sleep(0.6)
+    # Backed off this would be 0, 0.04, 0.12, 0.28, 0.58; at min_interval it is ~30 polls
+    assert fetch.calls.count('due') >= 15, fetch.calls.count('due')
+    poller.shutdown()
+
+
+def main():
+    """Run all tests."""
+    for test in (
+        test_one_listing_resolves_every_chat_in_a_session,
+        test_rate_cap_limits_upstream_requests,
+        test_errors_and_timeouts_fail_the_watch,
+        test_watch_schedule_sets_poll_delay,
+        test_unchanged_session_backs_off_despite_schedule,
+        test_due_chat_is_polled_at_min_interval_while_unchanged,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
+    print("✓ All COT poller tests passed!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
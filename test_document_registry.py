@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for the registry of documents already uploaded to Consomme.
+Runs offline - no FinChat access required.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from document_registry import DocumentRegistry
+
+
+SHA = 'a' * 64
+
+
+def test_repeat_upload_is_a_hit_only_for_the_same_content():
+    """A known hash of the same size is attached by ID; other sizes and unknown hashes need an upload."""
+    registry = DocumentRegistry()
+    assert registry.lookup(SHA, 100) is None
+    registry.remember(SHA, 100, 'consomme-1', 'report.pdf')
+    assert registry.lookup(SHA, 100) == 'consomme-1'
+    assert registry.lookup(SHA, 101) is None
+    assert registry.lookup('b' * 64, 100) is None
+
+    registry.remember('c' * 64, 5, '')  # FinChat returned no consomme_id: nothing to reuse
+    stats = registry.stats()
+    assert stats['entries'] == 1 and stats['hits'] == 1 and stats['misses'] == 3
+    assert stats['hit_rate'] == 0.25 and stats['bytes_saved'] == 100
+
+
+def test_expiry_invalidation_and_capacity():
+    """Old IDs expire, rejected IDs are forgotten, and the least recently used entries go first."""
+    registry = DocumentRegistry(ttl_seconds=60, max_entries=2)
+    registry.remember(SHA, 1, 'old')
+    registry._entries[SHA]['uploaded_at'] = time.time() - 61
+    assert registry.lookup(SHA, 1) is None and registry.stats()['expired'] == 1
+
+    registry.remember('b' * 64, 1, 'b')
+    registry.remember('c' * 64, 1, 'c')
+    assert registry.lookup('b' * 64, 1) == 'b'
+    registry.remember('d' * 64, 1, 'd')  # Evicts 'c', used least recently
+    assert registry.lookup('c' * 64, 1) is None and registry.lookup('b' * 64, 1) == 'b'
+
+    hits = registry.stats()['hits']
+    assert registry.invalidate('b' * 64) and not registry.invalidate('b' * 64)
+    assert registry.lookup('b' * 64, 1) is None
+    assert registry.stats()['invalidated'] == 1 and registry.stats()['hits'] == hits - 1
+
+
+def test_registry_survives_restart():
+    """Uploads are remembered across restarts; entries that expired meanwhile are dropped on load."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'documents.json')
+        registry = DocumentRegistry(path=path)
+        registry.remember(SHA, 10, 'consomme-1', 'a.pdf')
+        registry.remember('b' * 64, 10, 'consomme-2', 'b.pdf')
+
+        assert DocumentRegistry(path=path).lookup(SHA, 10) == 'consomme-1'
+        registry._entries['b' * 64]['uploaded_at'] = time.time() - 3600
+        registry.remember('c' * 64, 10, 'consomme-3')
+        restarted = DocumentRegistry(ttl_seconds=1800, path=path)
+        assert restarted.stats()['entries'] == 2 and restarted.lookup('b' * 64, 10) is None
+
+
+def main():
+    """Run all tests."""
+    for test in (
+        test_repeat_upload_is_a_hit_only_for_the_same_content,
+        test_expiry_invalidation_and_capacity,
+        test_registry_survives_restart,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
+    print("✓ All document registry tests passed!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
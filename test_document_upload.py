@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for spooling uploaded documents and streaming them to FinChat.
+Runs offline against a local HTTP server - no FinChat access required.
+"""
+
+import hashlib
+import io
+import json
+import sys
+import threading
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from urllib3.filepost import encode_multipart_formdata
+
+from cot_client import FinChatCOTClient, MultipartStream
+from document_upload import UploadedDocument, spool_upload
+
+
+class _DocumentsHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    received = {}
+
+    def do_POST(self):
+        # Hash the body as it arrives, so the test server does not hold it either
+        remaining = int(self.headers['Content-Length'])
+        sha = hashlib.sha256()
+        while remaining:
+            block = self.rfile.read(min(remaining, 64 * 1024))
+            sha.update(block)
+            remaining -= len(block)
+        _DocumentsHandler.received = {'content_type': self.headers['Content-Type'], 'sha256': sha.hexdigest(),
+                                      'length': int(self.headers['Content-Length']),
+                                      'transfer_encoding': self.headers.get('Transfer-Encoding')}
+        body = json.dumps([{'id': 'doc-1'}]).encode('utf-8')
+        self.send_response(201)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_spool_stays_in_memory_only_below_threshold():
+    """Small uploads stay in memory, larger ones roll over to disk; both are hashed on the way."""
+    small = spool_upload(io.BytesIO(b'%PDF small'), 'dir/small.pdf', max_memory=1024)
+    large = spool_upload(io.BytesIO(b'x' * 200_000), 'large.pdf', max_memory=1024)
+    assert small.name == 'small.pdf' and small.size == 10 and not small.file._rolled
+    assert large.size == 200_000 and large.file._rolled
+    assert large.sha256 == hashlib.sha256(b'x' * 200_000).hexdigest()
+    assert small.open().read() == b'%PDF small'
+
+    small.close()
+    try:
+        small.open()
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError('A closed document must not be readable')
+    restored = UploadedDocument.from_dict(large.to_dict())
+    assert (restored.sha256, restored.file) == (large.sha256, None)
+    large.close()
+
+
+def test_multipart_stream_matches_encoded_body():
+    """The streamed body is byte-for-byte the multipart encoding of the same fields."""
+    content = bytes(range(256)) * 300
+    body = MultipartStream([('session', 's-1'), ('custom_properties', '[{"title": "T"}]')], 'files',
+                           'report.pdf', io.BytesIO(content), content_type='application/pdf')
+    streamed = b''.join(iter(lambda: body.read(1000), b''))
+
+    expected, content_type = encode_multipart_formdata(
+        [('session', 's-1'), ('custom_properties', '[{"title": "T"}]'),
+         ('files', ('report.pdf', content, 'application/pdf'))], boundary=body.boundary)
+    assert streamed == expected and len(body) == len(expected)
+    assert content_type == body.content_type
+
+
+def test_upload_streams_with_constant_memory():
+    """A large document is sent with a Content-Length and without being read into memory."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _DocumentsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = FinChatCOTClient(base_url=f'http://127.0.0.1:{server.server_address[1]}')
+    document = spool_upload(io.BytesIO(b'%PDF' + b'0123456789' * 2_000_000), 'big.pdf', max_memory=1024 * 1024)
+    try:
+        tracemalloc.start()
+        assert client.upload_document('s-1', file_obj=document.open(), file_name=document.name) == {'id': 'doc-1'}
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert peak < 2 * 1024 * 1024, f'Upload of a {document.size} byte document peaked at {peak} bytes'
+        assert _DocumentsHandler.received['content_type'].startswith('multipart/form-data; boundary=')
+        assert _DocumentsHandler.received['length'] > document.size
+        assert _DocumentsHandler.received['transfer_encoding'] is None  # Sized, not chunked
+    finally:
+        document.close()
+        client.close()
+        server.shutdown()
+
+
+def main():
+    """Run all tests."""
+    for test in (
+        test_spool_stays_in_memory_only_below_threshold,
+        test_multipart_stream_matches_encoded_body,
+        test_upload_streams_with_constant_memory,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
+    print("✓ All document upload tests passed!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests for the server-side port of the heuristic detector.
+Results must match evaluateText in ai_checker.js (compared through node when it is installed).
+Runs offline - no FinChat access required.
+"""
+
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+
+from heuristic_detector import evaluate_text, evaluate_texts, to_fixed
+
+
+HUMAN = (
+    "I wasn't sure what to expect. The train was late - again! - and the station smelled of rain.\n\n"
+    "However, the café across the road was open. Why not? I ordered tea, sat by the window, and watched "
+    "people hurry past with umbrellas, newspapers, and the grim look of commuters everywhere.\n\n"
+    "It was fine. Really."
+)
+
+AI = ' '.join(
+    "Artificial intelligence is transforming the modern business landscape in significant ways."
+    for _ in range(8)
+)
+
+# Fragments the fuzzer combines; include JS/Python whitespace and case-folding differences
+FRAGMENTS = [
+    'word', 'Word', 'the', 'model', 'however', 'HOWEVER', 'Indeed', 'moreover,', 'ſimilarly', 'xhowever',
+    '.', '!', '?', '...', ',', ' ', '\u2003', '  ', '\n', '\n\n', '\n\n\n', '\t', '\x1c', '\x85', '\xa0', '\u3000',
+    '\ufeff', '\u200b', 'café', '東京', '\U0001F600', '\u212Aelvin', 'İstanbul', "don't", 'e.g.', '$5', '-', '_',
+]
+
+
+def test_scores_and_fields():
+    """Obvious human and AI texts get the expected verdicts and JS-formatted fields."""
+    human = evaluate_text(HUMAN)
+    assert human['isAI'] is False
+    assert human['metrics']['transitionCount'] == 1 and human['metrics']['paragraphBreaks'] == 2
+    assert human['metrics']['punctuationVariety'] == 2
+
+    ai = evaluate_text(AI)
+    assert ai['isAI'] is True
+    assert ai['sentenceCount'] == 8 and ai['metrics']['sentenceVariance'] == '0.00'
+    assert set(ai) == {'isAI', 'aiProbability', 'humanProbability', 'confidence', 'wordCount',
+                       'sentenceCount', 'avgWordsPerSentence', 'metrics'}
+
+
+def test_errors_and_batches():
+    """Empty and short texts get evaluateText's errors; a batch scores each text as on its own."""
+    assert evaluate_text('') == {'error': 'Please enter some text to evaluate.'}
+    assert evaluate_text(' \n ') == {'error': 'Please enter some text to evaluate.'}
+    assert 'too short' in evaluate_text('only five words right here')['error']
+    texts = [HUMAN, 'short', AI, '! ' * 12]
+    assert evaluate_texts(texts) == [evaluate_text(text) for text in texts]
+    assert evaluate_text('! ' * 12)['avgWordsPerSentence'] == 'Infinity'
+    assert evaluate_texts([]) == []
+
+
+def test_to_fixed_rounds_like_javascript():
+    """toFixed rounds the exact binary value half away from zero."""
+    assert to_fixed(56.25, 1) == '56.3'
+    assert to_fixed(0.35, 1) == '0.3'  # 0.35 is stored as 0.34999...
+    assert to_fixed(2.5, 0) == '3'
+    assert to_fixed(float('nan'), 1) == 'NaN'
+
+
+def _js_evaluate(texts):
+    """Run evaluateText from ai_checker.js in node on each text."""
+    source = open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ai_checker.js'), encoding='utf-8').read()
+    functions = [re.search(rf'function {name}\(.*?\n}}\n', source, re.S).group(0)
+                 for name in ('evaluateText', 'calculateVariance')]
+    script = '\n'.join(functions) + (
+        "\nlet input = '';\nprocess.stdin.on('data', d => input += d);\n"
+        "process.stdin.on('end', () => console.log(JSON.stringify(JSON.parse(input).map(evaluateText))));\n"
+    )
+    output = subprocess.run(['node', '-e', script], input=json.dumps(texts), capture_output=True,
+                            text=True, encoding='utf-8', check=True).stdout
+    return json.loads(output)
+
+
+def test_matches_javascript_version():
+    """The port and evaluateText agree on every field for fuzzed texts (needs node)."""
+    if shutil.which('node') is None:
+        print("  (node not installed - skipped)")
+        return
+    rng = random.Random(19)
+    texts = [HUMAN, AI, '', '! ' * 12]
+    texts += [''.join(rng.choice(FRAGMENTS) + rng.choice(['', ' ']) for _ in range(rng.randint(5, 300)))
+              for _ in range(2000)]
+    expected = _js_evaluate(texts)
+    for text, actual, wanted in zip(texts, evaluate_texts(texts), expected):
+        assert actual == wanted, f"Mismatch for {text!r}: {actual} != {wanted}"
+
+
+def main():
+    """Run all tests."""
+    for test in (
+        test_scores_and_fields,
+        test_errors_and_batches,
+        test_to_fixed_rounds_like_javascript,
+        test_matches_javascript_version,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
+    print("✓ All heuristic detector tests passed!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded job queue used by the backend server.
+Runs offline - no FinChat access required.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+
+from job_queue import AsyncJobQueue, BULK, INTERACTIVE, JobQueue, QueueFullError
+
+
+def _wait_for(predicate, timeout=5.0):
+    """Wait until predicate() is true or the timeout expires."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_runs_jobs_on_bounded_workers():
+    """Jobs run, and never more than max_workers at once."""
+    queue = JobQueue(max_workers=2, max_queue_depth=50, name='test')
+    lock = threading.Lock()
+    active = {'now': 0, 'peak': 0, 'done': 0}
+
+    def job():
+        with lock:
+            active['now'] += 1
+            active['peak'] = max(active['peak'], active['now'])
+        time.sleep(0.02)
+        with lock:
+            active['now'] -= 1
+            active['done'] += 1
+
+    for i in range(10):
+        queue.submit(f"job-{i}", 'go', job)
+
+    assert _wait_for(lambda: active['done'] == 10)
+    assert active['peak'] <= 2
+    assert queue.stats()['workers_started'] == 2
+    assert queue.stats()['completed'] == 10
+    queue.shutdown()
+
+
+def test_rejects_when_full_and_reports_position():
+    """Submits beyond max_queue_depth raise QueueFullError; positions are 1-based."""
+    queue = JobQueue(max_workers=1, max_queue_depth=2, name='test')
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocker():
+        started.set()
+        release.wait(5)
+
+    queue.submit('running', 'go', blocker)
+    assert started.wait(5)
+
+    assert queue.submit('first', 'go', lambda: None) == 1
+    assert queue.submit('second', 'go2', lambda: None) == 2
+    assert queue.position('first') == 1
+    assert queue.position('second') == 2
+    assert queue.position('running') is None
+
+    try:
+        queue.submit('third', 'go', lambda: None)
+        assert False, "expected QueueFullError"
+    except QueueFullError as e:
+        assert e.max_depth == 2
+    assert queue.stats()['rejected'] == 1
+
+    assert queue.cancel('first')
+    assert queue.position('second') == 1
+
+    release.set()
+    assert _wait_for(lambda: queue.stats()['waiting'] == 0)
+    queue.shutdown()
+
+
+def test_kind_limit_lets_other_kinds_pass():
+    """A kind at its limit does not block jobs of other kinds."""
+    queue = JobQueue(max_workers=3, max_queue_depth=10, kind_limits={'go2': 1}, name='test')
+    release = threading.Event()
+    ran = []
+
+    def slow(name):
+        ran.append(name)
+        release.wait(5)
+
+    queue.submit('a', 'go2', slow, 'a')
+    queue.submit('b', 'go2', slow, 'b')
+    queue.submit('c', 'go', slow, 'c')
+
+    assert _wait_for(lambda: len(ran) == 2)
+    assert sorted(ran) == ['a', 'c']
+    assert queue.position('b') == 1
+
+    release.set()
+    assert _wait_for(lambda: len(ran) == 3)
+    queue.shutdown()
+
+
+def _blocked_queue(**options):
+    """A single-worker queue whose worker is held by a blocking job until release is set."""
+    queue = JobQueue(max_workers=1, max_queue_depth=50, name='test', **options)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocker():
+        started.set()
+        release.wait(5)
+
+    queue.submit('blocker', 'go', blocker)
+    assert started.wait(5)
+    return queue, release
+
+
+def test_interactive_jobs_run_before_bulk():
+    """Waiting interactive jobs start before bulk jobs submitted earlier."""
+    queue, release = _blocked_queue()
+    ran = []
+    for i in range(3):
+        queue.submit(f'bulk-{i}', 'go', ran.append, f'bulk-{i}', job_class=BULK, client='batch')
+    assert queue.submit('click', 'go2', ran.append, 'click', job_class=INTERACTIVE, client='user') == 1
+    assert queue.position('bulk-0') == 2
+
+    release.set()
+    assert _wait_for(lambda: len(ran) == 4)
+    assert ran == ['click', 'bulk-0', 'bulk-1', 'bulk-2']
+    stats = queue.stats()
+    assert stats['wait_by_class'][BULK]['started'] == 3
+    assert stats['wait_by_class'][INTERACTIVE]['started'] == 2
+    queue.shutdown()
+
+
+def test_fair_share_between_clients():
+    """Within a class, clients alternate in proportion to their weights."""
+    queue, release = _blocked_queue(client_weights={'heavy': 2})
+    ran = []
+    for i in range(4):
+        queue.submit(f'a-{i}', 'go', ran.append, 'a', client='a')
+    for i in range(4):
+        queue.submit(f'heavy-{i}', 'go', ran.append, 'heavy', client='heavy')
+    for i in range(2):
+        queue.submit(f'b-{i}', 'go', ran.append, 'b', client='b')
+
+    assert queue.position('a-1') == 5
+
+    release.set()
+    assert _wait_for(lambda: len(ran) == 10)
+    # heavy (weight 2) gets two turns for every turn of a and b
+    assert ran == ['a', 'heavy', 'b', 'heavy', 'a', 'heavy', 'b', 'heavy', 'a', 'a']
+    queue.shutdown()
+
+
+def test_aged_bulk_jobs_are_promoted():
+    """Bulk jobs that waited past the aging threshold run ahead of interactive ones."""
+    queue, release = _blocked_queue(bulk_aging_seconds=0.05)
+    ran = []
+    queue.submit('bulk', 'go', ran.append, 'bulk', job_class=BULK)
+    time.sleep(0.1)
+    queue.submit('click', 'go', ran.append, 'click')
+    assert queue.position('bulk') == 1
+
+    release.set()
+    assert _wait_for(lambda: len(ran) == 2)
+    assert ran == ['bulk', 'click']
+    assert queue.stats()['promoted'] == 1
+    queue.shutdown()
+
+
+def test_async_queue_runs_coroutines_up_to_limit():
+    """AsyncJobQueue runs coroutine jobs on the bound loop, at most max_workers at once."""
+    queue = AsyncJobQueue(max_workers=3, max_queue_depth=50, name='test')
+    active = {'now': 0, 'peak': 0, 'done': 0}
+
+    async def job():
+        active['now'] += 1
+        active['peak'] = max(active['peak'], active['now'])
+        await asyncio.sleep(0.01)
+        active['now'] -= 1
+        active['done'] += 1
+
+    async def run():
+        # Jobs submitted before bind() start once the loop is attached
+        queue.submit('early', 'go', job)
+        queue.bind(asyncio.get_running_loop())
+        for i in range(9):
+            queue.submit(f'job-{i}', 'go', job)
+        while active['done'] < 10:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(asyncio.wait_for(run(), 5))
+    assert active['peak'] == 3
+    assert queue.stats()['completed'] == 10
+    assert queue.stats()['workers_started'] == 0
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_runs_jobs_on_bounded_workers,
+        test_rejects_when_full_and_reports_position,
+        test_kind_limit_lets_other_kinds_pass,
+        test_interactive_jobs_run_before_bulk,
+        test_fair_share_between_clients,
+        test_aged_bulk_jobs_are_promoted,
+        test_async_queue_runs_coroutines_up_to_limit,
+    ]
+    for test in tests:
+        test()
+        print(f"✓ {test.__name__}")
+    print("✓ All job queue tests passed!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
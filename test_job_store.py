@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for the job store backends (in-memory and SQLite/WAL).
+Runs offline - no FinChat access required.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from job_store import InMemoryJobStore, SQLiteJobStore
+
+
+def _check_store(store):
+    """Shared behaviour every JobStore backend must provide."""
+    job = {'status': 'pending', 'progress': 0, 'status_message': 'Queued', 'created_at': '2024-01-01T00:00:00'}
+    store.save('a', job, payload={'kind': 'go', 'text': 'hello', 'purpose': 'test'})
+    store.save('b', dict(job, created_at='2024-01-02T00:00:00'), payload={'kind': 'go2', 'text': 'bye', 'purpose': ''})
+
+    store.update_progress('a', 40, 'Waiting for analysis to complete...')
+    store.flush()
+    assert store.get('a')['progress'] == 40
+    assert store.get('a')['status_message'] == 'Waiting for analysis to complete...'
+
+    # Saving without a payload keeps the stored one
+    store.save('a', dict(job, status='processing', cot_chat_id='chat-1'))
+    assert store.get_payload('a')['text'] == 'hello'
+
+    unfinished = store.list_unfinished()
+    assert [job_id for job_id, _, _ in unfinished] == ['a', 'b']
+    assert unfinished[0][1]['cot_chat_id'] == 'chat-1'
+
+    # Finishing a job drops its payload and removes it from the unfinished list
+    store.save('b', dict(job, status='completed', progress=100, result='done'))
+    assert store.get_payload('b') is None
+    assert store.get('b')['result'] == 'done'
+    assert [job_id for job_id, _, _ in store.list_unfinished()] == ['a']
+
+    # Late progress updates never rewind a finished job
+    store.update_progress('b', 90, 'Retrieving results...')
+    store.flush()
+    assert store.get('b')['progress'] == 100
+
+    # Retention deletes finished jobs created before the cutoff, never unfinished ones
+    assert store.purge_finished('2023-12-31T00:00:00') == 0
+    assert store.purge_finished('2024-01-03T00:00:00') == 1  # 'b'; 'a' is still processing
+    assert store.get('b') is None and store.get('a') is not None
+    store.save('b', dict(job, status='completed', progress=100, result='done'))
+
+    store.delete('a')
+    assert store.get('a') is None
+
+
+def test_in_memory_store():
+    """InMemoryJobStore satisfies the JobStore contract and drops jobs the job table evicts."""
+    store = InMemoryJobStore()
+    _check_store(store)
+    store.evicted('b')
+    assert store.get('b') is None
+
+
+def test_sqlite_store_survives_reopen():
+    """SQLiteJobStore uses WAL and keeps jobs across a close/reopen (a restart)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'jobs.db')
+        store = SQLiteJobStore(path, flush_interval=60)
+        _check_store(store)
+        assert store._conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        store.evicted('b')  # Still served from the database after the table evicts it
+
+        store.save('c', {'status': 'processing', 'progress': 5, 'created_at': '2024-01-03T00:00:00'},
+                   payload={'kind': 'go', 'text': 'resume me', 'purpose': ''})
+        store.update_progress('c', 55, 'Processing...')
+        store.close()  # close flushes buffered progress
+
+        reopened = SQLiteJobStore(path, flush_interval=60)
+        assert reopened.get('b')['result'] == 'done'
+        unfinished = reopened.list_unfinished()
+        assert [job_id for job_id, _, _ in unfinished] == ['c']
+        assert unfinished[0][1]['progress'] == 55
+        assert unfinished[0][2]['text'] == 'resume me'
+        reopened.close()
+
+
+def test_sqlite_retention_purges_in_background():
+    """With retention set, the flush thread deletes old finished jobs and keeps recent ones."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteJobStore(os.path.join(tmp, 'jobs.db'), flush_interval=0.05, retention_seconds=3600)
+        store.save('old', {'status': 'completed', 'created_at': '2000-01-01T00:00:00', 'result': 'x'})
+        store.save('stuck', {'status': 'processing', 'created_at': '2000-01-01T00:00:00'})
+        store.save('new', {'status': 'failed', 'created_at': '2999-01-01T00:00:00', 'error': 'x'})
+        deadline = time.monotonic() + 5
+        while store.get('old') is not None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert store.get('old') is None
+        assert store.get('stuck') is not None and store.get('new') is not None
+        store.close()
+
+
+def main():
+    """Run all tests."""
+    for test in (test_in_memory_store, test_sqlite_store_survives_reopen, test_sqlite_retention_purges_in_background):
+        test()
+        print(f"✓ {test.__name__}")
+    print("✓ All job store tests passed!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
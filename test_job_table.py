@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-process job table (JobRecord + TTL/LRU eviction).
+Runs offline - no FinChat access required.
+"""
+
+import sys
+import threading
+import time
+
+from job_table import JobRecord, JobTable
+
+
+def test_record_fields_are_fixed():
+    """JobRecord rejects unknown fields and round-trips through dicts."""
+    record = JobRecord('a', status='processing', text='preview')
+    try:
+        record.update(not_a_field=1)
+        assert False, "expected AttributeError"
+    except AttributeError:
+        pass
+    assert not hasattr(record, '__dict__')
+
+    copy = JobRecord.from_dict('a', dict(record.to_dict(), unknown='ignored'))
+    assert copy.to_dict() == record.to_dict()
+
+    # Chunk maps and provisional verdicts count towards the record's size
+    base = record.size_bytes()
+    record.update(chunk_jobs={'f' * 64: 'job-1'}, provisional={'verdict': 'likely_human', 'signals': ['x'] * 50})
+    assert record.size_bytes() > base + 64 + 250
+
+
+def test_active_jobs_are_never_evicted():
+    """Only finished jobs count against the TTL and bytes budget."""
+    table = JobTable(ttl_seconds=0.01, max_bytes=1)
+    table.add(JobRecord('running', status='processing'))
+    time.sleep(0.02)
+    assert table.sweep() == 0
+    assert 'running' in table
+
+    table.update('running', status='completed', result='x' * 10)
+    # Over budget immediately once finished
+    assert 'running' not in table
+    assert table.stats()['evicted_budget'] == 1
+
+
+def test_ttl_eviction():
+    """Finished jobs past their TTL are removed by sweep()."""
+    evicted = []
+    table = JobTable(ttl_seconds=0.05, max_bytes=0, on_evict=lambda r: evicted.append(r.job_id))
+    table.add(JobRecord('old', status='failed', error='boom'))
+    table.add(JobRecord('new', status='pending'))
+    assert table.sweep() == 0
+    time.sleep(0.06)
+    assert table.sweep() == 1
+    assert evicted == ['old']
+    assert 'new' in table
+
+
+def test_lru_budget_keeps_recently_read_jobs():
+    """Over budget, the least recently used finished job goes first."""
+    size = JobRecord('x', status='completed', result='r' * 100).size_bytes()
+    table = JobTable(ttl_seconds=0, max_bytes=size * 2 + 10)
+    for job_id in ('a', 'b'):
+        table.add(JobRecord(job_id, status='completed', result='r' * 100))
+    table.get('a')  # 'b' is now least recently used
+    table.add(JobRecord('c', status='completed', result='r' * 100))
+
+    assert 'a' in table and 'c' in table
+    assert 'b' not in table
+    assert table.stats()['finished_bytes'] <= table.max_bytes
+
+
+def test_versions_and_change_notifications():
+    """Every update bumps the version and wakes subscribers."""
+    table = JobTable()
+    table.add(JobRecord('job', status='processing'))
+    seen = []
+    table.subscribe('job', lambda record: seen.append(record.version))
+
+    table.update('job', progress=10)
+    table.update('job', progress=20, status_message='Working')
+    assert seen == [1, 2]
+
+    # No change within the timeout: same version comes back
+    assert table.wait_for_change('job', 2, timeout=0.01).version == 2
+    # Stale version returns immediately
+    assert table.wait_for_change('job', 1, timeout=5).version == 2
+
+    timer = threading.Timer(0.05, lambda: table.update('job', progress=30))
+    timer.start()
+    assert table.wait_for_change('job', 2, timeout=5).progress == 30
+    timer.join()
+    assert table.stats()['subscribers'] == 1
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_record_fields_are_fixed,
+        test_active_jobs_are_never_evicted,
+        test_ttl_eviction,
+        test_lru_budget_keeps_recently_read_jobs,
+        test_versions_and_change_notifications,
+    ]
+    for test in tests:
+        test()
+        print(f"✓ {test.__name__}")
+    print("✓ All job table tests passed!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
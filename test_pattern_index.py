@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for the Aho-Corasick pattern index built from the pattern PDFs.
+Runs offline - no FinChat access required.
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+from pattern_index import AhoCorasick, Pattern, PatternIndex, extract_patterns, load_or_build
+
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PDF_PATHS = [os.path.join(SCRIPT_DIR, name) for name in (
+    'COMPREHENSIVE LIST OF SIGNS OF AI WRITING.pdf', 'Human_vs_AI_Writing_Analysis_Report (rag) (1).pdf')]
+
+# Collapsed PDF text in the layout of the comprehensive list
+LIST_TEXT = (
+    "# **I. CONTENT-LEVEL SIGNS** ### **1. Generic statements** * “stands as a testament” * “plays a pivotal role” "
+    "### **2. False ranges (“from X to Y”)** * “from pasta to political resistance” * “Not only…, but…” "
+    "# **II. LEXICAL SIGNS** ### **7. Overuse of “AI vocabulary”** **delve, tapestry, landscape (abstract), "
+    "pivotal, key (adj.), vibrant** ### **30. Artifact strings** * `citeturn0search1` * `oaicite:` "
+    "# **IX. WHAT *IS NOT* A RELIABLE SIGN** ### **1. Good grammar** * “perfectly ordinary phrase”"
+)
+
+
+def test_automaton_matches_naive_search():
+    """Every occurrence of every key is reported, including overlapping and nested keys."""
+    rng = random.Random(22)
+    for _ in range(200):
+        keys = {''.join(rng.choice('abc') for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 8))}
+        text = ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 60)))
+        automaton = AhoCorasick((key, key) for key in keys)
+        found = sorted((start, end, key) for start, end, key in automaton.iter_matches(text))
+        expected = sorted((start, start + len(key), key) for key in keys
+                          for start in range(len(text)) if text.startswith(key, start))
+        assert found == expected, f"{keys} in {text!r}: {found} != {expected}"
+
+
+def test_extraction_from_list_layout():
+    """Quoted phrases, bold word lists and artifact strings are taken under their section; non-signs are not."""
+    patterns = {pattern.phrase: pattern.category for pattern in extract_patterns(LIST_TEXT, 'list.pdf')}
+    assert patterns['plays a pivotal role'] == '1. Generic statements'
+    assert patterns['from pasta to political resistance'] == '2. False ranges (“from X to Y”)'
+    assert patterns['Not only'] == '2. False ranges (“from X to Y”)'
+    assert patterns['landscape'] == patterns['vibrant'] == '7. Overuse of “AI vocabulary”'
+    assert patterns['citeturn0search1'] == '30. Artifact strings' and 'oaicite' in patterns
+    assert 'key' not in patterns and 'delve' not in patterns  # Shorter than MIN_PHRASE_CHARS
+    assert 'perfectly ordinary phrase' not in patterns
+    assert 'from' not in patterns and 'but' not in patterns
+
+
+def test_scan_offsets_and_boundaries():
+    """Matches carry offsets into the original text, ignore case and quote style, and respect word boundaries."""
+    index = PatternIndex([Pattern('it’s not', 'negation', 'a.pdf'), Pattern('tapestry', 'vocabulary', 'a.pdf'),
+                          Pattern('a rich tapestry', 'cliche', 'b.pdf')])
+    text = "İstanbul: IT'S NOT just a rich Tapestry; tapestrys and untapestry don't count."
+    matches = index.scan(text)
+    assert [(match['text'], match['category']) for match in matches] == [
+        ("IT'S NOT", 'negation'), ('a rich Tapestry', 'cliche'), ('Tapestry', 'vocabulary')]
+    for match in matches:
+        assert text[match['start']:match['end']] == match['text']
+
+
+def test_index_from_bundled_pdfs():
+    """The bundled PDFs yield phrases from both documents (needs pypdf)."""
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        print("  (pypdf not installed - skipped)")
+        return
+    index = PatternIndex.from_pdfs([path for path in PDF_PATHS if os.path.exists(path)])
+    assert index.stats()['patterns'] >= 50
+    matches = index.scan("Overall, this vibrant city stands as a testament to history. utm_source=chatgpt.com")
+    phrases = {match['phrase'] for match in matches}
+    assert {'Overall', 'vibrant', 'stands as a testament', 'utm_source=chatgpt.com'} <= phrases
+    assert not any('RELIABLE' in pattern.category for pattern in index.patterns)
+
+
+def test_artifact_rebuilt_only_when_a_pdf_changes():
+    """The parsed patterns are reused while the PDFs match by stamps or hash, and rebuilt when one changes."""
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        print("  (pypdf not installed - skipped)")
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        pdf = os.path.join(directory, 'patterns.pdf')
+        cache_path = os.path.join(directory, 'patterns-cache.json')
+        shutil.copyfile(PDF_PATHS[1], pdf)
+
+        index, info = load_or_build([pdf], cache_path)
+        assert info['state'] == 'built' and os.path.exists(cache_path)
+        assert load_or_build([pdf], cache_path)[1]['state'] == 'loaded'
+
+        os.utime(pdf, ns=(0, 10 ** 18))  # Same content, new mtime (e.g. a fresh checkout)
+        reloaded, info = load_or_build([pdf], cache_path)
+        assert info['state'] == 'loaded' and reloaded.patterns == index.patterns
+        assert load_or_build([pdf], cache_path)[1]['pdfs'][0]['mtime_ns'] == 10 ** 18
+
+        shutil.copyfile(PDF_PATHS[0], pdf)
+        rebuilt, info = load_or_build([pdf], cache_path)
+        assert info['state'] == 'built' and rebuilt.patterns != index.patterns
+
+
+def main():
+    """Run all tests."""
+    for test in (
+        test_automaton_matches_naive_search,
+        test_extraction_from_list_layout,
+        test_scan_offsets_and_boundaries,
+        test_index_from_bundled_pdfs,
+        test_artifact_rebuilt_only_when_a_pdf_changes,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
+    print("✓ All pattern index tests passed!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the content-addressed COT result cache.
+Runs offline - no FinChat access required.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from result_cache import ResultCache, make_cache_key
+
+
+def test_key_normalizes_text_and_covers_parameters():
+    """Whitespace/Unicode variants share a key; slug and parameters change it."""
+    base = make_cache_key('ai-detector-e1', {'purpose': 'general', 'text': 'Café  is\nopen '})
+    assert base == make_cache_key('ai-detector-e1', {'purpose': 'general', 'text': 'Café is open'})
+    assert base != make_cache_key('ai-detector-e1', {'purpose': 'other', 'text': 'Café is open'})
+    assert base != make_cache_key('copy-of-humanize-text-1', {'purpose': 'general', 'text': 'Café is open'})
+
+
+def test_memory_lru_ttl_and_counters():
+    """LRU eviction, TTL expiry and hit/miss counters."""
+    cache = ResultCache(max_entries=2, ttl_seconds=0.05)
+    cache.put('a' * 64, 'A')
+    cache.put('b' * 64, 'B')
+    assert cache.get('a' * 64) == 'A'
+    cache.put('c' * 64, 'C')  # evicts 'b', the least recently used
+    assert cache.get('b' * 64) is None
+    assert cache.get('c' * 64) == 'C'
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (2, 1, 1)
+
+    time.sleep(0.06)
+    assert cache.get('a' * 64) is None
+
+
+def test_disk_tier_and_invalidate():
+    """Entries survive a new cache instance via disk; invalidate clears both tiers."""
+    with tempfile.TemporaryDirectory() as tmp:
+        key = make_cache_key('ai-detector-e1', {'text': 'hello'})
+        ResultCache(disk_dir=tmp).put(key, 'report')
+
+        cache = ResultCache(disk_dir=tmp)
+        assert cache.get(key) == 'report'
+        assert cache.stats()['disk_hits'] == 1
+
+        assert cache.invalidate('../../etc/passwd') == 0
+        assert cache.invalidate(key) == 1
+        assert cache.get(key) is None
+        assert not os.listdir(tmp)
+
+
+def main():
+    """Run all tests."""
+    tests = [
+        test_key_normalizes_text_and_covers_parameters,
+        test_memory_lru_ttl_and_counters,
+        test_disk_tier_and_invalidate,
+    ]
+    for test in tests:
+        test()
+        print(f"✓ {test.__name__}")
+    print("✓ All result cache tests passed!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
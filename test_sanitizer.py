@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Equivalence tests for the compiled sanitizer.
+sanitize_text must match the original multi-pass implementation on every input.
+Runs offline - no FinChat access required.
+"""
+
+import contextlib
+import io
+import random
+import sys
+
+from sanitizer import StreamingSanitizer, reference_sanitize_text, sanitize_file, sanitize_stream, sanitize_text
+
+
+# Inputs chosen to exercise every pattern, both paths and the interactions between passes
+CORPUS = [
+    '', None, 0, 42, ' ', '\n\t ', 'plain text', '  leading and trailing  ',
+    'Price: $100 and $$5', 'multiple   spaces\n\nand\tlines', 'non breaking spaces　here',
+    'Text <|endoftext|> more', '<|endoftext|>', '<|ENDOFTEXT|>', '<|EndOfText|> mixed case',
+    '<|end_of_text|> <|fim_prefix|><|fim_middle|><|fim_suffix|><|fim_pad|>',
+    '<|startoftext|>start<|start_of_text|>', '<|end of text|>', '<|start  of   text|>',
+    '[|endoftext|]', '[|end_of_text|]', '[|end of text|]', '[|fim_pad|]',
+    '&lt;|endoftext|&gt;', '&LT;|ENDOFTEXT|&GT;', '&lt;|end_of_text|&gt;', '&lt;|fim_pad|&gt;',
+    '<endoftext>', '<END_OF_TEXT>', '[endoftext]', 'a<endoftext>b', 'a <endoftext> b',
+    '<end<endoftext>oftext>', '<endoftext><endoftext>', '[[endoftext]]',
+    # Nested tokens: removing the inner one exposes an outer one
+    '<|end<|endoftext|>oftext|>', '<|end<|EndOfText|>oftext|>', '[|end<|EndOfText|>oftext|]',
+    '<|xend<|fim|>text|>', '<|end<|fim|>|>', '<|end<|end<|fim|>|>|>', '<|a<|fim|>b|>',
+    '<|end<|x<|fim|>y|>z|>', '<|endof<|fim|>text|>',
+    # Legitimate pipe tokens stay
+    '<|user|> hello <|assistant|>', 'a | b | c', '| table | row |', 'x|>y', 'x<|y',
+    '<|custom end marker|>', '<|prefix_fim_x|>', '<|start here|>', '<|sTaRt of TeXt|>',
+    '<||>', '<|>', '<|', '|>', '[|', '&lt;|', '&lt;|user|&gt;',
+    # Unicode case folding around the patterns
+    '<|ſtart of text|>', '<|Kend text|>', '<|ENDİTEXT|>',
+    # Whitespace beyond ASCII (str.split() and regex \s agree on all of it)
+    'a\x1c\x1d\x85\xa0\u2028\u3000b\u200bc', '\x0b\x0c\r edges \r\n',
+]
+
+# Fragments the fuzzer combines into adversarial inputs
+FRAGMENTS = [
+    '<|', '|>', '[|', '|]', '&lt;|', '|&gt;', '&LT;|', '<', '>', '[', ']', '|', '$',
+    'endoftext', 'end_of_text', 'ENDOFTEXT', 'end', 'of', 'text', 'start', 'START', 'fim', 'fim_pad',
+    'startoftext', 'start_of_text', 'user', ' ', '  ', '\n', '\t', 'a', 'b', 'word', ' ',
+    '<|endoftext|>', '<endoftext>', '[endoftext]', '<|fim_middle|>', '&lt;|endoftext|&gt;',
+]
+
+
+def _compare(text):
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = reference_sanitize_text(text)
+        actual = sanitize_text(text)
+    assert actual == expected, f"Mismatch for {text!r}: {actual!r} != {expected!r}"
+
+
+def test_corpus_matches_reference():
+    """Every corpus entry sanitizes exactly as the original implementation did."""
+    for text in CORPUS:
+        _compare(text)
+
+
+def test_fuzzed_inputs_match_reference():
+    """Random combinations of token fragments sanitize exactly as the original implementation did."""
+    rng = random.Random(1234)
+    for _ in range(5000):
+        _compare(''.join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 25))))
+
+
+def test_large_document_matches_reference():
+    """A long document with scattered tokens matches, on both the fast and the full path."""
+    rng = random.Random(99)
+    words = ['the', 'model', 'writes', 'text', '$5', 'end', '\n\n', 'of', 'report.']
+    plain = ' '.join(rng.choice(words) for _ in range(50000))
+    _compare(plain)
+    _compare(plain + ' <endoftext> ' + plain)
+    _compare(plain.replace('report.', 'report. <|endoftext|>', 20))
+
+
+def _stream(text, rng):
+    """Sanitize text through the streaming sanitizer, split at random points."""
+    cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(0, 8))))
+    chunks = [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+    with contextlib.redirect_stdout(io.StringIO()):
+        return ''.join(sanitize_stream(chunks, segment_size=rng.randint(1, 16)))
+
+
+def test_streaming_matches_sanitize_text():
+    """Chunked sanitization equals sanitize_text, including tokens split across chunks."""
+    rng = random.Random(2024)
+    texts = [text for text in CORPUS if isinstance(text, str)]
+    texts += [''.join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 60))) for _ in range(5000)]
+    for text in texts:
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = sanitize_text(text) or ''
+        assert _stream(text, rng) == expected, f"Mismatch for {text!r}"
+
+
+def test_streaming_buffer_stays_small():
+    """A large document with tokens is emitted as it streams instead of being held."""
+    rng = random.Random(7)
+    words = ['the', 'model', 'writes', '<|endoftext|>', '<|user|>', 'a | b', '\n\n', 'report.']
+    text = ' '.join(rng.choice(words) for _ in range(200000))
+    sanitizer = StreamingSanitizer(segment_size=4096)
+    pieces, largest = [], 0
+    for start in range(0, len(text), 4096):
+        pieces.append(sanitizer.feed(text[start:start + 4096]))
+        largest = max(largest, len(sanitizer._buffer))
+    pieces.append(sanitizer.close())
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert ''.join(pieces) == sanitize_text(text)
+    assert largest < 3 * 4096
+
+
+def test_sanitize_file_decodes_split_characters():
+    """sanitize_file handles UTF-8 sequences and tokens split across reads."""
+    text = 'Café — naïve $5 <|endoftext|> 東京 ' * 5000
+    assert sanitize_file(io.BytesIO(text.encode('utf-8')), chunk_size=7) == sanitize_text(text)
+    assert sanitize_file(io.BytesIO(b'')) == ''
+
+
+def main():
+    """Run all tests."""
+    for test in (
+        test_corpus_matches_reference,
+        test_fuzzed_inputs_match_reference,
+        test_large_document_matches_reference,
+        test_streaming_matches_sanitize_text,
+        test_streaming_buffer_stays_small,
+        test_sanitize_file_decodes_split_characters,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
+    print("✓ All sanitizer tests passed!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for the pre-warmed FinChat session pool.
+Runs offline - no FinChat access required.
+"""
+
+import itertools
+import sys
+import time
+
+from session_pool import SessionPool
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_prewarmed_sessions_are_handed_out_once_and_refilled():
+    """Checkouts take ready sessions (each only once) and the pool refills to its target."""
+    counter = itertools.count()
+    pool = SessionPool(lambda: f'session-{next(counter)}', min_size=2, max_size=4)
+    pool.start()
+    assert _wait_for(lambda: pool.stats()['ready'] == 2)
+
+    first, second = pool.acquire(), pool.acquire()
+    assert first != second
+    assert _wait_for(lambda: pool.stats()['ready'] == 2)
+    assert pool.stats()['hits'] == 2 and pool.stats()['misses'] == 0
+    pool.shutdown()
+
+
+def test_empty_pool_falls_back_and_grows_target():
+    """A checkout from an empty pool creates a session on demand and raises the target."""
+    calls = []
+    pool = SessionPool(lambda: calls.append(1) or f'session-{len(calls)}', min_size=0, max_size=3)
+    assert pool.acquire() == 'session-1'
+    stats = pool.stats()
+    assert stats['misses'] == 1 and stats['target'] == 1
+    assert _wait_for(lambda: pool.stats()['ready'] == 1)
+    pool.shutdown()
+
+
+def test_expired_sessions_are_not_handed_out():
+    """Sessions older than max_age_seconds are discarded instead of handed out, and released upstream."""
+    created, released = [], []
+    pool = SessionPool(lambda: created.append(f'session-{len(created)}') or created[-1], min_size=1, max_size=2,
+                       max_age_seconds=0.05, release_session=released.append)
+    pool.start()
+    assert _wait_for(lambda: pool.stats()['ready'] == 1)
+    time.sleep(0.1)
+    assert pool.try_acquire() is None
+    assert pool.stats()['expired'] >= 1 and 'session-0' in released
+    pool.shutdown()
+    # Every session created was either handed out or released: none is left behind upstream
+    assert _wait_for(lambda: len(released) == len(created) - pool.stats()['hits'])
+
+
+def test_idle_pool_stops_replacing_unreleased_sessions():
+    """Without release_session, expired sessions are replaced only after a checkout, not on every expiry."""
+    created = []
+    pool = SessionPool(lambda: created.append(f'session-{len(created)}') or created[-1], min_size=1, max_size=2,
+                       max_age_seconds=0.05)
+    pool.start()
+    assert _wait_for(lambda: pool.stats()['ready'] == 1)
+
+    # Wake the maintainer often over several max_age periods with no checkout
+    for _ in range(20):
+        time.sleep(0.02)
+        pool._wake.set()
+    assert _wait_for(lambda: pool.stats()['expired'] >= 1)
+    assert created == ['session-0'] and pool.stats()['ready'] == 0
+
+    # A checkout shows demand again: the pool refills
+    assert pool.acquire() == 'session-1'
+    assert _wait_for(lambda: pool.stats()['ready'] >= 1)
+    pool.shutdown()
+
+
+def main():
+    """Run all tests."""
+    for test in (
+        test_prewarmed_sessions_are_handed_out_once_and_refilled,
+        test_empty_pool_falls_back_and_grows_target,
+        test_expired_sessions_are_not_handed_out,
+        test_idle_pool_stops_replacing_unreleased_sessions,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
+    print("✓ All session pool tests passed!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
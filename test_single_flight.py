@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests for single-flight coalescing of identical in-flight runs.
+Runs offline - no FinChat access required.
+"""
+
+import sys
+
+from single_flight import SingleFlight
+
+
+def test_second_job_attaches_to_running_flight():
+    """Only the first job for a key leads; later ones attach until the flight finishes."""
+    flights = SingleFlight()
+    assert flights.join('key', 'job-1') is True
+    assert flights.join('key', 'job-2') is False
+    assert flights.join('key', 'job-3') is False
+    assert flights.join('other', 'job-4') is True
+
+    assert flights.leader('key') == 'job-1'
+    assert flights.attached('key', 'job-1') == ['job-1', 'job-2', 'job-3']
+    assert flights.stats()['jobs_coalesced'] == 2
+
+    assert flights.finish('key', 'job-1') == ['job-1', 'job-2', 'job-3']
+    assert flights.leader('key') == ''
+    # A new submission after the flight finished starts a new run
+    assert flights.join('key', 'job-5') is True
+
+
+def test_no_flight_falls_back_to_the_job_itself():
+    """attached()/finish() on an unknown key return just the given job."""
+    flights = SingleFlight()
+    assert flights.attached('missing', 'job-1') == ['job-1']
+    assert flights.finish('missing', 'job-1') == ['job-1']
+
+
+def main():
+    """Run all tests."""
+    for test in (test_second_job_attaches_to_running_flight, test_no_flight_falls_back_to_the_job_itself):
+        test()
+        print(f"✓ {test.__name__}")
+    print("✓ All single-flight tests passed!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
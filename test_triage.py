@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for confidence-gated triage and band calibration.
+Runs offline - no FinChat access required.
+"""
+
+import sys
+
+from triage import ESCALATED, SETTLED, TriageBand, calibrate_band, decide, parse_band, settled_report, triage_counts
+
+
+BAND = TriageBand(20, 80)
+
+
+def _result(ai_probability):
+    return {'isAI': ai_probability > 55, 'aiProbability': f'{ai_probability:.1f}',
+            'humanProbability': f'{100 - ai_probability:.1f}', 'confidence': '80.0', 'wordCount': 40,
+            'sentenceCount': 4, 'avgWordsPerSentence': '10.0',
+            'metrics': {'sentenceVariance': '3.00', 'repetitionScore': '20.0%', 'transitionCount': 0,
+                        'punctuationVariety': 0, 'paragraphBreaks': 0, 'complexityRatio': '0.0%'}}
+
+
+def test_only_scores_outside_the_band_are_settled():
+    """Scores at or beyond a threshold settle; scores inside the band and errors escalate."""
+    assert decide(_result(85), BAND) == 'ai'
+    assert decide(_result(80), BAND) == 'ai'
+    assert decide(_result(20), BAND) == 'human'
+    assert decide(_result(50), BAND) is None
+    assert decide({'error': 'Text is too short.'}, BAND) is None
+    report = settled_report(_result(90), BAND)
+    assert 'VERDICT: LIKELY AI-GENERATED' in report and 'ambiguity band (20-80%)' in report
+
+
+def test_band_option_is_validated():
+    """A requested band needs two numbers in order; a missing one falls back to the default."""
+    assert parse_band(None, BAND) == BAND
+    assert parse_band([10, '90'], BAND) == TriageBand(10.0, 90.0)
+    for invalid in ([90, 10], [50], 'wide', [1, 'x']):
+        try:
+            parse_band(invalid, BAND)
+        except ValueError:
+            continue
+        raise AssertionError(f"Accepted invalid band {invalid!r}")
+
+
+def test_calibration_finds_the_widest_precise_band():
+    """Thresholds stop where settled texts would drop below the target precision."""
+    scores = [0, 5, 10, 15, 30, 40, 50, 60, 70, 85, 90, 95, 100, 100]
+    labels = [False, False, False, False, True, False, True, False, True, True, True, True, True, True]
+    calibration = calibrate_band(scores, labels, precision=1.0, min_support=2)
+    assert calibration['band'] == TriageBand(15, 70)
+    assert calibration['ai_settled'] == 6 and calibration['human_settled'] == 4
+    assert calibration['escalated'] == 4 and calibration['accuracy'] == 1.0
+
+    # Not enough texts on a side to meet min_support: that side settles nothing
+    calibration = calibrate_band([10, 90], [False, True], precision=0.9, min_support=5)
+    assert calibration['band'] == TriageBand(-1, 101) and calibration['settled'] == 0.0
+
+
+def test_counts_per_batch():
+    """Batch counts separate texts settled locally from those sent to the COT."""
+    assert triage_counts([SETTLED, ESCALATED, SETTLED, None]) == {'skipped': 2, 'escalated': 1}
+
+
+def main():
+    """Run all tests."""
+    for test in (
+        test_only_scores_outside_the_band_are_settled,
+        test_band_option_is_validated,
+        test_calibration_finds_the_widest_precise_band,
+        test_counts_per_batch,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
+    print("✓ All triage tests passed!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Confidence-gated triage for GO analyses: texts the local heuristic scores
+decisively are settled at once, and only texts inside the ambiguity band
+go to the COT. Also chooses the band from labeled data (calibrate_band).
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from heuristic_detector import format_report
+
+
+SETTLED = 'settled'
+ESCALATED = 'escalated'
+
+
+class TriageBand(NamedTuple):
+    """Ambiguity band on the heuristic aiProbability (0-100); scores inside it go to the COT."""
+    human_below: float  # At or below: settled as human-written
+    ai_above: float  # At or above: settled as AI-generated
+
+
+def parse_band(value, default: TriageBand) -> TriageBand:
+    """
+    Band from a request option: [human_below, ai_above], or default if value is missing.
+
+    Raises:
+        ValueError: If the value is not two numbers with human_below < ai_above
+    """
+    if value is None:
+        return default
+    try:
+        human_below, ai_above = (float(bound) for bound in value)
+    except (TypeError, ValueError):
+        raise ValueError('"triage_band" must be [human_below, ai_above]')
+    if not human_below < ai_above:
+        raise ValueError('"triage_band" needs human_below < ai_above')
+    return TriageBand(human_below, ai_above)
+
+
+def decide(result: Dict, band: TriageBand) -> Optional[str]:
+    """
+    Triage decision for an evaluate_text() result.
+
+    Returns:
+        'ai' or 'human' if the score is outside the band, None if the text must go to the COT
+        (inside the band, or the heuristic could not score it)
+    """
+    if 'error' in result:
+        return None
+    score = float(result['aiProbability'])
+    if score >= band.ai_above:
+        return 'ai'
+    if score <= band.human_below:
+        return 'human'
+    return None
+
+
+def settled_report(result: Dict, band: TriageBand) -> str:
+    """Result text of a job settled by triage: the heuristic report and why no COT ran."""
+    return (f"{format_report(result)}\n"
+            f"Settled by triage without a COT run: the AI probability is outside the ambiguity band "
+            f"({band.human_below:g}-{band.ai_above:g}%).")
+
+
+def calibrate_band(scores: Sequence[float], labels: Sequence[bool], precision: float = 0.95,
+                   min_support: int = 5) -> Dict:
+    """
+    Choose the widest settling thresholds that keep settled texts correct at the target precision.
+
+    ai_above is the lowest score at which texts scoring at or above it are AI-written with at
+    least that precision; human_below is the highest score at which texts scoring at or below it
+    are human-written with it. Each side must settle at least min_support texts, otherwise it
+    settles nothing (ai_above 101, human_below -1).
+
+    Args:
+        scores: Heuristic aiProbability per text
+        labels: True for AI-generated texts
+        precision: Required share of correct verdicts among settled texts on each side
+        min_support: Fewest texts a threshold must settle
+
+    Returns:
+        {'band': TriageBand, 'settled': <share of texts settled>, 'accuracy': <share of settled
+        texts decided correctly>, 'ai_settled': n, 'human_settled': n, 'escalated': n}
+    """
+    pairs = sorted(zip((float(score) for score in scores), (bool(label) for label in labels)))
+    total = len(pairs)
+    candidates = sorted({score for score, _ in pairs})
+
+    ai_above = 101.0
+    for threshold in candidates:
+        side = [label for score, label in pairs if score >= threshold]
+        if len(side) >= min_support and sum(side) / len(side) >= precision:
+            ai_above = threshold
+            break
+
+    human_below = -1.0
+    for threshold in reversed([score for score in candidates if score < ai_above]):
+        side = [label for score, label in pairs if score <= threshold]
+        if len(side) >= min_support and (len(side) - sum(side)) / len(side) >= precision:
+            human_below = threshold
+            break
+
+    band = TriageBand(human_below, ai_above)
+    ai_side = [label for score, label in pairs if score >= band.ai_above]
+    human_side = [label for score, label in pairs if score <= band.human_below]
+    settled = len(ai_side) + len(human_side)
+    correct = sum(ai_side) + len(human_side) - sum(human_side)
+    return {
+        'band': band,
+        'settled': settled / total if total else 0.0,
+        'accuracy': correct / settled if settled else None,
+        'ai_settled': len(ai_side),
+        'human_settled': len(human_side),
+        'escalated': total - settled,
+    }
+
+
+def triage_counts(decisions: List[Optional[str]]) -> Dict[str, int]:
+    """Per-batch counts: texts settled locally ('skipped' by the COT) and escalated to it."""
+    skipped = sum(1 for decision in decisions if decision == SETTLED)
+    return {'skipped': skipped, 'escalated': sum(1 for decision in decisions if decision == ESCALATED)}